@@ -0,0 +1,232 @@
+# benchmark.py
+#
+# Golden-query benchmark for the build -> ingest -> search pipeline.
+#
+# Runs against a local Postgres with pgvector (PG* environment variables,
+# same as ingestion.py) inside a scratch schema, using deterministic fake
+# embeddings so results are reproducible and free. The manual_chunks
+# schema is created from the Prisma migrations, so the benchmark always
+# measures the current table and index definitions.
+#
+# Usage:
+#   python chunking/benchmark.py --k 5 --output bench.json
+#   python chunking/benchmark.py --compare bench.json
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+from typing import Dict, List
+
+from pgvector.psycopg2 import register_vector
+
+from chunker import build_manual_chunks_from_text, build_manual_sections_from_text
+from fake_embeddings import fake_embedding, fake_query_embedding
+from ingestion import get_db_connection, ingest_chunks, ingest_sections
+from query_manual import search_by_embedding, search_routed_by_embedding
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+DEFAULT_TEXT_PATH = os.path.join(ROOT_DIR, "docs", "will_manual.txt")
+DEFAULT_GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "golden_queries.json")
+MIGRATIONS_GLOB = os.path.join(ROOT_DIR, "prisma", "migrations", "*manual*", "migration.sql")
+
+BENCH_SCHEMA = "manual_bench"
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def connect(schema: str, autocommit: bool):
+    conn = get_db_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+    # Session-level, committed immediately so later rollbacks keep it
+    cur.execute(f"SET search_path TO {schema}, public")
+    cur.close()
+    conn.autocommit = autocommit
+    return conn
+
+def setup_schema(schema: str):
+    conn = get_db_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute("CREATE EXTENSION IF NOT EXISTS vector SCHEMA public")
+    cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    cur.execute(f"CREATE SCHEMA {schema}")
+    cur.execute(f"SET search_path TO {schema}, public")
+    for path in sorted(glob.glob(MIGRATIONS_GLOB)):
+        with open(path, "r", encoding="utf-8") as f:
+            cur.execute(f.read())
+    cur.close()
+    conn.close()
+
+def drop_schema(schema: str):
+    conn = get_db_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    cur.close()
+    conn.close()
+
+def bench_build(text_path: str, repeats: int):
+    timings_ms = []
+    chunks = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        chunks = build_manual_chunks_from_text(text_path)
+        timings_ms.append((time.perf_counter() - start) * 1000)
+    return chunks, statistics.median(timings_ms)
+
+def bench_ingest(chunks: List[Dict], sections: List[Dict], text_path: str, schema: str) -> Dict:
+    conn = connect(schema, autocommit=True)
+    start = time.perf_counter()
+    ingest_chunks(chunks, text_path, embed=fake_embedding, conn=conn)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ingest_sections(sections, chunks, embed=fake_embedding, conn=conn)
+    sections_elapsed = time.perf_counter() - start
+
+    cur = conn.cursor()
+    cur.execute("ANALYZE manual_chunks")
+    cur.execute("ANALYZE manual_sections")
+    cur.close()
+    conn.close()
+    return {
+        "chunks": len(chunks),
+        "seconds": elapsed,
+        "chunks_per_second": len(chunks) / elapsed if elapsed else float("inf"),
+        "sections": len(sections),
+        "sections_seconds": sections_elapsed,
+    }
+
+def bench_search(golden: List[Dict], schema: str, k: int, repeats: int, route_k: int = 0) -> Dict:
+    conn = connect(schema, autocommit=False)
+    register_vector(conn)
+
+    latencies_ms = []
+    hits_at_1 = 0
+    hits_at_k = 0
+    reciprocal_ranks = []
+    misses = []
+
+    for case in golden:
+        expected = set(case["expected_sections"])
+        results = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            q_emb = fake_query_embedding(case["query"])
+            if route_k:
+                results = search_routed_by_embedding(conn, q_emb, top_k=k, route_k=route_k)
+            else:
+                results = search_by_embedding(conn, q_emb, top_k=k)
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+
+        sections = [r["section_number"] for r in results]
+        rank = next((i for i, s in enumerate(sections, start=1) if s in expected), None)
+        hits_at_1 += int(rank == 1)
+        hits_at_k += int(rank is not None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+        if rank is None:
+            misses.append({"query": case["query"], "expected": sorted(expected), "got": sections})
+
+    conn.close()
+    n = len(golden)
+    return {
+        "queries": n,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "hit_at_1": hits_at_1 / n,
+        f"hit_at_{k}": hits_at_k / n,
+        "mrr": statistics.mean(reciprocal_ranks),
+        "misses": misses,
+    }
+
+def print_report(report: Dict, baseline: Dict = None):
+    def line(label, key_path, fmt, better="lower"):
+        section, key = key_path
+        value = report[section][key]
+        text = f"{label:<24} {format(value, fmt):>12}"
+        if baseline and key in baseline.get(section, {}):
+            old = baseline[section][key]
+            delta = value - old
+            improved = delta < 0 if better == "lower" else delta > 0
+            text += f"   (was {format(old, fmt)}, {'better' if improved or delta == 0 else 'worse'})"
+        print(text)
+
+    k = report["k"]
+    print(f"\nBenchmark: {report['search']['queries']} golden queries, k={k}, {report['ingest']['chunks']} chunks\n")
+    line("build (ms, median)", ("build", "ms"), ".2f")
+    line("ingest (chunks/s)", ("ingest", "chunks_per_second"), ".1f", better="higher")
+    for mode in ("search", "routed"):
+        if mode not in report:
+            continue
+        label = "flat" if mode == "search" else f"routed({report['route_k']})"
+        line(f"{label} p50 (ms)", (mode, "p50_ms"), ".2f")
+        line(f"{label} p95 (ms)", (mode, "p95_ms"), ".2f")
+        line(f"{label} p99 (ms)", (mode, "p99_ms"), ".2f")
+        line(f"{label} hit@1", (mode, "hit_at_1"), ".3f", better="higher")
+        line(f"{label} hit@{k}", (mode, f"hit_at_{k}"), ".3f", better="higher")
+        line(f"{label} MRR", (mode, "mrr"), ".3f", better="higher")
+
+        for miss in report[mode]["misses"]:
+            print(f"  miss: {miss['query']!r} expected {miss['expected']} got {miss['got']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden-query benchmark for manual chunking and retrieval")
+    parser.add_argument("--text", default=DEFAULT_TEXT_PATH, help="Manual text to chunk")
+    parser.add_argument("--golden", default=DEFAULT_GOLDEN_PATH, help="Golden query set (JSON)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--build-repeats", type=int, default=20)
+    parser.add_argument("--query-repeats", type=int, default=5)
+    parser.add_argument("--route-k", type=int, default=3, help="Sections to route to in the routed run (0 = skip)")
+    parser.add_argument("--schema", default=BENCH_SCHEMA, help="Scratch schema (dropped and recreated)")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema afterwards")
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    with open(args.golden, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+
+    chunks, build_ms = bench_build(args.text, args.build_repeats)
+    sections = build_manual_sections_from_text(args.text)
+
+    setup_schema(args.schema)
+    try:
+        ingest = bench_ingest(chunks, sections, args.text, args.schema)
+        search = bench_search(golden, args.schema, args.k, args.query_repeats)
+        routed = None
+        if args.route_k:
+            routed = bench_search(golden, args.schema, args.k, args.query_repeats, route_k=args.route_k)
+    finally:
+        if not args.keep:
+            drop_schema(args.schema)
+
+    report = {
+        "k": args.k,
+        "build": {"ms": build_ms, "chunks": len(chunks)},
+        "ingest": ingest,
+        "search": search,
+    }
+    if routed:
+        report["route_k"] = args.route_k
+        report["routed"] = routed
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+if __name__ == "__main__":
+    main()
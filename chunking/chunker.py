@@ -3,6 +3,9 @@ from typing import List, Dict
 
 CHAPTER_NUMBER = 5
 CHAPTER_TITLE = "The Drafting of Wills"
+SOURCE = "Meyerowitz on Administration of Estates and their Taxation"
+EDITION = "2022"
+JURISDICTION = "South Africa"
 
 SECTION_HEADING_RE = re.compile(r"^(5\.\d+(?:\.\d+)?)\s+(.+)$")
 
@@ -50,10 +53,18 @@ def split_into_sections(raw_text: str) -> List[Dict]:
 
     return sections
 
+# Sentence boundary: end punctuation followed by a capital or a numbered item "(3)"
+SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?;:])\s+(?=[(A-Z])")
+
 def chunk_section(section: Dict, max_chars: int = 1500) -> List[Dict]:
     """
     Turn a section with paragraphs into smaller chunks based on character length.
     max_chars is a rough limit; adjust as needed.
+
+    Lines are hard-wrapped in the source, so the section is re-joined and split
+    at sentence boundaries; sentences are packed greedily into chunks of at most
+    max_chars (a single longer sentence becomes its own chunk). chunk_index
+    numbers the chunks in reading order so neighbours can be fetched later.
     """
     chunks = []
     buffer = []
@@ -61,18 +72,15 @@ def chunk_section(section: Dict, max_chars: int = 1500) -> List[Dict]:
     section_number = section["section_number"]
     section_title = section["section_title"]
 
-    # Merge paragraph lines into paragraph blocks (split by blank lines if needed)
-    paragraphs = [" ".join(p.strip() for p in section["paragraphs"]).strip()]
+    text = " ".join(p.strip() for p in section["paragraphs"]).strip()
+    sentences = [s for s in SENTENCE_BOUNDARY_RE.split(text) if s.strip()]
 
     chunk_index = 1
 
-    for para in paragraphs:
-        if not para:
-            continue
-
-        if buffer_len + len(para) + 1 <= max_chars:
-            buffer.append(para)
-            buffer_len += len(para) + 1
+    for sentence in sentences:
+        if buffer_len + len(sentence) + 1 <= max_chars:
+            buffer.append(sentence)
+            buffer_len += len(sentence) + 1
         else:
             # Flush buffer as a chunk
             if buffer:
@@ -80,12 +88,12 @@ def chunk_section(section: Dict, max_chars: int = 1500) -> List[Dict]:
                     "section_number": section_number,
                     "section_title": section_title,
                     "chunk_index": chunk_index,
-                    "text": "\n\n".join(buffer).strip(),
+                    "text": " ".join(buffer).strip(),
                 })
                 chunk_index += 1
-            # Start new buffer with current paragraph
-            buffer = [para]
-            buffer_len = len(para)
+            # Start new buffer with current sentence
+            buffer = [sentence]
+            buffer_len = len(sentence)
 
     # Flush any remaining buffer
     if buffer:
@@ -93,7 +101,7 @@ def chunk_section(section: Dict, max_chars: int = 1500) -> List[Dict]:
             "section_number": section_number,
             "section_title": section_title,
             "chunk_index": chunk_index,
-            "text": "\n\n".join(buffer).strip(),
+            "text": " ".join(buffer).strip(),
         })
 
     return chunks
@@ -109,16 +117,17 @@ def build_manual_chunks_from_text(path: str) -> List[Dict]:
             chunk_id = f"meyerowitz-ch{CHAPTER_NUMBER}-{sc['section_number']}-{sc['chunk_index']}"
             all_chunks.append({
                 "id": chunk_id,
-                "source": "Meyerowitz on Administration of Estates and their Taxation",
-                "edition": "2022",
+                "source": SOURCE,
+                "edition": EDITION,
                 "chapter_number": CHAPTER_NUMBER,
                 "chapter_title": CHAPTER_TITLE,
                 "section_number": sc["section_number"],
                 "section_title": sc["section_title"],
+                "chunk_index": sc["chunk_index"],
                 "page_start": None,
                 "page_end": None,
                 "doc_type": "manual_passage",
-                "jurisdiction": "South Africa",
+                "jurisdiction": JURISDICTION,
                 "text": sc["text"],
                 "tags": [],
                 "content_type": None,
@@ -127,6 +136,53 @@ def build_manual_chunks_from_text(path: str) -> List[Dict]:
 
     return all_chunks
 
+def parent_section_number(section_number: str):
+    """5.7.1 -> 5.7; top-level sections (5.7) have no parent section"""
+    parts = section_number.split(".")
+    return ".".join(parts[:-1]) if len(parts) > 2 else None
+
+def summarize_section(section: Dict, max_chars: int = 600) -> str:
+    """
+    Extractive summary for section routing: the leading sentences of the
+    section, up to max_chars. Openings in this manual state the topic, so the
+    lead is a cheap, deterministic stand-in for an abstractive summary.
+    """
+    text = " ".join(p.strip() for p in section["paragraphs"]).strip()
+    summary = []
+    length = 0
+    for sentence in SENTENCE_BOUNDARY_RE.split(text):
+        if summary and length + len(sentence) + 1 > max_chars:
+            break
+        summary.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(summary)[:max_chars].strip()
+
+def build_manual_sections_from_text(path: str) -> List[Dict]:
+    """
+    One record per section for the coarse (section-level) index. The text to
+    embed is the section heading plus its summary.
+    """
+    raw_text = load_text(path)
+    records = []
+
+    for section in split_into_sections(raw_text):
+        summary = summarize_section(section)
+        records.append({
+            "id": f"meyerowitz-ch{CHAPTER_NUMBER}-{section['section_number']}",
+            "source": SOURCE,
+            "edition": EDITION,
+            "chapter_number": CHAPTER_NUMBER,
+            "chapter_title": CHAPTER_TITLE,
+            "section_number": section["section_number"],
+            "section_title": section["section_title"],
+            "parent_section_number": parent_section_number(section["section_number"]),
+            "jurisdiction": JURISDICTION,
+            "summary": summary,
+            "embedding_text": f"{section['section_number']} {section['section_title']}\n{summary}",
+        })
+
+    return records
+
 if __name__ == "__main__":
     chunks = build_manual_chunks_from_text("docs/will_manual.txt")
     print(f"Built {len(chunks)} chunks.")
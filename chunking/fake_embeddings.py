@@ -0,0 +1,53 @@
+# fake_embeddings.py
+#
+# Deterministic, offline stand-in for the OpenAI embedding model, used by
+# benchmark.py. Texts are mapped to a signed feature-hashed bag of words so
+# lexical overlap still produces high cosine similarity, which keeps hit@k
+# meaningful without network calls or API cost.
+
+import hashlib
+import math
+import re
+from typing import List
+
+from pgvector import Vector
+
+EMBEDDING_DIMENSIONS = 1536
+
+TOKEN_RE = re.compile(r"[a-z]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "he",
+    "his", "in", "is", "it", "its", "of", "on", "or", "that", "the", "to", "was",
+    "which", "will", "with", "may", "not", "this", "if", "any", "such",
+}
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS or len(token) < 3:
+            continue
+        # Crude stemming so "trusts"/"trust" and "minors"/"minor" collide
+        if len(token) > 4 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def fake_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> List[float]:
+    vec = [0.0] * dimensions
+    for token in tokenize(text):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimensions
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vec[bucket] += sign
+
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm == 0:
+        # Empty text: any fixed unit vector keeps cosine distance defined
+        vec[0] = 1.0
+        return vec
+    return [v / norm for v in vec]
+
+def fake_query_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> Vector:
+    # query_manual binds query vectors as pgvector.Vector
+    return Vector(fake_embedding(text, dimensions))
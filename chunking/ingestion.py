@@ -2,10 +2,10 @@
 
 import os
 import psycopg2 #pip install psycopg2-binary
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 from openai import OpenAI #pip install openai
 
-from chunker import build_manual_chunks_from_text
+from chunker import build_manual_chunks_from_text, build_manual_sections_from_text
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -30,31 +30,42 @@ def get_embedding(client: OpenAI, text: str) -> list[float]:
     )
     return response.data[0].embedding
 
-def ingest_chunks(chunks: List[Dict], text_path: str):
-    client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-    conn = get_db_connection()
+def ingest_chunks(
+    chunks: List[Dict],
+    text_path: str,
+    embed: Optional[Callable[[str], list[float]]] = None,
+    conn=None,
+):
+    # embed/conn can be injected (e.g. fake embeddings and a scratch schema in benchmark.py)
+    if embed is None:
+        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+        embed = lambda text: get_embedding(client, text)
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
     conn.autocommit = True
     cur = conn.cursor()
 
     for i, chunk in enumerate(chunks, start=1):
-        emb = get_embedding(client, chunk["text"])
+        emb = embed(chunk["text"])
 
         cur.execute(
             """
             INSERT INTO manual_chunks (
                 id, source, edition, chapter_number, chapter_title,
-                section_number, section_title, page_start, page_end,
+                section_number, section_title, chunk_index, page_start, page_end,
                 doc_type, jurisdiction, text, tags, content_type,
                 complexity, embedding
             )
             VALUES (
                 %(id)s, %(source)s, %(edition)s, %(chapter_number)s, %(chapter_title)s,
-                %(section_number)s, %(section_title)s, %(page_start)s, %(page_end)s,
+                %(section_number)s, %(section_title)s, %(chunk_index)s, %(page_start)s, %(page_end)s,
                 %(doc_type)s, %(jurisdiction)s, %(text)s, %(tags)s, %(content_type)s,
                 %(complexity)s, %(embedding)s
             )
             ON CONFLICT (id) DO UPDATE
             SET text = EXCLUDED.text,
+                chunk_index = EXCLUDED.chunk_index,
                 embedding = EXCLUDED.embedding,
                 tags = EXCLUDED.tags,
                 content_type = EXCLUDED.content_type,
@@ -68,6 +79,7 @@ def ingest_chunks(chunks: List[Dict], text_path: str):
                 "chapter_title": chunk["chapter_title"],
                 "section_number": chunk["section_number"],
                 "section_title": chunk["section_title"],
+                "chunk_index": chunk["chunk_index"],
                 "page_start": chunk["page_start"],
                 "page_end": chunk["page_end"],
                 "doc_type": chunk["doc_type"],
@@ -83,12 +95,102 @@ def ingest_chunks(chunks: List[Dict], text_path: str):
         if i % 50 == 0:
             print(f"Ingested {i} chunks from {text_path}")
 
+    # Re-chunking can shrink a section; drop chunks this run no longer produced
+    for source, chapter_number in {(c["source"], c["chapter_number"]) for c in chunks}:
+        cur.execute(
+            """
+            DELETE FROM manual_chunks
+            WHERE source = %s AND chapter_number = %s AND NOT (id = ANY(%s));
+            """,
+            (source, chapter_number, [c["id"] for c in chunks if c["source"] == source]),
+        )
+        if cur.rowcount:
+            print(f"Removed {cur.rowcount} stale chunks for {source} chapter {chapter_number}")
+
+    cur.close()
+    if own_conn:
+        conn.close()
+
+def ingest_sections(
+    sections: List[Dict],
+    chunks: List[Dict],
+    embed: Optional[Callable[[str], list[float]]] = None,
+    conn=None,
+):
+    # Coarse index: one embedding of "<number> <title>\n<summary>" per section
+    if embed is None:
+        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+        embed = lambda text: get_embedding(client, text)
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+
+    chunk_counts: Dict[tuple, int] = {}
+    for chunk in chunks:
+        key = (chunk["source"], chunk["section_number"])
+        chunk_counts[key] = chunk_counts.get(key, 0) + 1
+
+    for section in sections:
+        emb = embed(section["embedding_text"])
+        cur.execute(
+            """
+            INSERT INTO manual_sections (
+                id, source, edition, chapter_number, chapter_title,
+                section_number, section_title, parent_section_number,
+                jurisdiction, summary, chunk_count, embedding
+            )
+            VALUES (
+                %(id)s, %(source)s, %(edition)s, %(chapter_number)s, %(chapter_title)s,
+                %(section_number)s, %(section_title)s, %(parent_section_number)s,
+                %(jurisdiction)s, %(summary)s, %(chunk_count)s, %(embedding)s
+            )
+            ON CONFLICT (id) DO UPDATE
+            SET section_title = EXCLUDED.section_title,
+                parent_section_number = EXCLUDED.parent_section_number,
+                summary = EXCLUDED.summary,
+                chunk_count = EXCLUDED.chunk_count,
+                embedding = EXCLUDED.embedding;
+            """,
+            {
+                "id": section["id"],
+                "source": section["source"],
+                "edition": section["edition"],
+                "chapter_number": section["chapter_number"],
+                "chapter_title": section["chapter_title"],
+                "section_number": section["section_number"],
+                "section_title": section["section_title"],
+                "parent_section_number": section["parent_section_number"],
+                "jurisdiction": section["jurisdiction"],
+                "summary": section["summary"],
+                "chunk_count": chunk_counts.get((section["source"], section["section_number"]), 0),
+                "embedding": emb,
+            },
+        )
+
+    # Sections are built from the whole manual; drop those it no longer has
+    for source in {s["source"] for s in sections}:
+        cur.execute(
+            """
+            DELETE FROM manual_sections
+            WHERE source = %s AND NOT (id = ANY(%s));
+            """,
+            (source, [s["id"] for s in sections if s["source"] == source]),
+        )
+        if cur.rowcount:
+            print(f"Removed {cur.rowcount} stale sections for {source}")
+
     cur.close()
-    conn.close()
+    if own_conn:
+        conn.close()
 
 if __name__ == "__main__":
     text_path = "docs/will_manual.txt"
     chunks = build_manual_chunks_from_text(text_path)
     print(f"Built {len(chunks)} chunks from {text_path}")
     ingest_chunks(chunks, text_path)
+    sections = build_manual_sections_from_text(text_path)
+    print(f"Built {len(sections)} sections from {text_path}")
+    ingest_sections(sections, chunks)
     print("Ingestion complete.")
@@ -1,16 +1,36 @@
 # query_manual.py
 
 import os
+import sys
 import psycopg2
 from pgvector.psycopg2 import register_vector
 from pgvector import Vector
-from typing import List, Dict
+from typing import List, Dict, Optional
 from openai import OpenAI
 
 from dotenv import load_dotenv
 load_dotenv()
 
+# Context and routed queries are shared with the API (external_api/services)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "external_api"))
+from services.manual_context import (  # noqa: E402
+    ANN_PARAMETERS,
+    CONTEXT_SQL,
+    ROUTED_SEARCH_SQL,
+    load_ann_settings as _load_ann_settings,
+    pack_context,
+    render_context,
+)
+
 OPENAI_EMBEDDING_MODEL = "text-embedding-3-large"
+JURISDICTION = "South Africa"
+
+# Index search parameters chosen by tune_ann.py; the API reads the same
+# file (MANUAL_ANN_SETTINGS, see external_api/utils/config.py)
+ANN_SETTINGS_PATH = os.environ.get(
+    "MANUAL_ANN_SETTINGS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ann_settings.json"),
+)
 
 def get_db_connection():
     conn = psycopg2.connect(
@@ -31,13 +51,39 @@ def get_embedding(client: OpenAI, text: str) -> list[float]:
     )
     return Vector(response.data[0].embedding)
 
-def search_manual(query: str, top_k: int = 5) -> List[Dict]:
-    client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
-    q_emb = get_embedding(client, query)
+def load_ann_settings(path: str = ANN_SETTINGS_PATH) -> Dict[str, int]:
+    """
+    Read index search parameters, e.g. {"hnsw.ef_search": 40}.
+    Returns an empty dict when no tuning has been done yet.
+    """
+    return _load_ann_settings(path)
+
+def apply_ann_settings(cur, ann_settings: Dict[str, int], local: bool = True):
+    """
+    Apply index search parameters with SET LOCAL (current transaction only,
+    i.e. per query) or SET (rest of the session).
+    """
+    scope = "SET LOCAL" if local else "SET"
+    for name, value in ann_settings.items():
+        if name not in ANN_PARAMETERS:
+            raise ValueError(f"Unsupported ANN parameter: {name}")
+        # GUC names cannot be bound as parameters; they are whitelisted above
+        cur.execute(f"{scope} {name} = %s", (int(value),))
+
+def search_by_embedding(
+    conn,
+    q_emb,
+    top_k: int = 5,
+    ann_settings: Optional[Dict[str, int]] = None,
+) -> List[Dict]:
+    if ann_settings is None:
+        ann_settings = load_ann_settings()
 
-    conn = get_db_connection()
     cur = conn.cursor()
 
+    # psycopg2 opens a transaction implicitly, so SET LOCAL only affects this query
+    apply_ann_settings(cur, ann_settings)
+
     # Parameter binding for vector works if psycopg2 + pgvector are set up;
     # otherwise you may need to adapt to your driver.
     cur.execute(
@@ -61,8 +107,8 @@ def search_manual(query: str, top_k: int = 5) -> List[Dict]:
     )
 
     rows = cur.fetchall()
+    conn.rollback()
     cur.close()
-    conn.close()
 
     results = []
     for row in rows:
@@ -80,6 +126,119 @@ def search_manual(query: str, top_k: int = 5) -> List[Dict]:
 
     return results
 
+def search_manual(
+    query: str,
+    top_k: int = 5,
+    ann_settings: Optional[Dict[str, int]] = None,
+) -> List[Dict]:
+    client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    q_emb = get_embedding(client, query)
+
+    conn = get_db_connection()
+    try:
+        return search_by_embedding(conn, q_emb, top_k, ann_settings)
+    finally:
+        conn.close()
+
+def search_context_by_embedding(
+    conn,
+    q_emb,
+    top_k: int = 5,
+    neighbors: int = 1,
+    token_budget: int = 2000,
+    ann_settings: Optional[Dict[str, int]] = None,
+) -> List[Dict]:
+    if ann_settings is None:
+        ann_settings = load_ann_settings()
+
+    cur = conn.cursor()
+    apply_ann_settings(cur, ann_settings)
+    cur.execute(
+        CONTEXT_SQL,
+        {"embedding": q_emb, "jurisdiction": JURISDICTION, "top_k": top_k, "neighbors": neighbors},
+    )
+    columns = [d[0] for d in cur.description]
+    rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+    conn.rollback()
+    cur.close()
+
+    sections, _ = pack_context(rows, token_budget)
+    return sections
+
+def search_manual_with_context(
+    query: str,
+    top_k: int = 5,
+    neighbors: int = 1,
+    token_budget: int = 2000,
+    ann_settings: Optional[Dict[str, int]] = None,
+) -> List[Dict]:
+    """
+    Retrieve the top_k hits with their chunk_index +/- neighbors chunks and
+    section headers, packed into token_budget, in a single query.
+    """
+    client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    q_emb = get_embedding(client, query)
+
+    conn = get_db_connection()
+    try:
+        return search_context_by_embedding(conn, q_emb, top_k, neighbors, token_budget, ann_settings)
+    finally:
+        conn.close()
+
+def search_routed_by_embedding(
+    conn,
+    q_emb,
+    top_k: int = 5,
+    route_k: int = 3,
+    ann_settings: Optional[Dict[str, int]] = None,
+) -> List[Dict]:
+    if ann_settings is None:
+        ann_settings = load_ann_settings()
+
+    cur = conn.cursor()
+    apply_ann_settings(cur, ann_settings)
+    cur.execute(
+        ROUTED_SEARCH_SQL,
+        {"embedding": q_emb, "jurisdiction": JURISDICTION, "top_k": top_k, "sections": route_k},
+    )
+    rows = cur.fetchall()
+    conn.rollback()
+    cur.close()
+
+    return [
+        {
+            "id": row[0],
+            "chapter_number": row[1],
+            "chapter_title": row[2],
+            "section_number": row[3],
+            "section_title": row[4],
+            "page_start": row[5],
+            "page_end": row[6],
+            "text": row[7],
+            "similarity": float(row[8]),
+        }
+        for row in rows
+    ]
+
+def search_manual_routed(
+    query: str,
+    top_k: int = 5,
+    route_k: int = 3,
+    ann_settings: Optional[Dict[str, int]] = None,
+) -> List[Dict]:
+    """
+    Same result shape as search_manual, but only chunks from the route_k
+    sections closest to the query (plus their subsections) are ranked.
+    """
+    client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    q_emb = get_embedding(client, query)
+
+    conn = get_db_connection()
+    try:
+        return search_routed_by_embedding(conn, q_emb, top_k, route_k, ann_settings)
+    finally:
+        conn.close()
+
 if __name__ == "__main__":
     query = "usufruct for surviving spouse over primary residence, bare dominium to children per stirpes"
     results = search_manual(query, top_k=5)
@@ -89,3 +248,7 @@ if __name__ == "__main__":
             f"(pages {r['page_start']}–{r['page_end']})"
         )
         print(r["text"][:400], "...\n")
+
+    print("--------------------------------")
+    sections = search_manual_with_context(query, top_k=5, neighbors=1, token_budget=2000)
+    print(render_context(sections))
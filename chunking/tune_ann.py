@@ -0,0 +1,191 @@
+# tune_ann.py
+#
+# Recall/latency sweep for the manual_chunks ANN index.
+#
+# 1. Embeds a query set and computes exact top-k neighbours with index
+#    scans disabled (sequential scan = ground truth).
+# 2. Re-runs every query for each hnsw.ef_search / ivfflat.probes value
+#    and reports recall@k, p50/p95 latency and index size.
+# 3. Writes the cheapest setting that reaches --target-recall to
+#    ann_settings.json, which search_manual and the API's
+#    ManualSearchService apply per query. The file is authoritative; the
+#    API's MANUAL_SEARCH_* settings only fill in parameters it does not set.
+#
+# Usage:
+#   python chunking/tune_ann.py --queries queries.txt --k 5 --target-recall 0.95
+
+import argparse
+import json
+import statistics
+import time
+import os
+from typing import Dict, List, Optional
+
+from openai import OpenAI
+
+from query_manual import (
+    ANN_SETTINGS_PATH,
+    apply_ann_settings,
+    get_db_connection,
+    get_embedding,
+)
+
+DEFAULT_QUERIES = [
+    "usufruct for surviving spouse over primary residence, bare dominium to children per stirpes",
+    "difference between fideicommissum and usufruct",
+    "joint will of spouses and massing of estates",
+    "minor's portion held in trust until majority",
+    "appointment of executors and security",
+    "substitution of beneficiaries who predecease the testator",
+    "bequest to a class of persons such as grandchildren",
+    "collation of advances made to children",
+    "simultaneous death of testator and beneficiary",
+    "powers of trustees to invest trust funds",
+]
+
+SWEEPS = {
+    "hnsw": ("hnsw.ef_search", [10, 20, 40, 80, 160, 320]),
+    "ivfflat": ("ivfflat.probes", [1, 2, 4, 8, 16, 32, 64, 100]),
+}
+
+KNN_SQL = """
+    SELECT id
+    FROM manual_chunks
+    WHERE jurisdiction = 'South Africa'
+    ORDER BY embedding <=> %s::vector
+    LIMIT %s;
+"""
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def load_queries(path: Optional[str]) -> List[str]:
+    if not path:
+        return DEFAULT_QUERIES
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def describe_index(cur) -> Optional[Dict]:
+    """Find the vector index on manual_chunks and its on-disk size"""
+    cur.execute(
+        """
+        SELECT i.relname, am.amname, pg_relation_size(i.oid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        JOIN pg_class t ON t.oid = x.indrelid
+        JOIN pg_am am ON am.oid = i.relam
+        WHERE t.relname = 'manual_chunks' AND am.amname IN ('hnsw', 'ivfflat');
+        """
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return {"name": row[0], "type": row[1], "size_bytes": row[2]}
+
+def exact_top_k(conn, embeddings: List, k: int) -> List[List[str]]:
+    cur = conn.cursor()
+    truth = []
+    for emb in embeddings:
+        # Force a sequential scan so the result is exact
+        cur.execute("SET LOCAL enable_indexscan = off")
+        cur.execute("SET LOCAL enable_bitmapscan = off")
+        cur.execute(KNN_SQL, (emb, k))
+        truth.append([row[0] for row in cur.fetchall()])
+        conn.rollback()
+    cur.close()
+    return truth
+
+def run_setting(conn, embeddings: List, truth: List[List[str]], k: int,
+                ann_settings: Dict[str, int], repeats: int) -> Dict:
+    cur = conn.cursor()
+    latencies_ms = []
+    recalls = []
+    for emb, expected in zip(embeddings, truth):
+        for _ in range(repeats):
+            apply_ann_settings(cur, ann_settings)
+            start = time.perf_counter()
+            cur.execute(KNN_SQL, (emb, k))
+            found = [row[0] for row in cur.fetchall()]
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+            conn.rollback()
+        recalls.append(len(set(found) & set(expected)) / max(1, len(expected)))
+    cur.close()
+    return {
+        "recall": statistics.mean(recalls),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+    }
+
+def choose(results: List[Dict], target_recall: float) -> Dict:
+    """Lowest p95 among settings meeting the target, else the best recall"""
+    passing = [r for r in results if r["recall"] >= target_recall]
+    if passing:
+        return min(passing, key=lambda r: r["p95_ms"])
+    return max(results, key=lambda r: (r["recall"], -r["p95_ms"]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune ANN search parameters for manual_chunks")
+    parser.add_argument("--queries", help="File with one query per line (defaults to a built-in set)")
+    parser.add_argument("--k", type=int, default=5, help="Neighbours per query (recall@k)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per query and setting")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--values", help="Comma separated parameter values to sweep")
+    parser.add_argument("--output", default=ANN_SETTINGS_PATH, help="Where to write the chosen settings")
+    parser.add_argument("--dry-run", action="store_true", help="Report only, do not write settings")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    embeddings = [get_embedding(client, q) for q in queries]
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    index = describe_index(cur)
+    conn.rollback()
+    cur.close()
+    if index is None:
+        raise SystemExit("No hnsw/ivfflat index on manual_chunks - nothing to tune")
+
+    parameter, values = SWEEPS[index["type"]]
+    if args.values:
+        values = [int(v) for v in args.values.split(",")]
+
+    print(f"Index {index['name']} ({index['type']}), {index['size_bytes'] / 1024 / 1024:.1f} MiB")
+    print(f"{len(queries)} queries, k={args.k}, {args.repeats} runs each\n")
+
+    truth = exact_top_k(conn, embeddings, args.k)
+
+    results = []
+    print(f"{parameter:>16} {'recall@' + str(args.k):>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for value in values:
+        stats = run_setting(conn, embeddings, truth, args.k, {parameter: value}, args.repeats)
+        stats["value"] = value
+        results.append(stats)
+        print(f"{value:>16} {stats['recall']:>10.3f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f}")
+
+    conn.close()
+
+    best = choose(results, args.target_recall)
+    print(f"\nChosen: {parameter} = {best['value']} "
+          f"(recall@{args.k} {best['recall']:.3f}, p95 {best['p95_ms']:.2f} ms)")
+    print(f"Fallback API setting (used where {os.path.basename(args.output)} is not deployed): "
+          f"MANUAL_SEARCH_{parameter.replace('.', '_').upper()}={best['value']}")
+
+    if args.dry_run:
+        return
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "index": index,
+            "k": args.k,
+            "target_recall": args.target_recall,
+            "parameters": {parameter: best["value"]},
+            "measured": {"recall": best["recall"], "p50_ms": best["p50_ms"], "p95_ms": best["p95_ms"]},
+            "sweep": results,
+        }, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
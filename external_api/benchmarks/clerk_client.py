@@ -0,0 +1,181 @@
+"""
+Per-call latency of Clerk requests: fresh client per call vs shared pool.
+
+Starts a local HTTPS stub of the Clerk users endpoint (self-signed
+certificate, optional artificial server latency) and times
+get_user_by_email both ways:
+
+- fresh:  a new httpx.AsyncClient per call (TCP + TLS handshake every time)
+- pooled: ClerkService's shared keep-alive client
+
+Usage:
+    python benchmarks/clerk_client.py
+    python benchmarks/clerk_client.py --calls 500 --concurrency 10 --server-delay-ms 20
+"""
+
+import argparse
+import asyncio
+import datetime as dt
+import ipaddress
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import httpx
+import uvicorn
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.clerk_service import ClerkService  # noqa: E402
+
+
+def write_self_signed_cert(directory: str) -> tuple[str, str]:
+    """Create a throwaway certificate for 127.0.0.1"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = dt.datetime.now(dt.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - dt.timedelta(minutes=1))
+        .not_valid_after(now + dt.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    return cert_path, key_path
+
+
+def build_stub(server_delay_ms: float) -> FastAPI:
+    """Minimal stand-in for Clerk's GET /v1/users"""
+    stub = FastAPI()
+
+    @stub.get("/v1/users")
+    async def list_users(email_address: str):
+        if server_delay_ms:
+            await asyncio.sleep(server_delay_ms / 1000)
+        return [{"id": "user_stub", "email_addresses": [{"email_address": email_address}]}]
+
+    return stub
+
+
+def start_stub(server_delay_ms: float, cert_path: str, key_path: str) -> tuple[uvicorn.Server, int]:
+    """Run the stub in a background thread and return (server, port)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    config = uvicorn.Config(
+        build_stub(server_delay_ms),
+        host="127.0.0.1",
+        port=port,
+        ssl_certfile=cert_path,
+        ssl_keyfile=key_path,
+        log_level="warning",
+    )
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, port
+
+
+def summarize(label: str, latencies_ms: List[float], elapsed: float) -> Dict[str, float]:
+    """Print and return latency stats for one mode"""
+    ordered = sorted(latencies_ms)
+    row = {
+        "calls": len(ordered),
+        "mean_ms": statistics.mean(ordered),
+        "p50_ms": ordered[len(ordered) // 2],
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "calls_per_second": len(ordered) / elapsed,
+    }
+    print(
+        f"{label:<8} {row['calls']:>6} {row['mean_ms']:>9.2f} {row['p50_ms']:>9.2f} "
+        f"{row['p95_ms']:>9.2f} {row['calls_per_second']:>9.1f}"
+    )
+    return row
+
+
+async def run_mode(mode: str, base_url: str, calls: int, concurrency: int, cert_path: str) -> None:
+    """Time get_user_by_email lookups with concurrency calls in flight"""
+    service = ClerkService()
+    service.api_base_url = base_url
+    service.secret_key = "sk_test_stub"
+    service._client = service._build_client(verify=cert_path)
+
+    async def fresh_call(email: str):
+        # Previous behaviour: one client (and connection) per call
+        async with httpx.AsyncClient(timeout=30.0, verify=cert_path) as client:
+            await client.get(f"{base_url}/users", params={"email_address": [email]})
+
+    async def pooled_call(email: str):
+        _, error = await service.get_user_by_email(email)
+        if error:
+            raise RuntimeError(error)
+
+    call = fresh_call if mode == "fresh" else pooled_call
+    latencies_ms: List[float] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(calls):
+        queue.put_nowait(f"user{i}@example.co.za")
+
+    async def worker():
+        while not queue.empty():
+            email = queue.get_nowait()
+            start = time.perf_counter()
+            await call(email)
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await service.shutdown()
+
+    summarize(mode, latencies_ms, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clerk client connection reuse benchmark")
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--server-delay-ms", type=float, default=0.0, help="Artificial stub latency")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = write_self_signed_cert(directory)
+        server, port = start_stub(args.server_delay_ms, cert_path, key_path)
+        base_url = f"https://127.0.0.1:{port}/v1"
+
+        print(f"{'mode':<8} {'calls':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'calls/s':>9}")
+        for mode in ("fresh", "pooled"):
+            asyncio.run(run_mode(mode, base_url, args.calls, args.concurrency, cert_path))
+
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
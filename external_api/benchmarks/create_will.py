@@ -0,0 +1,115 @@
+"""
+Database round trips and latency of create-will, per user scenario.
+
+Runs the create-will body (main._process_will) against the database in
+DATABASE_URL (migrated with prisma/migrations) and counts, per request,
+what the async engine sends to Postgres:
+
+- one pre-ping per pool checkout
+- BEGIN, COMMIT and ROLLBACK
+- each statement
+
+Scenarios:
+
+- cached user: the user's IDs are in the resolution cache
+- known user: the user is in the database but not in the cache
+- new user: first request for an email (Clerk is answered in-process, so
+  only database time is measured)
+
+Every run inserts rows; point DATABASE_URL at a scratch database.
+
+Usage:
+    DATABASE_URL=postgresql://postgres@127.0.0.1:55432/wills python benchmarks/create_will.py
+    python benchmarks/create_will.py --requests 500
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from models.models import WillContent  # noqa: E402
+from services import user_service  # noqa: E402
+from services.clerk_service import clerk_service  # noqa: E402
+from tests.test_models import sample_will_content  # noqa: E402
+from utils.database import get_async_engine, get_async_sessionmaker  # noqa: E402
+
+round_trips: Counter = Counter()
+
+
+def count_round_trips() -> None:
+    engine = get_async_engine().sync_engine
+    event.listen(engine.pool, "checkout", lambda *args: round_trips.update(["ping"]))
+    event.listen(engine, "begin", lambda *args: round_trips.update(["begin"]))
+    event.listen(engine, "commit", lambda *args: round_trips.update(["commit"]))
+    event.listen(engine, "rollback", lambda *args: round_trips.update(["rollback"]))
+    event.listen(engine, "before_cursor_execute", lambda *args: round_trips.update(["statement"]))
+
+
+async def clerk_user(email: str):
+    return {"id": f"clerk_{uuid.uuid5(uuid.NAMESPACE_DNS, email).hex}"}, None
+
+
+async def run_scenario(name: str, will_content: WillContent, requests: int) -> Dict[str, float]:
+    shared_email = f"bench-{uuid.uuid4().hex[:8]}@example.co.za"
+    latencies: List[float] = []
+    counts: Counter = Counter()
+
+    for i in range(requests + 1):
+        email = f"bench-{uuid.uuid4().hex}@example.co.za" if name == "new user" else shared_email
+        if name == "known user":
+            await user_service.invalidate_user(email)
+        round_trips.clear()
+        start = time.perf_counter()
+        async with get_async_sessionmaker()() as db:
+            await main._process_will(will_content, email, db)
+        elapsed = time.perf_counter() - start
+        if i == 0:
+            # Creates the shared user and fills the statement caches
+            continue
+        latencies.append(elapsed)
+        counts.update(round_trips)
+
+    per_request = {kind: count / requests for kind, count in counts.items()}
+    return {
+        "round_trips": sum(per_request.values()),
+        "statements": per_request.get("statement", 0),
+        "transactions": per_request.get("commit", 0) + per_request.get("rollback", 0),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": statistics.quantiles(latencies, n=20)[18] * 1000,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    count_round_trips()
+    clerk_service.get_user_by_email = clerk_user
+    will_content = WillContent(**sample_will_content)
+
+    print(f"{'scenario':<14} {'round trips':>12} {'statements':>11} {'commit/rb':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for name in ("cached user", "known user", "new user"):
+        result = await run_scenario(name, will_content, args.requests)
+        print(
+            f"{name:<14} {result['round_trips']:>12.1f} {result['statements']:>11.1f} "
+            f"{result['transactions']:>10.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}"
+        )
+    await get_async_engine().dispose()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="create-will round trip benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main_cli()
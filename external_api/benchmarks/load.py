@@ -0,0 +1,148 @@
+"""
+Closed-loop load test for the API.
+
+Runs a sweep of concurrency levels against a running server and reports
+throughput and latency per level. With a blocking DB layer throughput
+flatlines at roughly one worker's worth of requests; with the async layer
+it should keep scaling until the connection pool or database saturates.
+
+Usage:
+    uvicorn main:app --port 8000 &
+    python benchmarks/load.py --url http://localhost:8000
+    python benchmarks/load.py --endpoint create-will --payload will.json
+    python benchmarks/load.py --concurrency 1 8 32 --duration 15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+from jose import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import settings  # noqa: E402
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def build_token(email: str) -> str:
+    """Sign a short-lived token accepted by require_auth"""
+    return jwt.encode(
+        {"app:UserEmailKey": email, "exp": datetime.utcnow() + timedelta(hours=1)},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    method: str,
+    path: str,
+    concurrency: int,
+    duration: float,
+    headers: Dict[str, str],
+    payload: Optional[Any],
+) -> Dict[str, Any]:
+    """
+    Keep concurrency requests in flight for duration seconds.
+
+    Returns:
+        Dictionary with request count, errors, throughput and latency stats
+    """
+    latencies_ms: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers=headers, json=payload)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "rps": len(latencies_ms) / elapsed,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "mean_ms": statistics.mean(latencies_ms),
+    }
+
+
+async def main_async(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Run the sweep and print one row per concurrency level"""
+    headers: Dict[str, str] = {}
+    payload = None
+    if args.endpoint == "health":
+        method, path = "GET", "/health"
+    else:
+        method, path = "POST", "/api/v1/create-will"
+        headers["Authorization"] = f"Bearer {build_token(args.email)}"
+        with open(args.payload, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    results = []
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30.0) as client:
+        # Warm the server's pools before measuring
+        await run_level(client, method, path, 1, 1.0, headers, payload)
+
+        print(f"{'conc':>6} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+        for concurrency in args.concurrency:
+            row = await run_level(client, method, path, concurrency, args.duration, headers, payload)
+            results.append(row)
+            print(
+                f"{row['concurrency']:>6} {row['requests']:>9} {row['errors']:>7} "
+                f"{row['rps']:>9.1f} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f}"
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency sweep load test")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of a running server")
+    parser.add_argument("--endpoint", choices=["health", "create-will"], default="health")
+    parser.add_argument("--payload", help="WillContent JSON file (create-will only)")
+    parser.add_argument("--email", default="loadtest@example.co.za", help="Token email (create-will only)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    if args.endpoint == "create-will" and not args.payload:
+        parser.error("--payload is required for create-will")
+
+    results = asyncio.run(main_async(args))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Caller-side cost of logging: synchronous handler vs the queued JSON handler.
+
+Logs the per-request lines of a create-will call to a sink that sleeps on
+every write (a slow or back-pressured stdout) and times the logging calls
+as seen by the request:
+
+- before: basicConfig-style StreamHandler, f-string messages, all at INFO
+- after:  ContextQueueHandler + listener thread, lazy %-args, step lines
+  at DEBUG with 1% of requests sampled
+
+Usage:
+    python benchmarks/log_throughput.py
+    python benchmarks/log_throughput.py --requests 20000 --write-delay-us 200
+"""
+
+import argparse
+import io
+import logging
+import os
+import queue
+import sys
+import time
+from logging.handlers import QueueListener
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.log import ContextQueueHandler, JSONFormatter, TEXT_FORMAT, debug_sampled_var, sample_debug_logging  # noqa: E402
+
+
+class SlowSink(io.StringIO):
+    """Stream whose writes take write_delay seconds"""
+
+    def __init__(self, write_delay: float):
+        super().__init__()
+        self.write_delay = write_delay
+
+    def write(self, s):
+        time.sleep(self.write_delay)
+        return len(s)
+
+
+def fresh_logger(name: str, handler: logging.Handler, level: int) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+def run_before(logger: logging.Logger, requests: int) -> float:
+    email, user_id, will_id = "someone@example.co.za", "user-1", "will-1"
+    start = time.perf_counter()
+    for _ in range(requests):
+        logger.info(f"Token verified successfully for user: {email}")
+        logger.info(f"Processing will for user email: {email}")
+        logger.info(f"User processed successfully: {user_id}")
+        logger.info(f"Creating will for user {user_id}: Will of Someone")
+        logger.info(f"Will created successfully: {will_id}")
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def run_after(logger: logging.Logger, requests: int, sample_rate: float) -> float:
+    email, user_id, will_id = "someone@example.co.za", "user-1", "will-1"
+    every = max(1, round(1 / sample_rate)) if sample_rate else 0
+    start = time.perf_counter()
+    for i in range(requests):
+        token = debug_sampled_var.set(bool(every) and i % every == 0)
+        logger.debug("Token verified for user: %s", email)
+        logger.debug("Processing will for user email: %s", email)
+        logger.debug("User processed successfully: %s", user_id)
+        logger.debug("Creating will for user %s: %s", user_id, "Will of Someone")
+        logger.info("Will created: %s", will_id, extra={"will_id": will_id, "user_id": user_id})
+        debug_sampled_var.reset(token)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Logging cost per request")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--write-delay-us", type=float, default=50.0)
+    parser.add_argument("--sample-rate", type=float, default=0.01)
+    args = parser.parse_args()
+    delay = args.write_delay_us / 1e6
+
+    sync_handler = logging.StreamHandler(SlowSink(delay))
+    sync_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    before = run_before(fresh_logger("bench.before", sync_handler, logging.INFO), args.requests)
+
+    stream = logging.StreamHandler(SlowSink(delay))
+    stream.setFormatter(JSONFormatter())
+    handler = ContextQueueHandler(queue.Queue(maxsize=100000))
+    listener = QueueListener(handler.queue, stream)
+    listener.start()
+    logger = fresh_logger("bench.after", handler, logging.DEBUG)
+    sample_debug_logging(["bench.after"], logging.INFO)
+    after = run_after(logger, args.requests, args.sample_rate)
+    drain_start = time.perf_counter()
+    listener.stop()
+    drain = time.perf_counter() - drain_start
+
+    print(f"{args.requests} requests, {args.write_delay_us:.0f}us per write\n")
+    print(f"{'handler':<34} {'us/request':>11}")
+    print(f"{'sync StreamHandler, 5 INFO lines':<34} {before:>11.1f}")
+    print(f"{'queued JSON, 1 INFO + sampled':<34} {after:>11.1f}")
+    print(f"\nlistener drained the backlog in {drain:.2f}s; dropped {handler.dropped}")
+
+
+if __name__ == "__main__":
+    main()
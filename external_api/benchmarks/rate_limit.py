@@ -0,0 +1,78 @@
+"""
+Per-request overhead of RateLimitMiddleware.
+
+Calls the ASGI stack directly (no server, no network) with a no-op inner
+app, with and without the middleware, for anonymous requests (IP bucket
+only) and authenticated ones (IP + user buckets, token already verified).
+
+Usage:
+    python benchmarks/rate_limit.py
+    python benchmarks/rate_limit.py --requests 200000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from jose import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import settings  # noqa: E402
+from utils.rate_limit import Limit, RateLimitMiddleware, TokenBuckets  # noqa: E402
+
+
+async def noop_app(scope, receive, send):
+    pass
+
+
+def make_scope(headers):
+    return {"type": "http", "path": "/api/v1/wills", "headers": headers, "client": ("203.0.113.9", 50000)}
+
+
+async def time_us(app, scope, requests: int) -> float:
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(scope, None, None)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def run(requests: int):
+    middleware = RateLimitMiddleware(noop_app, buckets=TokenBuckets())
+    # Never reject, so every call takes the full allow path
+    middleware.user_limit = middleware.ip_limit = Limit(rate=1e9, capacity=1e9)
+
+    token = jwt.encode(
+        {"app:UserEmailKey": "partner@example.co.za", "exp": datetime.utcnow() + timedelta(hours=1)},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+    common = [(b"host", b"api.example.co.za"), (b"user-agent", b"bench"), (b"accept", b"application/json")]
+    anonymous = make_scope(common)
+    authenticated = make_scope(common + [(b"authorization", f"Bearer {token}".encode())])
+
+    baseline = await time_us(noop_app, anonymous, requests)
+    rows = [
+        ("anonymous (IP bucket)", await time_us(middleware, anonymous, requests)),
+        ("authenticated (IP + user)", await time_us(middleware, authenticated, requests)),
+    ]
+
+    print(f"{'request':<28} {'us/request':>11} {'overhead us':>12}")
+    print(f"{'no middleware':<28} {baseline:>11.2f} {'-':>12}")
+    for label, us in rows:
+        print(f"{label:<28} {us:>11.2f} {us - baseline:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate limiter overhead benchmark")
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
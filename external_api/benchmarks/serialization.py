@@ -0,0 +1,129 @@
+"""
+Serialization cost per create-will request, before vs after orjson and
+canonical WillContent bytes.
+
+Builds a large will (hundreds of assets and beneficiaries) and times the
+serialization work done per request, excluding validation and I/O:
+
+- before: model_dump_json() for the idempotency hash, model_dump() plus
+  json.dumps for the JSONB column, stdlib JSONResponse rendering
+- after:  canonical_json() once (hash + column), orjson pass-through,
+  ORJSONResponse rendering
+
+Usage:
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --assets 500 --beneficiaries 500 --repeats 200
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.models import BulkWillItemResult, BulkWillResponse, WillContent  # noqa: E402
+from tests.test_models import sample_will_content  # noqa: E402
+from utils.database import json_serializer  # noqa: E402
+
+
+def build_large_will(assets: int, beneficiaries: int) -> Dict[str, Any]:
+    """Scale the sample will up to the requested list sizes"""
+    will = copy.deepcopy(sample_will_content)
+    asset = will["assets"][0]
+    beneficiary = will["beneficiaries"][0]
+    share = 100.0 / beneficiaries
+
+    will["assets"] = [
+        {**asset, "id": f"asset-{i}", "description": f"{asset['description']} {i}"}
+        for i in range(assets)
+    ]
+    will["beneficiaries"] = [
+        {
+            **beneficiary,
+            "id": f"ben-{i}",
+            "fullName": f"Beneficiary {i}",
+            "idNumber": f"{8000000000000 + i}",
+            "allocationPercentage": share,
+        }
+        for i in range(beneficiaries)
+    ]
+    return will
+
+
+def time_us(fn: Callable[[], Any], repeats: int) -> float:
+    """Median wall time of fn in microseconds"""
+    samples: List[float] = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Will serialization benchmark")
+    parser.add_argument("--assets", type=int, default=300)
+    parser.add_argument("--beneficiaries", type=int, default=300)
+    parser.add_argument("--bulk-items", type=int, default=1000, help="Items in the bulk response rendered")
+    parser.add_argument("--repeats", type=int, default=100)
+    args = parser.parse_args()
+
+    payload = build_large_will(args.assets, args.beneficiaries)
+    will = WillContent.model_validate(payload)
+    print(f"Will with {args.assets} assets, {args.beneficiaries} beneficiaries: "
+          f"{len(will.model_dump_json()) / 1024:.0f} KiB JSON\n")
+
+    def store_before():
+        hashlib.sha256(will.model_dump_json().encode()).hexdigest()
+        json.dumps(will.model_dump(mode="json"))
+
+    def store_after():
+        # Fresh instance each time so the cached bytes are not reused across runs
+        fresh = will.model_copy()
+        fresh._canonical_json = None
+        content = fresh.canonical_json()
+        hashlib.sha256(content).hexdigest()
+        json_serializer(content)
+
+    bulk = BulkWillResponse(
+        total=args.bulk_items,
+        created=args.bulk_items,
+        failed=0,
+        results=[
+            BulkWillItemResult(index=i, success=True, will_id=f"c{i:020d}")
+            for i in range(args.bulk_items)
+        ],
+        timestamp=datetime.utcnow(),
+    )
+
+    # FastAPI serializes response_model output with pydantic, then the
+    # response class renders the resulting dict
+    content = bulk.model_dump(mode="json")
+
+    def render_before():
+        JSONResponse(content)
+
+    def render_after():
+        ORJSONResponse(content)
+
+    rows = [
+        ("will storage + hash", time_us(store_before, args.repeats), time_us(store_after, args.repeats)),
+        (f"bulk response ({args.bulk_items} items)", time_us(render_before, args.repeats), time_us(render_after, args.repeats)),
+    ]
+
+    print(f"{'stage':<30} {'before us':>11} {'after us':>11} {'saved':>8}")
+    for label, before, after in rows:
+        print(f"{label:<30} {before:>11.0f} {after:>11.0f} {1 - after / before:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
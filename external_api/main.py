@@ -2,30 +2,84 @@
 FastAPI application for Fennec Will Builder - External Testator Information API
 """
 
-from fastapi import FastAPI, HTTPException, status, Depends
+import asyncio
+import importlib
+import orjson
+from fastapi import FastAPI, Header, HTTPException, Request, Response, status, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import Dict
+from fastapi.responses import ORJSONResponse
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional
 import logging
+import time
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.models import (
     WillContent,
     WillContentResponse,
+    BulkWillItemResult,
+    BulkWillResponse,
+    WillRecord,
+    WillListResponse,
     HealthCheckResponse,
+    ReadinessResponse,
+    ManualSearchRequest,
+    ManualSearchBatchRequest,
+    ManualSearchResponse,
+    ManualSearchBatchResponse,
+    ManualPassage,
+    ManualPassageEvent,
+    ManualContextRequest,
+    ManualContextResponse,
+    ErrorResponse,
 )
 from utils.config import settings
-from utils.database import get_db, test_db_connection
+from utils.database import (
+    dispose_engines,
+    get_async_db,
+    get_async_engine,
+    get_engine,
+    read_router,
+    test_db_connection,
+)
+from utils.health import build_health_monitor
+from utils.log import RequestContextMiddleware, configure_logging
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from utils.profiling import PROFILE_TOKEN_HEADER, ProfilingMiddleware, profile_store, valid_profile_token
 from utils.auth import require_auth, optional_auth
-from services.user_service import get_or_create_user, create_will_for_user
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+from utils.bulk import read_documents, validate_documents
+from utils.rate_limit import RateLimitMiddleware
+from utils.streaming import StreamFormat, SSE_DONE, encode_event, streaming_response
+from services.clerk_service import clerk_service
+from services.user_service import (
+    CreatedWill,
+    get_or_create_user,
+    create_will_for_user,
+    create_wills_for_user_bulk,
+    invalidate_user,
+    resolve_user,
+)
+from services.idempotency_service import (
+    idempotency_service,
+    hash_request,
+    IdempotencyInProgress,
+    IdempotencyKeyReused,
+)
+from services.manual_context import render_context
+from services.manual_search_service import manual_search_service
+from services.will_query import get_user_will, list_user_wills, parse_etags, row_version, will_etag
+from services.will_patch import (
+    apply_will_patch,
+    parse_patch,
+    JSON_PATCH,
+    MERGE_PATCH,
+    PatchConflict,
+    PatchError,
+    WillVersionMismatch,
 )
+
+# Configure logging (queued JSON output, sampled DEBUG)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -35,8 +89,22 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
+# Background DB health sampling behind /readyz and /health
+health_monitor = build_health_monitor(get_async_engine)
+
+# Opt-in request profiling (innermost, so only the application is profiled)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Per-user / per-IP rate limits (inside CORS so 429s carry CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
+# Request latency per route and status (outside rate limiting so 429s count)
+app.add_middleware(MetricsMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -46,10 +114,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request IDs and per-request debug sampling for log records (outermost)
+app.add_middleware(RequestContextMiddleware)
+
+
+_warm_up_task: Optional[asyncio.Task] = None
+_purge_task: Optional[asyncio.Task] = None
+
+
+def _warm_up_blocking() -> None:
+    clerk_service.client  # builds the pooled client (httpx import, TLS context)
+    importlib.import_module("jose.jwt")
+    get_engine()
+    manual_search_service.warm_up()
+
+
+async def warm_up() -> None:
+    """
+    Build the clients and load the libraries that are deferred at import.
+
+    Runs in the background after startup, so the server answers (and
+    /livez passes) without waiting for it; the async engine and its first
+    connection come from the health monitor's first check.
+    """
+    start = time.perf_counter()
+    try:
+        # Imports and client construction are synchronous; keep them off the loop
+        await asyncio.to_thread(_warm_up_blocking)
+    except Exception as e:
+        logger.warning("Warm-up failed (clients will be built on first use): %s", e)
+        return
+    logger.info("Warm-up finished in %.0fms", (time.perf_counter() - start) * 1000)
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Verify database connection on startup"""
+    """Start health sampling, the background warm-up and expired key purging"""
+    global _warm_up_task, _purge_task
+    await health_monitor.start()
+    if settings.WARM_UP_ENABLED:
+        _warm_up_task = asyncio.create_task(warm_up())
+    if settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS > 0:
+        _purge_task = asyncio.create_task(
+            idempotency_service.purge_periodically(settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
+        )
     logger.info("Starting up - checking database connection...")
     # db_ok = await test_db_connection()
     # if not db_ok:
@@ -58,6 +166,17 @@ async def startup_event():
     #     logger.info("Database connection successful")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled HTTP and database connections"""
+    for task in (_warm_up_task, _purge_task):
+        if task is not None:
+            task.cancel()
+    await health_monitor.stop()
+    await clerk_service.shutdown()
+    await dispose_engines()
+
+
 @app.get("/", response_model=Dict[str, str])
 async def root():
     """Root endpoint - API information"""
@@ -70,21 +189,93 @@ async def root():
 
 
 @app.get("/health", response_model=HealthCheckResponse)
-async def health_check(db: Session = Depends(get_db)):
-    """Health check endpoint with database connection test"""
-    db_status = "disconnected"
-    try:
-        # Test database connection
-        db.execute(text("SELECT 1"))
-        db_status = "connected"
-    except Exception as e:
-        logger.error(f"Health check database test failed: {str(e)}")
-
+async def health_check():
+    """Health check endpoint reporting the last background database check (no I/O)"""
     return HealthCheckResponse(
         status="healthy",
         timestamp=datetime.utcnow(),
         service="will-builder-api",
-        db=db_status,
+        db=health_monitor.snapshot()["db"]["status"],
+    )
+
+
+@app.get("/livez", response_model=Dict[str, str])
+async def livez():
+    """Liveness probe: the process is serving requests (no I/O)"""
+    return {"status": "alive"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint.
+
+    Request latency per route and status, DB pool usage and checkout
+    time, Clerk call latency and errors, and manual search embedding and
+    query latency, for this worker process.
+    """
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def require_profile_token(token: Optional[str] = Header(None, alias=PROFILE_TOKEN_HEADER)) -> None:
+    """Admin profile endpoints exist only with profiling enabled and need PROFILING_TOKEN"""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not valid_profile_token(token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profile token")
+
+
+@app.get("/admin/profiles", include_in_schema=False, dependencies=[Depends(require_profile_token)])
+async def list_profiles():
+    """Summaries of the most recent request profiles, newest first"""
+    return {"profiles": [profile.summary() for profile in profile_store.list()]}
+
+
+@app.get("/admin/profiles/{profile_id}", include_in_schema=False, dependencies=[Depends(require_profile_token)])
+async def get_request_profile(profile_id: str, format: Literal["json", "collapsed"] = "json"):
+    """
+    One request profile.
+
+    Args:
+        profile_id: X-Profile-Id of the profiled response
+        format: json (summary, top stacks, allocation deltas) or collapsed
+            (all stacks, for flamegraph.pl or speedscope)
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "collapsed":
+        return Response(content=profile.collapsed(), media_type="text/plain")
+    return profile.to_dict()
+
+
+@app.get(
+    "/readyz",
+    response_model=ReadinessResponse,
+    responses={503: {"model": ReadinessResponse, "description": "Database unavailable or not yet checked"}},
+)
+async def readyz():
+    """
+    Readiness probe served from cached health state.
+
+    The database is checked by a background task every
+    HEALTH_CHECK_INTERVAL_SECONDS, so probes never take a pooled connection.
+
+    Returns:
+        ReadinessResponse with the last check, recent DB latency and pool
+        counters; status 503 while the database is unavailable or the
+        last check is stale
+    """
+    snapshot = health_monitor.snapshot()
+    ready = snapshot["ready"]
+    response = ReadinessResponse(
+        status="ready" if ready else "not_ready",
+        timestamp=datetime.utcnow(),
+        **snapshot,
+    )
+    return ORJSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=response.model_dump(mode="json"),
     )
 
 
@@ -105,7 +296,7 @@ async def get_profile(email: str = Depends(require_auth)):
     Raises:
         HTTPException: 401 if token is missing or invalid
     """
-    logger.info(f"Profile accessed by user: {email}")
+    logger.debug("Profile accessed by user: %s", email)
     return {
         "authenticated_user": email,
         "message": "Successfully authenticated",
@@ -121,7 +312,8 @@ async def get_profile(email: str = Depends(require_auth)):
 async def create_will(
     will_content: WillContent,
     user_email: str = Depends(require_auth),
-    db: Session = Depends(get_db)):
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255)):
     """
     Accept complete will content for will creation.
 
@@ -135,72 +327,448 @@ async def create_will(
     - Funeral wishes and digital assets
     - Special instructions and legal clauses
 
+    Clients may send an Idempotency-Key header: a retry with the same key
+    and body replays the original response (Idempotent-Replayed: true)
+    instead of creating another will, and concurrent duplicates wait for
+    the first request.
+
     Args:
         will_content: WillContent object containing all will details
         db: Database session dependency
+        idempotency_key: Optional client-generated key for safe retries
 
     Returns:
         WillContentResponse with confirmation and generated will ID
 
     Raises:
-        HTTPException: If validation fails or processing error occurs
+        HTTPException: If validation fails or processing error occurs,
+            409 if a duplicate is still in progress, 422 if the key was
+            used with a different body
+    """
+    if not idempotency_key:
+        return await _process_will(will_content, user_email, db)
+
+    async def handler(session: AsyncSession, record):
+        # The response is recorded in the will's transaction, so a will is
+        # never committed without its key being completed
+        async def on_created(response: WillContentResponse) -> None:
+            await record(status.HTTP_201_CREATED, response.model_dump(mode="json"))
+
+        response = await _process_will(will_content, user_email, session, on_created)
+        return status.HTTP_201_CREATED, response.model_dump(mode="json")
+
+    try:
+        stored, replayed = await idempotency_service.run(
+            db,
+            scope=user_email,
+            key=idempotency_key,
+            request_hash=hash_request(will_content.canonical_json()),
+            handler=handler,
+        )
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request body",
+        )
+    except IdempotencyInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress",
+            headers={"Retry-After": "1"},
+        )
+
+    if replayed:
+        logger.info("Replayed create-will response for Idempotency-Key %s", idempotency_key)
+    return ORJSONResponse(
+        status_code=stored.status_code,
+        content=stored.body,
+        headers={"Idempotent-Replayed": "true" if replayed else "false"},
+    )
+
+
+def _will_created_response(will_id: str) -> WillContentResponse:
+    """Success response for a stored will"""
+    return WillContentResponse(
+        success=True,
+        will_id=will_id,
+        message="Will content received and validated successfully",
+        timestamp=datetime.utcnow(),
+    )
+
+
+async def _process_will(
+    will_content: WillContent,
+    user_email: str,
+    db: AsyncSession,
+    on_created: Optional[Callable[[WillContentResponse], Awaitable[None]]] = None,
+) -> WillContentResponse:
+    """
+    Resolve the user and store the will (create-will body).
+
+    on_created, if given, receives the response before the will's
+    transaction commits and may write to db as part of it.
     """
     try:
-        testator_name = f"{will_content.testator.firstName or ''} {will_content.testator.lastName or ''}".strip() or "Unknown"
-        logger.info(f"Received will content for testator: {testator_name}")
+        logger.debug(
+            "Received will content for testator: %s %s",
+            will_content.testator.firstName or "",
+            will_content.testator.lastName or "",
+        )
 
         # Extract user email (always provided)
         #user_email = will_content.user_email
-        logger.info(f"Processing will for user email: {user_email}")
+        logger.debug("Processing will for user email: %s", user_email)
 
-        # Step 1: Get or create user (creates in Clerk and DB if needed)
-        user, user_error = await get_or_create_user(db, user_email)
+        # Step 1: Resolve the user (creates them in Clerk if needed; a user
+        # new to the database is stored with the will in step 2)
+        user, user_error = await resolve_user(user_email)
 
         if user_error or not user:
-            logger.error(f"Failed to get or create user: {user_error}")
+            logger.error("Failed to get or create user: %s", user_error)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to process user account",
             )
 
-        logger.info(f"User processed successfully: {user.id}")
+        logger.debug("User processed successfully: %s", user.clerkId)
+
+        response: Optional[WillContentResponse] = None
+
+        async def before_commit(created: CreatedWill) -> None:
+            nonlocal response
+            response = _will_created_response(created.id)
+            if on_created is not None:
+                await on_created(response)
 
-        # Step 2: Create will for user
-        will, will_error = create_will_for_user(db, user, will_content)
+        # Step 2: Create will (and the user if new) in one transaction
+        will, will_error = await create_will_for_user(db, user, will_content, before_commit)
 
         if will_error or not will:
-            logger.error(f"Failed to create will: {will_error}")
+            logger.error("Failed to create will: %s", will_error)
+            # The cached user may be stale (e.g. deleted); resolve afresh next time
+            await invalidate_user(user_email)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create will record",
             )
 
-        logger.info(f"Will created successfully: {will.id}")
+        logger.info("Will created: %s", will.id, extra={"will_id": will.id, "user_id": will.user_id})
+        await read_router.record_write(user_email)
 
-        return WillContentResponse(
-            success=True,
-            will_id=will.id,
-            message="Will content received and validated successfully",
-            timestamp=datetime.utcnow(),
-        )
+        return response
 
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
     except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
+        logger.error("Validation error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=f"Validation error: {str(e)}",
         )
     except Exception as e:
-        logger.error(f"Error processing testator information: {str(e)}", exc_info=True)
+        logger.error("Error processing testator information: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error processing testator information",
         )
 
 
+@app.post(
+    "/api/v1/create-will/bulk",
+    response_model=BulkWillResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/WillContent"}}
+                },
+                "application/x-ndjson": {
+                    "schema": {"type": "string", "description": "One WillContent JSON document per line"}
+                },
+            },
+        }
+    },
+)
+async def create_wills_bulk(
+    request: Request,
+    user_email: str = Depends(require_auth),
+    db: AsyncSession = Depends(get_async_db)):
+    """
+    Accept many will documents in one request.
+
+    The body is a JSON array of WillContent documents, or an NDJSON stream
+    (Content-Type: application/x-ndjson) with one document per line.
+    Documents are validated off the event loop while the owning user is
+    resolved once, then valid wills are inserted with multi-row statements.
+
+    Args:
+        request: Raw request (body read as JSON array or NDJSON)
+        user_email: Authenticated user who owns every will in the batch
+        db: Database session dependency
+
+    Returns:
+        BulkWillResponse with one result per document, in request order
+
+    Raises:
+        HTTPException: 400 if the body is malformed, 500 if the user cannot be resolved
+    """
+    try:
+        documents = await read_documents(request, settings.BULK_WILL_MAX_ITEMS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    logger.debug("Received bulk submission of %d wills for user email: %s", len(documents), user_email)
+
+    # Resolve the user while documents validate
+    user_task = asyncio.create_task(get_or_create_user(user_email))
+    try:
+        validated = await validate_documents(WillContent, documents)
+    except BaseException:
+        # Don't leave the resolution running unobserved
+        user_task.cancel()
+        raise
+    user, user_error = await user_task
+
+    if user_error or not user:
+        logger.error("Failed to get or create user: %s", user_error)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process user account",
+        )
+
+    valid_indexes = [i for i, (will_content, _) in enumerate(validated) if will_content is not None]
+    created = await create_wills_for_user_bulk(
+        db,
+        user,
+        [validated[i][0] for i in valid_indexes],
+        batch_size=settings.BULK_WILL_INSERT_BATCH_SIZE,
+    )
+
+    results = [
+        BulkWillItemResult(index=i, success=False, error=error)
+        for i, (_, error) in enumerate(validated)
+    ]
+    for i, (will_id, error) in zip(valid_indexes, created):
+        results[i] = BulkWillItemResult(index=i, success=will_id is not None, will_id=will_id, error=error)
+
+    created_count = sum(1 for r in results if r.success)
+    if created_count:
+        await read_router.record_write(user_email)
+    logger.info("Bulk submission complete: %d/%d wills created", created_count, len(results))
+
+    return BulkWillResponse(
+        total=len(results),
+        created=created_count,
+        failed=len(results) - created_count,
+        results=results,
+        timestamp=datetime.utcnow(),
+    )
+
+
+async def get_read_db(user_email: str = Depends(require_auth)) -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency for read-only endpoints: a session on the read
+    replica, or on the primary shortly after the user's own writes.
+    """
+    session_factory = await read_router.sessionmaker_for(user_email)
+    async with session_factory() as db:
+        yield db
+
+
+def _will_record(row) -> WillRecord:
+    """WillRecord from a will_query row, keeping only the selected content columns"""
+    record = WillRecord(
+        id=row.id,
+        title=row.title,
+        status=row.status,
+        created_at=row.createdAt,
+        updated_at=row.updatedAt,
+    )
+    fields = row._fields
+    if "content" in fields:
+        record.content = row.content
+    if "editorContent" in fields:
+        record.editor_content = row.editorContent
+    return record
+
+
+@app.get(
+    "/api/v1/wills",
+    response_model=WillListResponse,
+    response_model_exclude_unset=True,
+)
+async def list_wills(
+    limit: int = Query(20, ge=1, le=100, description="Wills per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include: List[Literal["content", "editorContent"]] = Query(
+        [], description="Large JSON columns to include in each will"
+    ),
+    user_email: str = Depends(require_auth),
+    db: AsyncSession = Depends(get_read_db)):
+    """
+    List the authenticated user's wills, most recently updated first.
+
+    Pages are keyset-paginated: pass next_cursor back as cursor to fetch the
+    following page. content and editorContent are omitted unless named in
+    include.
+
+    Args:
+        limit: Page size
+        cursor: Opaque cursor from the previous page
+        include: Content columns to return
+        user_email: Authenticated user
+        db: Read-only session (replica, or primary after recent writes)
+
+    Returns:
+        WillListResponse with the page and the cursor for the next one
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid
+    """
+    try:
+        rows, next_cursor = await list_user_wills(db, user_email, limit, cursor, include)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return WillListResponse(wills=[_will_record(row) for row in rows], next_cursor=next_cursor)
+
+
+@app.get(
+    "/api/v1/wills/{will_id}",
+    response_model=WillRecord,
+    responses={304: {"description": "Not modified (If-None-Match matched the current ETag)"}},
+)
+async def get_will(
+    will_id: str,
+    user_email: str = Depends(require_auth),
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match")):
+    """
+    Fetch one of the authenticated user's wills.
+
+    Responses carry a strong ETag. Clients polling for changes send it back
+    in If-None-Match and get an empty 304 while the will is unchanged; the
+    content columns are then not sent by the database. If-None-Match: *
+    gets a 304 for any existing will.
+
+    Args:
+        will_id: Will ID
+        user_email: Authenticated user
+        db: Read-only session (replica, or primary after recent writes)
+        if_none_match: ETag(s) of the version the client already holds
+
+    Returns:
+        WillRecord with content and editorContent, or 304 Not Modified
+
+    Raises:
+        HTTPException: 404 if the will does not exist or belongs to another user
+    """
+    any_version = (if_none_match or "").strip() == "*"
+    known_versions = [] if any_version else parse_etags(if_none_match)
+    row = await get_user_will(db, user_email, will_id, known_versions, with_content=not any_version)
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Will not found")
+
+    version = row_version(row)
+    headers = {"ETag": will_etag(version), "Cache-Control": "private, no-cache"}
+    if any_version or version in known_versions:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return ORJSONResponse(content=_will_record(row).model_dump(mode="json"), headers=headers)
+
+
+@app.patch(
+    "/api/v1/wills/{will_id}",
+    response_model=WillRecord,
+    response_model_exclude_unset=True,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON_PATCH: {"schema": {"type": "array", "items": {"type": "object"}}},
+                MERGE_PATCH: {"schema": {"type": "object"}},
+            },
+        }
+    },
+)
+async def patch_will(
+    will_id: str,
+    request: Request,
+    user_email: str = Depends(require_auth),
+    db: AsyncSession = Depends(get_async_db),
+    if_match: Optional[str] = Header(None, alias="If-Match")):
+    """
+    Partially update one of the authenticated user's wills.
+
+    Accepts a JSON Patch (Content-Type: application/json-patch+json) or a
+    JSON Merge Patch (application/merge-patch+json). Only the parts of the
+    will the patch touches are read, validated and rewritten, in the
+    database.
+
+    Send the ETag from GET /api/v1/wills/{id} as If-Match to make the
+    update conditional; without it, the patch applies to the current
+    version.
+
+    Args:
+        will_id: Will ID
+        request: Raw request (patch document)
+        user_email: Authenticated user
+        db: Database session dependency
+        if_match: ETag of the version the patch was written against
+
+    Returns:
+        WillRecord summary (without content) with the new ETag
+
+    Raises:
+        HTTPException: 404 if not found, 409 if the patch does not apply,
+            412 if If-Match is stale, 415 for other content types, 422 if
+            the patch is malformed or produces an invalid will
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type not in (JSON_PATCH, MERGE_PATCH):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type must be {JSON_PATCH} or {MERGE_PATCH}",
+            headers={"Accept-Patch": f"{JSON_PATCH}, {MERGE_PATCH}"},
+        )
+
+    expected_versions = None
+    if if_match and if_match.strip() != "*":
+        # If-Match uses the strong comparison: weak tags never match
+        expected_versions = parse_etags(if_match, weak=False)
+        if not expected_versions:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Will has changed")
+
+    try:
+        operations = parse_patch(orjson.loads(await request.body()), media_type, settings.WILL_PATCH_MAX_OPERATIONS)
+        row = await apply_will_patch(db, user_email, will_id, operations, expected_versions)
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON: {str(e)}")
+    except PatchError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except PatchConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except WillVersionMismatch:
+        if expected_versions is not None:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Will has changed")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Will is being modified concurrently",
+            headers={"Retry-After": "1"},
+        )
+
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Will not found")
+
+    await read_router.record_write(user_email)
+    return ORJSONResponse(
+        content=_will_record(row).model_dump(mode="json", exclude_unset=True),
+        headers={"ETag": will_etag(row_version(row))},
+    )
+
+
 @app.get("/api/v1/testator/{testator_id}", response_model=Dict[str, str])
 async def get_testator(testator_id: str):
     """
@@ -216,7 +784,7 @@ async def get_testator(testator_id: str):
         HTTPException: If testator not found
     """
     # TODO: Implement database retrieval
-    logger.info(f"Retrieving testator: {testator_id}")
+    logger.info("Retrieving testator: %s", testator_id)
 
     raise HTTPException(
         status_code=status.HTTP_501_NOT_IMPLEMENTED,
@@ -224,11 +792,205 @@ async def get_testator(testator_id: str):
     )
 
 
+async def _stream_manual_results(
+    queries: List[str],
+    top_k: int,
+    sections: Optional[int],
+    stream_format: StreamFormat,
+) -> AsyncIterator[bytes]:
+    """Encode manual search results one passage at a time as they arrive"""
+    try:
+        async for index, rows in manual_search_service.stream_many(queries, top_k, sections):
+            for rank, row in enumerate(rows, start=1):
+                event = ManualPassageEvent(
+                    query_index=index,
+                    query=queries[index],
+                    rank=rank,
+                    passage=ManualPassage(**row),
+                )
+                yield encode_event(event, stream_format, event="passage")
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        logger.error("Manual search stream failed: %s", e, exc_info=True)
+        error = ErrorResponse(detail="Manual search failed", timestamp=datetime.utcnow())
+        yield encode_event(error, stream_format, event="error")
+        return
+
+    if stream_format == "sse":
+        yield SSE_DONE
+
+
+@app.post(
+    "/api/v1/manual/search",
+    response_model=ManualSearchResponse,
+)
+async def search_manual(
+    search_request: ManualSearchRequest,
+    stream: Optional[StreamFormat] = Query(None, description="Stream passages as 'ndjson' or 'sse'"),
+    user_email: str = Depends(require_auth),
+):
+    """
+    Search the drafting manual for passages relevant to a query.
+
+    Args:
+        search_request: Query text, number of passages to return and optional
+            section routing (rank only chunks in the closest sections)
+        stream: Optional streaming format; when set, passages are written
+            one per line (NDJSON) or one per event (SSE) as they are ready
+
+    Returns:
+        ManualSearchResponse, or a streaming response when stream is set
+
+    Raises:
+        HTTPException: 502 if the embedding or vector search fails
+    """
+    logger.info("Manual search by %s: top_k=%d", user_email, search_request.top_k)
+
+    if stream:
+        return streaming_response(
+            _stream_manual_results(
+                [search_request.query], search_request.top_k, search_request.sections, stream
+            ),
+            stream,
+        )
+
+    try:
+        rows = await manual_search_service.search(
+            search_request.query, search_request.top_k, search_request.sections
+        )
+    except Exception as e:
+        logger.error("Manual search failed: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Manual search failed",
+        )
+
+    return ManualSearchResponse(
+        query=search_request.query,
+        results=[ManualPassage(**row) for row in rows],
+    )
+
+
+@app.post(
+    "/api/v1/manual/search/batch",
+    response_model=ManualSearchBatchResponse,
+)
+async def search_manual_batch(
+    batch_request: ManualSearchBatchRequest,
+    stream: Optional[StreamFormat] = Query(None, description="Stream passages as 'ndjson' or 'sse'"),
+    user_email: str = Depends(require_auth),
+):
+    """
+    Search the drafting manual for several queries in one request.
+
+    All queries share one embeddings call and their vector lookups run
+    concurrently. When streaming, each passage carries its query_index and
+    queries are emitted in completion order.
+
+    Args:
+        batch_request: Queries and number of passages to return per query
+        stream: Optional streaming format ('ndjson' or 'sse')
+
+    Returns:
+        ManualSearchBatchResponse, or a streaming response when stream is set
+
+    Raises:
+        HTTPException: 502 if the embedding or vector search fails
+    """
+    logger.info(
+        "Manual batch search by %s: %d queries, top_k=%d",
+        user_email,
+        len(batch_request.queries),
+        batch_request.top_k,
+    )
+
+    if stream:
+        return streaming_response(
+            _stream_manual_results(
+                batch_request.queries, batch_request.top_k, batch_request.sections, stream
+            ),
+            stream,
+        )
+
+    try:
+        results = await manual_search_service.search_many(
+            batch_request.queries, batch_request.top_k, batch_request.sections
+        )
+    except Exception as e:
+        logger.error("Manual batch search failed: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Manual search failed",
+        )
+
+    return ManualSearchBatchResponse(
+        results=[
+            ManualSearchResponse(query=query, results=[ManualPassage(**row) for row in rows])
+            for query, rows in zip(batch_request.queries, results)
+        ]
+    )
+
+
+@app.post(
+    "/api/v1/manual/context",
+    response_model=ManualContextResponse,
+)
+async def manual_context(
+    context_request: ManualContextRequest,
+    user_email: str = Depends(require_auth),
+):
+    """
+    Assemble prompt context from the drafting manual.
+
+    Each hit is returned with its neighbouring chunks from the same section
+    and the section header, deduplicated, grouped by section and trimmed to
+    the caller's token budget. Hits and neighbours come from one query.
+
+    Args:
+        context_request: Query, number of hits, neighbour window and token budget
+
+    Returns:
+        ManualContextResponse with structured sections and rendered text
+
+    Raises:
+        HTTPException: 502 if the embedding or vector search fails
+    """
+    logger.info(
+        "Manual context by %s: top_k=%d, neighbors=%d, budget=%d",
+        user_email,
+        context_request.top_k,
+        context_request.neighbors,
+        context_request.token_budget,
+    )
+
+    try:
+        sections, tokens_used = await manual_search_service.search_context(
+            context_request.query,
+            top_k=context_request.top_k,
+            neighbors=context_request.neighbors,
+            token_budget=context_request.token_budget,
+        )
+    except Exception as e:
+        logger.error("Manual context search failed: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Manual search failed",
+        )
+
+    return ManualContextResponse(
+        query=context_request.query,
+        token_budget=context_request.token_budget,
+        tokens_used=tokens_used,
+        sections=sections,
+        context=render_context(sections),
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler for unhandled errors"""
-    logger.error(f"Unhandled exception: {str(exc)}")
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc)
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "detail": "An unexpected error occurred",
@@ -246,4 +1008,5 @@ if __name__ == "__main__":
         port=settings.PORT,
         reload=settings.DEBUG,
         log_level="info",
+        log_config=None,  # uvicorn's loggers propagate to the queued root handler
     )
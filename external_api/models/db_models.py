@@ -2,8 +2,9 @@
 SQLAlchemy database models matching Prisma schema
 """
 
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index, Enum as SQLEnum
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, Integer, BigInteger, Text, DateTime, ForeignKey, Index, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func, text
 from utils.database import Base
 import enum
 
@@ -24,8 +25,9 @@ class User(Base):
     email = Column(String, unique=True, nullable=False, index=True)
     firstName = Column(String, nullable=True)
     lastName = Column(String, nullable=True)
-    createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updatedAt = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=func.now(), nullable=False)
+    # Prisma DateTime columns are TIMESTAMP(3) without time zone, stored as UTC
+    createdAt = Column(DateTime, server_default=func.now(), nullable=False)
+    updatedAt = Column(DateTime, server_default=func.now(), server_onupdate=func.now(), nullable=False)
 
     # Create composite index for common queries
     __table_args__ = (
@@ -40,13 +42,62 @@ class Will(Base):
     id = Column(String, primary_key=True, index=True)
     userId = Column(String, ForeignKey("User.id", ondelete="CASCADE"), nullable=False, index=True)
     title = Column(String, nullable=False)
-    content = Column(Text, nullable=True)  # JSON string
-    editorContent = Column(Text, nullable=True)  # JSON string for editor state
-    status = Column(SQLEnum(WillStatus), default=WillStatus.DRAFT, nullable=False, index=True)
-    createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updatedAt = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=func.now(), nullable=False)
+    content = Column(JSONB(none_as_null=True), nullable=True)  # Prisma Json
+    editorContent = Column(JSONB(none_as_null=True), nullable=True)  # Prisma Json for editor state
+    # Prisma stores status as TEXT, not a Postgres enum type
+    status = Column(SQLEnum(WillStatus, native_enum=False), default=WillStatus.DRAFT, nullable=False, index=True)
+    createdAt = Column(DateTime, server_default=func.now(), nullable=False)
+    updatedAt = Column(DateTime, server_default=func.now(), server_onupdate=func.now(), nullable=False)
 
     # Create composite index for common queries
     __table_args__ = (
         Index('idx_will_user_status', 'userId', 'status'),
+        # Keyset pagination of a user's wills (services/will_query.py)
+        Index(
+            'Will_userId_updatedAt_id_idx', 'userId', 'updatedAt', 'id',
+            postgresql_include=['title', 'status', 'createdAt'],
+        ),
+        # Content indexes used by services/will_query.py
+        Index('Will_content_idx', 'content', postgresql_using='gin', postgresql_ops={'content': 'jsonb_path_ops'}),
+        Index('Will_content_testator_id_number_idx', text("(content -> 'testator' ->> 'idNumber')")),
+        Index(
+            'Will_content_usufruct_idx', 'userId',
+            postgresql_where=text("jsonb_path_exists(content, '$.assets[*].usufruct ? (@ != null)')"),
+        ),
+    )
+
+
+class IdempotencyKey(Base):
+    """Stored create-will response per Idempotency-Key (Prisma IdempotencyKey)"""
+    __tablename__ = "IdempotencyKey"
+
+    scope = Column(String, primary_key=True)  # authenticated user email
+    key = Column(String, primary_key=True)
+    requestHash = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="in_progress")  # in_progress | completed
+    responseStatus = Column(Integer, nullable=True)
+    responseBody = Column(JSONB(none_as_null=True), nullable=True)
+    createdAt = Column(DateTime, server_default=func.now(), nullable=False)
+    expiresAt = Column(DateTime, nullable=False, index=True)
+
+
+class Job(Base):
+    """Outbox job drained by worker.py (Prisma Job)"""
+    __tablename__ = "Job"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending | running | done | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    maxAttempts = Column(Integer, nullable=False, default=5)
+    runAt = Column(DateTime, server_default=func.now(), nullable=False)
+    lockedAt = Column(DateTime, nullable=True)
+    lockedBy = Column(String, nullable=True)
+    lastError = Column(Text, nullable=True)
+    createdAt = Column(DateTime, server_default=func.now(), nullable=False)
+    updatedAt = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('Job_status_runAt_idx', 'status', 'runAt'),
     )
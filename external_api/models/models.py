@@ -3,8 +3,8 @@ Pydantic models for Will Content API
 Aligned with TypeScript WillContent interface
 """
 
-from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
-from typing import Optional, List, Literal
+from pydantic import BaseModel, EmailStr, Field, PrivateAttr, field_validator, model_validator
+from typing import Any, Dict, Optional, List, Literal, Set
 from datetime import datetime, date
 from enum import Enum
 
@@ -376,6 +376,16 @@ class User(BaseModel):
 # ROOT MODEL
 # ============================================
 
+# Top-level WillContent lists whose ID numbers feed witness_conflicts
+WITNESS_CONFLICT_FIELDS = ("witnesses", "beneficiaries", "executors", "guardians")
+WITNESS_CONFLICT_ERROR = "Witnesses cannot be beneficiaries, executors, or guardians. Conflicting IDs: {}"
+
+
+def witness_conflicts(witness_id_numbers: List[Optional[str]], other_id_numbers: List[Optional[str]]) -> Set[str]:
+    """ID numbers shared by a witness and a beneficiary, executor or guardian"""
+    return {i for i in witness_id_numbers if i} & {i for i in other_id_numbers if i}
+
+
 class WillContent(BaseModel):
     """Complete will content structure"""
     # user_id: str = Optional[Field(..., min_length=1, max_length=50, description="will builder user id")]
@@ -405,6 +415,19 @@ class WillContent(BaseModel):
     dateExecuted: Optional[str] = Field(None, description="Execution date (YYYY-MM-DD)")
     placeExecuted: Optional[str] = Field(None, max_length=200, description="Execution place")
 
+    _canonical_json: Optional[bytes] = PrivateAttr(default=None)
+
+    def canonical_json(self) -> bytes:
+        """
+        JSON bytes of the validated will, serialized once per instance.
+
+        Reused for both the stored Will.content and the idempotency hash;
+        do not mutate the model after calling this.
+        """
+        if self._canonical_json is None:
+            self._canonical_json = self.__pydantic_serializer__.to_json(self, by_alias=False)
+        return self._canonical_json
+
     @model_validator(mode='after')
     def validate_will_content(self):
         """Cross-model validations"""
@@ -459,16 +482,14 @@ class WillContent(BaseModel):
         #         )
 
         # Validate witnesses are not beneficiaries, executors, or guardians
-        witness_ids = {w.idNumber for w in self.witnesses if w.idNumber}
-        beneficiary_id_numbers = {b.idNumber for b in self.beneficiaries if b.idNumber}
-        executor_id_numbers = {e.idNumber for e in self.executors}
-        guardian_id_numbers = {g.idNumber for g in self.guardians}
-
-        conflicting_ids = witness_ids & (beneficiary_id_numbers | executor_id_numbers | guardian_id_numbers)
+        conflicting_ids = witness_conflicts(
+            [w.idNumber for w in self.witnesses],
+            [b.idNumber for b in self.beneficiaries]
+            + [e.idNumber for e in self.executors]
+            + [g.idNumber for g in self.guardians],
+        )
         if conflicting_ids:
-            errors.append(
-                f"Witnesses cannot be beneficiaries, executors, or guardians. Conflicting IDs: {conflicting_ids}"
-            )
+            errors.append(WITNESS_CONFLICT_ERROR.format(conflicting_ids))
 
         # # Validate minimum witnesses
         # if len(self.witnesses) < 2:
@@ -491,6 +512,40 @@ class WillContent(BaseModel):
         return self
 
 
+# ============================================
+# MANUAL SEARCH MODELS
+# ============================================
+
+class ManualSearchRequest(BaseModel):
+    """Single manual search query"""
+    query: str = Field(..., min_length=1, max_length=2000, description="Natural language query")
+    top_k: int = Field(5, ge=1, le=20, description="Number of passages to return")
+    sections: Optional[int] = Field(None, ge=1, le=10, description="Route to the top N sections before ranking chunks")
+
+
+class ManualSearchBatchRequest(BaseModel):
+    """Batch of manual search queries sharing one top_k"""
+    queries: List[str] = Field(..., min_length=1, max_length=20, description="Natural language queries")
+    top_k: int = Field(5, ge=1, le=20, description="Number of passages to return per query")
+    sections: Optional[int] = Field(None, ge=1, le=10, description="Route to the top N sections before ranking chunks")
+
+    @field_validator("queries")
+    @classmethod
+    def validate_queries(cls, v):
+        """Reject empty query strings"""
+        if any(not q.strip() for q in v):
+            raise ValueError("Queries must not be empty")
+        return v
+
+
+class ManualContextRequest(BaseModel):
+    """Query for hits expanded with neighbouring chunks"""
+    query: str = Field(..., min_length=1, max_length=2000, description="Natural language query")
+    top_k: int = Field(5, ge=1, le=20, description="Number of hits to expand")
+    neighbors: int = Field(1, ge=0, le=5, description="Chunks to include either side of each hit")
+    token_budget: int = Field(2000, ge=100, le=32000, description="Maximum estimated tokens of context")
+
+
 # ============================================
 # RESPONSE MODELS
 # ============================================
@@ -503,6 +558,40 @@ class WillContentResponse(BaseModel):
     timestamp: datetime
 
 
+class BulkWillItemResult(BaseModel):
+    """Outcome for one document in a bulk will submission"""
+    index: int = Field(..., description="Position of the document in the request")
+    success: bool
+    will_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkWillResponse(BaseModel):
+    """Response for a bulk will submission"""
+    total: int
+    created: int
+    failed: int
+    results: List[BulkWillItemResult]
+    timestamp: datetime
+
+
+class WillRecord(BaseModel):
+    """Stored will; content fields are omitted from listings unless requested"""
+    id: str
+    title: str
+    status: str
+    created_at: datetime
+    updated_at: datetime
+    content: Optional[Dict[str, Any]] = None
+    editor_content: Optional[Any] = None
+
+
+class WillListResponse(BaseModel):
+    """One page of a user's wills"""
+    wills: List[WillRecord]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page; null on the last page")
+
+
 class HealthCheckResponse(BaseModel):
     """Health check response"""
     status: str
@@ -511,6 +600,97 @@ class HealthCheckResponse(BaseModel):
     db: Optional[str] = Field(None, description="Database connection status")
 
 
+class DatabaseHealth(BaseModel):
+    """Outcome of the background database health checks"""
+    status: str = Field(..., description="connected, disconnected or unknown (not yet checked)")
+    last_checked: Optional[datetime] = None
+    latency_ms: Optional[float] = Field(None, description="Latest health query round trip")
+    latency_avg_ms: Optional[float] = Field(None, description="Mean over recent checks")
+    latency_max_ms: Optional[float] = Field(None, description="Maximum over recent checks")
+    error: Optional[str] = None
+
+
+class PoolStats(BaseModel):
+    """SQLAlchemy connection pool counters"""
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response"""
+    status: str
+    ready: bool
+    timestamp: datetime
+    db: DatabaseHealth
+    pool: PoolStats
+
+
+class ManualPassage(BaseModel):
+    """Manual passage returned by retrieval"""
+    id: str
+    chapter_number: Optional[int] = None
+    chapter_title: Optional[str] = None
+    section_number: Optional[str] = None
+    section_title: Optional[str] = None
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    text: str
+    similarity: float
+
+
+class ManualSearchResponse(BaseModel):
+    """Manual search results for a single query"""
+    query: str
+    results: List[ManualPassage]
+
+
+class ManualSearchBatchResponse(BaseModel):
+    """Manual search results for a batch of queries"""
+    results: List[ManualSearchResponse]
+
+
+class ManualContextChunk(BaseModel):
+    """Chunk included in assembled context"""
+    id: str
+    chunk_index: Optional[int] = None
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    text: str
+    is_hit: bool = Field(..., description="True if the chunk matched the query, False if it is a neighbour")
+    similarity: float
+
+
+class ManualContextSection(BaseModel):
+    """Section header and the chunks kept from it"""
+    source: Optional[str] = None
+    section_number: Optional[str] = None
+    section_title: Optional[str] = None
+    chapter_number: Optional[int] = None
+    chapter_title: Optional[str] = None
+    header: str
+    similarity: float
+    chunks: List[ManualContextChunk]
+
+
+class ManualContextResponse(BaseModel):
+    """Context assembled for an LLM prompt within a token budget"""
+    query: str
+    token_budget: int
+    tokens_used: int
+    sections: List[ManualContextSection]
+    context: str = Field(..., description="Sections rendered as prompt text")
+
+
+class ManualPassageEvent(BaseModel):
+    """One streamed manual passage (NDJSON line or SSE event)"""
+    query_index: int
+    query: str
+    rank: int
+    passage: ManualPassage
+
+
 class ErrorResponse(BaseModel):
     """Error response model"""
     detail: str
@@ -0,0 +1,138 @@
+"""
+Production server for the Fennec Will Builder API.
+
+Runs uvicorn with one worker process per available CPU (honouring the
+container's CPU quota), capped at WEB_CONCURRENCY_MAX, unless
+WEB_CONCURRENCY is set. The worker count is exported as WEB_CONCURRENCY
+before the workers start, so each one sizes its database pools to its
+share of DATABASE_MAX_CONNECTIONS (see utils.database.worker_pool_limits).
+
+When JOBS_ENABLED is set (and SERVE_JOB_WORKER is not turned off), the
+background job worker (worker.py) runs as a child process and takes one
+more share of the connection budget.
+
+On SIGTERM, uvicorn stops accepting connections and each worker finishes
+its in-flight requests for up to SHUTDOWN_GRACE_SECONDS before the
+shutdown handlers close the pools; the job worker is then stopped and
+drains its in-flight jobs for up to the same grace period.
+
+Usage:
+    python serve.py
+    WEB_CONCURRENCY=4 DATABASE_MAX_CONNECTIONS=80 python serve.py
+"""
+
+import logging
+import math
+import os
+import subprocess
+import sys
+from typing import Optional
+
+import uvicorn
+
+from utils.config import settings
+from utils.database import worker_pool_limits
+from utils.log import configure_logging
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+
+
+def cgroup_cpu_limit(root: str = "/sys/fs/cgroup") -> Optional[float]:
+    """CPUs allowed by the container's CFS quota (cgroup v2 or v1), if any"""
+    try:
+        with open(os.path.join(root, "cpu.max")) as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open(os.path.join(root, "cpu", "cpu.cfs_quota_us")) as f:
+            quota = int(f.read())
+        with open(os.path.join(root, "cpu", "cpu.cfs_period_us")) as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: affinity mask, then the cgroup quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return max(1, cpus)
+
+
+def worker_count() -> int:
+    """WEB_CONCURRENCY if set, else one worker per available CPU up to WEB_CONCURRENCY_MAX"""
+    if settings.WEB_CONCURRENCY:
+        return settings.WEB_CONCURRENCY
+    return max(1, min(available_cpus(), settings.WEB_CONCURRENCY_MAX))
+
+
+def start_job_worker() -> Optional[subprocess.Popen]:
+    """Start worker.py when this deployment enqueues jobs and no separate worker is configured"""
+    if not (settings.JOBS_ENABLED and settings.SERVE_JOB_WORKER):
+        return None
+    logger.info("Starting the background job worker")
+    return subprocess.Popen([sys.executable, WORKER_SCRIPT])
+
+
+def stop_job_worker(process: subprocess.Popen) -> None:
+    """Ask the job worker to drain, killing it after SHUTDOWN_GRACE_SECONDS"""
+    process.terminate()
+    try:
+        process.wait(timeout=settings.SHUTDOWN_GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        logger.warning("Job worker did not stop within %ss; killing it", settings.SHUTDOWN_GRACE_SECONDS)
+        process.kill()
+        process.wait()
+
+
+def main() -> None:
+    configure_logging()
+    workers = worker_count()
+    processes = workers + (1 if settings.JOBS_ENABLED and settings.SERVE_JOB_WORKER else 0)
+    # Read by the workers' settings when they build their engines
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    os.environ["DATABASE_POOL_PROCESSES"] = str(processes)
+
+    limits = worker_pool_limits(settings.DATABASE_MAX_CONNECTIONS, processes, settings.DATABASE_SYNC_POOL_SHARE)
+    per_worker = sum(size + overflow for size, overflow in limits.values())
+    logger.info(
+        "Starting %d workers on %s:%s; DB pools per worker async=%s sync=%s "
+        "(pool_size, max_overflow), up to %d connections in total",
+        workers,
+        settings.HOST,
+        settings.PORT,
+        limits["async"],
+        limits["sync"],
+        per_worker * processes,
+    )
+
+    job_worker = start_job_worker()
+    try:
+        uvicorn.run(
+            "main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            workers=workers,
+            log_config=None,  # workers log through utils.log
+            timeout_graceful_shutdown=settings.SHUTDOWN_GRACE_SECONDS,
+            timeout_keep_alive=settings.KEEP_ALIVE_SECONDS,
+        )
+    finally:
+        if job_worker is not None:
+            stop_job_worker(job_worker)
+
+
+if __name__ == "__main__":
+    main()
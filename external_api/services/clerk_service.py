@@ -2,13 +2,29 @@
 Clerk Backend API integration service
 """
 
-import httpx
 import logging
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import TYPE_CHECKING, Optional, Dict, Any
+from utils import metrics
 from utils.config import settings
 
+if TYPE_CHECKING:
+    import httpx
+
 logger = logging.getLogger(__name__)
 
+CLERK_REQUEST_DURATION = metrics.histogram(
+    "clerk_request_duration_seconds",
+    "Clerk Backend API call latency",
+    ("operation", "status"),
+)
+CLERK_ERRORS = metrics.counter(
+    "clerk_errors_total",
+    "Clerk Backend API calls that raised or returned a server error",
+    ("operation", "reason"),
+)
+
 
 class ClerkService:
     """Service for interacting with Clerk Backend API"""
@@ -16,10 +32,78 @@ class ClerkService:
     def __init__(self):
         self.api_base_url = settings.CLERK_API_BASE_URL
         self.secret_key = settings.CLERK_SECRET_KEY
+        self._client: Optional["httpx.AsyncClient"] = None
+        # The warm-up builds the client in a worker thread while requests
+        # may already be asking for it on the event loop
+        self._client_lock = threading.Lock()
 
         if not self.secret_key:
             logger.warning("CLERK_SECRET_KEY not configured - Clerk operations will fail")
 
+    def _build_client(self, **overrides: Any) -> "httpx.AsyncClient":
+        """
+        Build the pooled HTTP client from settings.
+
+        Args:
+            **overrides: Extra httpx.AsyncClient arguments (e.g. verify for tests)
+
+        Returns:
+            Configured httpx.AsyncClient
+        """
+        # httpx (and its TLS setup) is loaded with the first client, not at import
+        import httpx
+
+        http2 = settings.CLERK_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("CLERK_HTTP2 enabled but h2 is not installed - using HTTP/1.1")
+                http2 = False
+
+        options: Dict[str, Any] = {
+            "timeout": httpx.Timeout(
+                settings.CLERK_HTTP_READ_TIMEOUT,
+                connect=settings.CLERK_HTTP_CONNECT_TIMEOUT,
+            ),
+            "limits": httpx.Limits(
+                max_connections=settings.CLERK_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.CLERK_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.CLERK_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            "http2": http2,
+            "headers": self._get_headers(),
+        }
+        options.update(overrides)
+        return httpx.AsyncClient(**options)
+
+    async def startup(self) -> None:
+        """Open the shared HTTP client (called on application startup)"""
+        self.client
+
+    async def shutdown(self) -> None:
+        """Close the shared HTTP client and its pooled connections"""
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """
+        Shared HTTP client, built once by whichever caller gets here first.
+
+        A caller arriving while another thread is building it waits for
+        that client instead of building (and leaking) a second one.
+        """
+        client = self._client
+        if client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._build_client()
+                client = self._client
+        return client
+
     def _get_headers(self) -> Dict[str, str]:
         """Get HTTP headers for Clerk API requests"""
         return {
@@ -27,6 +111,34 @@ class ClerkService:
             "Content-Type": "application/json",
         }
 
+    async def _request(self, operation: str, method: str, url: str, **kwargs: Any) -> "httpx.Response":
+        """
+        Send a request on the shared client, recording its latency and errors.
+
+        Args:
+            operation: Metric label for the calling method
+            method: HTTP method
+            url: Request URL
+            **kwargs: httpx request arguments
+
+        Returns:
+            The httpx response
+        """
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception as e:
+            CLERK_ERRORS.inc(operation, type(e).__name__)
+            raise
+        else:
+            status = str(response.status_code)
+            if response.status_code >= 500:
+                CLERK_ERRORS.inc(operation, status)
+            return response
+        finally:
+            CLERK_REQUEST_DURATION.observe(time.perf_counter() - start, operation, status)
+
     async def create_user(self, email: str) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
         """
         Create a new user in Clerk with email only.
@@ -43,6 +155,8 @@ class ClerkService:
             Creates Clerk user with email only, no first/last name.
             User and testator are different entities.
         """
+        import httpx
+
         url = f"{self.api_base_url}/users"
         payload = {
             "email_address": [email],
@@ -51,24 +165,22 @@ class ClerkService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(url, json=payload, headers=self._get_headers())
+            response = await self._request("create_user", "POST", url, json=payload)
 
-                if response.status_code == 200:
-                    user_data = response.json()
-                    logger.info(f"Clerk user created successfully: {user_data.get('id')}")
-                    return user_data, None
+            if response.status_code == 200:
+                user_data = response.json()
+                logger.info("Clerk user created successfully: %s", user_data.get("id"))
+                return user_data, None
 
-                elif response.status_code == 422:
-                    # User already exists
-                    error_data = response.json()
-                    logger.info(f"Clerk user already exists: {email}")
-                    return None, f"User with email {email} already exists in Clerk"
+            elif response.status_code == 422:
+                # User already exists
+                logger.info("Clerk user already exists: %s", email)
+                return None, f"User with email {email} already exists in Clerk"
 
-                else:
-                    error_msg = f"Clerk API error: {response.status_code} - {response.text}"
-                    logger.error(error_msg)
-                    return None, error_msg
+            else:
+                error_msg = f"Clerk API error: {response.status_code} - {response.text}"
+                logger.error(error_msg)
+                return None, error_msg
 
         except httpx.TimeoutException:
             error_msg = "Clerk API request timed out"
@@ -95,21 +207,20 @@ class ClerkService:
         params = {"email_address": [email]}
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, params=params, headers=self._get_headers())
-
-                if response.status_code == 200:
-                    users = response.json()
-                    if users and len(users) > 0:
-                        logger.info(f"Found Clerk user: {users[0].get('id')}")
-                        return users[0], None
-                    else:
-                        return None, "User not found in Clerk"
+            response = await self._request("get_user_by_email", "GET", url, params=params)
 
+            if response.status_code == 200:
+                users = response.json()
+                if users and len(users) > 0:
+                    logger.info("Found Clerk user: %s", users[0].get("id"))
+                    return users[0], None
                 else:
-                    error_msg = f"Clerk API error: {response.status_code} - {response.text}"
-                    logger.error(error_msg)
-                    return None, error_msg
+                    return None, "User not found in Clerk"
+
+            else:
+                error_msg = f"Clerk API error: {response.status_code} - {response.text}"
+                logger.error(error_msg)
+                return None, error_msg
 
         except Exception as e:
             error_msg = f"Error fetching Clerk user: {str(e)}"
@@ -131,16 +242,15 @@ class ClerkService:
         url = f"{self.api_base_url}/users/{user_id}"
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.delete(url, headers=self._get_headers())
+            response = await self._request("delete_user", "DELETE", url)
 
-                if response.status_code == 200:
-                    logger.info(f"Clerk user deleted successfully: {user_id}")
-                    return True, None
-                else:
-                    error_msg = f"Failed to delete Clerk user: {response.status_code} - {response.text}"
-                    logger.error(error_msg)
-                    return False, error_msg
+            if response.status_code == 200:
+                logger.info("Clerk user deleted successfully: %s", user_id)
+                return True, None
+            else:
+                error_msg = f"Failed to delete Clerk user: {response.status_code} - {response.text}"
+                logger.error(error_msg)
+                return False, error_msg
 
         except Exception as e:
             error_msg = f"Error deleting Clerk user: {str(e)}"
@@ -0,0 +1,332 @@
+"""
+Idempotency-Key support: replay stored responses for retried requests
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.db_models import IdempotencyKey
+from utils.cache import TieredCache, get_shared_cache_backend
+from utils.config import settings
+from utils.database import get_async_sessionmaker
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_COMPLETED = "completed"
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used with a different request body"""
+
+
+class IdempotencyInProgress(Exception):
+    """Another request with the key did not finish within the wait timeout"""
+
+
+class IdempotencyClaimLost(Exception):
+    """The key was taken over by another request before this one recorded its response"""
+
+
+@dataclass
+class StoredResponse:
+    """Response recorded for an idempotency key"""
+    request_hash: str
+    status_code: int
+    body: Dict[str, Any]
+
+
+Record = Callable[[int, Dict[str, Any]], Awaitable[None]]
+Handler = Callable[[AsyncSession, Record], Awaitable[Tuple[int, Dict[str, Any]]]]
+
+
+def hash_request(payload: bytes) -> str:
+    """SHA-256 of the canonical request body"""
+    return hashlib.sha256(payload).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Stores the first response per (scope, key) and replays it on retries.
+
+    Lookups go through an in-process (optionally shared) cache, then a
+    primary-key read of the IdempotencyKey table. The first request claims
+    the key with an insert and records its response in the same transaction
+    as its own writes; concurrent duplicates in the same worker await the
+    same in-flight call, and those in other workers poll until the stored
+    response appears.
+    """
+
+    def __init__(self):
+        self.ttl_seconds = settings.IDEMPOTENCY_TTL_SECONDS
+        self.lock_timeout_seconds = settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS
+        self.wait_timeout_seconds = settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS
+        self._cache = TieredCache(
+            namespace="idempotency",
+            maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+            ttl_seconds=min(self.ttl_seconds, settings.IDEMPOTENCY_CACHE_TTL_SECONDS),
+            shared=get_shared_cache_backend(),
+        )
+        self._flights = SingleFlight()
+
+    async def run(
+        self,
+        db: AsyncSession,
+        scope: str,
+        key: str,
+        request_hash: str,
+        handler: Handler,
+    ) -> Tuple[StoredResponse, bool]:
+        """
+        Return the stored response for key, or run handler once and store it.
+
+        Args:
+            db: Request database session, used only for the initial lookup
+            scope: Namespace for the key (the authenticated user)
+            key: Client-supplied Idempotency-Key
+            request_hash: Hash of the canonical request body
+            handler: Performs the request on a session owned by the shared
+                call, returning (status_code, JSON body). It is also given a
+                record(status_code, body) coroutine that writes the response
+                to the key in the session's open transaction; call it before
+                committing the request's writes so both commit together.
+                Exceptions propagate and release the key so a retry can run.
+
+        Returns:
+            Tuple of (StoredResponse, replayed)
+
+        Raises:
+            IdempotencyKeyReused: If key was used with a different body
+            IdempotencyInProgress: If the original request is still running
+        """
+        stored = await self._lookup(db, scope, key)
+        if stored is None:
+            ran = False
+
+            async def execute() -> StoredResponse:
+                nonlocal ran
+                ran = True
+                return await self._execute(scope, key, request_hash, handler)
+
+            stored = await self._flights.do((scope, key), execute)
+            replayed = not ran
+        else:
+            replayed = True
+
+        if stored.request_hash != request_hash:
+            raise IdempotencyKeyReused(key)
+        return stored, replayed
+
+    async def _execute(
+        self,
+        scope: str,
+        key: str,
+        request_hash: str,
+        handler: Handler,
+    ) -> StoredResponse:
+        # Concurrent callers share this call, so it must not use any one
+        # request's session
+        async with get_async_sessionmaker()() as db:
+            claimed_at = await self._claim(db, scope, key, request_hash)
+            if claimed_at is None:
+                # Another worker holds the key
+                return await self._wait_for(db, scope, key)
+
+            recorded: List[StoredResponse] = []
+
+            async def record(status_code: int, body: Dict[str, Any]) -> None:
+                stored = StoredResponse(request_hash=request_hash, status_code=status_code, body=body)
+                await self._record(db, scope, key, claimed_at, stored)
+                recorded.append(stored)
+
+            try:
+                status_code, body = await handler(db, record)
+                if recorded:
+                    stored = recorded[-1]
+                else:
+                    stored = StoredResponse(request_hash=request_hash, status_code=status_code, body=body)
+                    await self._record(db, scope, key, claimed_at, stored)
+                    await db.commit()
+            except BaseException:
+                await self._release(scope, key, claimed_at)
+                raise
+
+        await self._cache.set(f"{scope}:{key}", asdict(stored))
+        return stored
+
+    async def _lookup(self, db: AsyncSession, scope: str, key: str) -> Optional[StoredResponse]:
+        """Completed, unexpired response for key from cache or one PK lookup"""
+        cached = await self._cache.get(f"{scope}:{key}")
+        if cached:
+            return StoredResponse(**cached)
+
+        stmt = select(
+            IdempotencyKey.requestHash,
+            IdempotencyKey.responseStatus,
+            IdempotencyKey.responseBody,
+        ).where(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status == STATUS_COMPLETED,
+            IdempotencyKey.expiresAt > datetime.utcnow(),
+        )
+        row = (await db.execute(stmt)).first()
+        if row is None:
+            return None
+
+        stored = StoredResponse(
+            request_hash=row.requestHash,
+            status_code=row.responseStatus,
+            body=row.responseBody,
+        )
+        await self._cache.set(f"{scope}:{key}", asdict(stored))
+        return stored
+
+    async def _claim(self, db: AsyncSession, scope: str, key: str, request_hash: str) -> Optional[datetime]:
+        """
+        Insert an in-progress row for key.
+
+        Expired rows and in-progress rows older than the lock timeout (a
+        crashed or stalled worker) are taken over. The stored createdAt is
+        the claim's fencing token: a request whose claim was taken over can
+        no longer record its response (see _record), so its work rolls back
+        instead of committing alongside the new owner's.
+
+        Returns:
+            createdAt of the claim if this request now owns the key, else None
+        """
+        now = datetime.utcnow()
+        values = {
+            "requestHash": request_hash,
+            "status": STATUS_IN_PROGRESS,
+            "responseStatus": None,
+            "responseBody": None,
+            "createdAt": now,
+            "expiresAt": now + timedelta(seconds=self.ttl_seconds),
+        }
+        stmt = (
+            pg_insert(IdempotencyKey)
+            .values(scope=scope, key=key, **values)
+            .on_conflict_do_update(
+                index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+                set_=values,
+                where=or_(
+                    IdempotencyKey.expiresAt <= now,
+                    and_(
+                        IdempotencyKey.status == STATUS_IN_PROGRESS,
+                        IdempotencyKey.createdAt < now - timedelta(seconds=self.lock_timeout_seconds),
+                    ),
+                ),
+            )
+            .returning(IdempotencyKey.createdAt)
+        )
+        claimed_at = (await db.execute(stmt)).scalar_one_or_none()
+        await db.commit()
+        return claimed_at
+
+    async def _record(
+        self, db: AsyncSession, scope: str, key: str, claimed_at: datetime, stored: StoredResponse
+    ) -> None:
+        """
+        Write the response for key in the open transaction (not committed).
+
+        Raises:
+            IdempotencyClaimLost: If the claim was taken over meanwhile
+        """
+        stmt = (
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key,
+                IdempotencyKey.status == STATUS_IN_PROGRESS,
+                IdempotencyKey.createdAt == claimed_at,
+            )
+            .values(
+                status=STATUS_COMPLETED,
+                responseStatus=stored.status_code,
+                responseBody=stored.body,
+            )
+        )
+        result = await db.execute(stmt)
+        if result.rowcount == 0:
+            raise IdempotencyClaimLost(key)
+
+    async def _release(self, scope: str, key: str, claimed_at: datetime) -> None:
+        """
+        Drop this request's in-progress claim after a failure or
+        cancellation so retries can run.
+
+        Uses a new session: the request's session may be mid-statement.
+        """
+        try:
+            async with get_async_sessionmaker()() as db:
+                await db.execute(
+                    delete(IdempotencyKey).where(
+                        IdempotencyKey.scope == scope,
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.status == STATUS_IN_PROGRESS,
+                        IdempotencyKey.createdAt == claimed_at,
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            # The lock timeout frees the key eventually
+            logger.error("Failed to release idempotency key %s: %s", key, e)
+
+    async def _wait_for(self, db: AsyncSession, scope: str, key: str) -> StoredResponse:
+        """Poll for the response of a request running in another worker"""
+        deadline = time.monotonic() + self.wait_timeout_seconds
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            stored = await self._lookup(db, scope, key)
+            if stored is not None:
+                return stored
+            delay = min(delay * 2, 1.0)
+        raise IdempotencyInProgress(key)
+
+    async def purge_expired(self, db: AsyncSession) -> int:
+        """
+        Delete expired keys.
+
+        Returns:
+            Number of rows deleted
+        """
+        result = await db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expiresAt <= datetime.utcnow())
+        )
+        await db.commit()
+        return result.rowcount
+
+    async def purge_periodically(self, interval_seconds: float) -> None:
+        """
+        Delete expired keys every interval_seconds until cancelled.
+
+        Every worker process runs this; the first wait is jittered so they
+        don't all purge at once, and a failed purge is retried next interval.
+        """
+        await asyncio.sleep(random.uniform(0, interval_seconds))
+        while True:
+            try:
+                async with get_async_sessionmaker()() as db:
+                    deleted = await self.purge_expired(db)
+                if deleted:
+                    logger.info("Purged %d expired idempotency keys", deleted)
+            except Exception as e:
+                logger.warning("Idempotency key purge failed: %s", e)
+            await asyncio.sleep(interval_seconds)
+
+
+# Global IdempotencyService instance
+idempotency_service = IdempotencyService()
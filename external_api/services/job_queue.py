@@ -0,0 +1,284 @@
+"""
+Postgres-backed job queue (transactional outbox)
+
+Endpoints enqueue follow-up work on their own session, so the Job row
+commits or rolls back together with the data it refers to. worker.py
+claims due jobs with FOR UPDATE SKIP LOCKED and runs the registered
+handler for each job kind, and deletes finished jobs after
+JOB_RETENTION_SECONDS.
+
+Will creation only enqueues when JOBS_ENABLED is set; a deployment that
+enables it must run a worker (serve.py starts one unless SERVE_JOB_WORKER
+is off).
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import delete, insert, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from models.db_models import Job
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_handlers: Dict[str, JobHandler] = {}
+
+# Jobs are not heartbeated: a running job whose lock is older than
+# JOB_LOCK_TIMEOUT_SECONDS is presumed abandoned (its worker crashed or was
+# killed, since handlers time out after JOB_TIMEOUT_SECONDS). Abandoned jobs
+# that have used all their attempts are failed here rather than re-run.
+EXPIRE_SQL = text(
+    """
+    UPDATE "Job"
+    SET status = 'failed',
+        "lastError" = 'Lock expired after the final attempt',
+        "lockedAt" = NULL,
+        "lockedBy" = NULL,
+        "updatedAt" = :now
+    WHERE status = 'running'
+      AND "lockedAt" < :stale_before
+      AND attempts >= "maxAttempts"
+    RETURNING id, kind
+    """
+)
+
+# Due pending jobs, plus abandoned running jobs with attempts left (see
+# EXPIRE_SQL). SKIP LOCKED lets several workers claim concurrently.
+CLAIM_SQL = text(
+    """
+    UPDATE "Job"
+    SET status = 'running',
+        "lockedAt" = :now,
+        "lockedBy" = :worker_id,
+        attempts = attempts + 1,
+        "updatedAt" = :now
+    WHERE id IN (
+        SELECT id
+        FROM "Job"
+        WHERE (status = 'pending' AND "runAt" <= :now)
+           OR (status = 'running' AND "lockedAt" < :stale_before AND attempts < "maxAttempts")
+        ORDER BY "runAt"
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, kind, payload, attempts, "maxAttempts"
+    """
+)
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """
+    Register an async handler for a job kind.
+
+    Usage:
+        @job_handler("will.created")
+        async def on_will_created(payload: dict) -> None:
+            ...
+    """
+    def register(fn: JobHandler) -> JobHandler:
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def _job_row(kind: str, payload: Dict[str, Any], run_at: Optional[datetime], max_attempts: Optional[int]) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    return {
+        "kind": kind,
+        "payload": payload,
+        "status": STATUS_PENDING,
+        "attempts": 0,
+        "maxAttempts": max_attempts or settings.JOB_MAX_ATTEMPTS,
+        "runAt": run_at or now,
+        "createdAt": now,
+        "updatedAt": now,
+    }
+
+
+async def enqueue(
+    db: AsyncSession,
+    kind: str,
+    payload: Dict[str, Any],
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+) -> None:
+    """
+    Add a job in the caller's transaction (committed by the caller).
+
+    Args:
+        db: Session whose transaction the job joins
+        kind: Registered handler name
+        payload: JSON-serializable handler input
+        run_at: Earliest time to run (default now, UTC)
+        max_attempts: Attempts before the job is marked failed
+    """
+    await db.execute(insert(Job).values(_job_row(kind, payload, run_at, max_attempts)))
+
+
+async def enqueue_many(db: AsyncSession, kind: str, payloads: List[Dict[str, Any]]) -> None:
+    """Add one job per payload with a single multi-row insert (caller commits)"""
+    if payloads:
+        await db.execute(insert(Job).values([_job_row(kind, p, None, None) for p in payloads]))
+
+
+def retry_delay_seconds(attempts: int) -> float:
+    """Exponential backoff after the given number of attempts"""
+    return min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+
+
+class JobWorker:
+    """
+    Claims and runs jobs with bounded concurrency.
+
+    Polls when idle and re-polls immediately while work is available. stop()
+    stops claiming; run() returns once in-flight jobs have finished.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        concurrency: int = 4,
+        poll_interval: float = 1.0,
+        purge_interval: float = 3600.0,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.purge_interval = purge_interval
+        self._next_purge = time.monotonic()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = asyncio.Event()
+        self._running: Set[asyncio.Task] = set()
+
+    def stop(self) -> None:
+        """Stop claiming new jobs"""
+        self._stop.set()
+
+    async def run(self) -> None:
+        """Claim and process jobs until stop() is called"""
+        logger.info("Job worker %s started (concurrency=%d)", self.worker_id, self.concurrency)
+        stop_wait = asyncio.create_task(self._stop.wait())
+
+        while not self._stop.is_set():
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + self.purge_interval
+                await self._purge()
+
+            claimed = 0
+            free = self.concurrency - len(self._running)
+            if free > 0:
+                try:
+                    jobs = await self._claim(free)
+                except Exception as e:
+                    logger.error("Failed to claim jobs: %s", e)
+                    jobs = []
+                claimed = len(jobs)
+                for job in jobs:
+                    task = asyncio.create_task(self._process(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+
+            if claimed and claimed == free:
+                # Probably more due work; claim again once a slot frees up
+                await asyncio.wait({stop_wait, *self._running}, return_when=asyncio.FIRST_COMPLETED)
+            else:
+                await asyncio.wait(
+                    {stop_wait, *self._running},
+                    timeout=self.poll_interval,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+        if self._running:
+            logger.info("Draining %d in-flight jobs", len(self._running))
+            await asyncio.gather(*self._running, return_exceptions=True)
+        logger.info("Job worker %s stopped", self.worker_id)
+
+    async def _claim(self, limit: int) -> List[Any]:
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+        async with self.session_factory() as db:
+            expired = (await db.execute(EXPIRE_SQL, {"now": now, "stale_before": stale_before})).all()
+            result = await db.execute(
+                CLAIM_SQL,
+                {
+                    "now": now,
+                    "stale_before": stale_before,
+                    "worker_id": self.worker_id,
+                    "limit": limit,
+                },
+            )
+            jobs = result.mappings().all()
+            await db.commit()
+        for job_id, kind in expired:
+            logger.error("Job %s (%s) failed permanently: lock expired after the final attempt", job_id, kind)
+        return jobs
+
+    async def _purge(self) -> None:
+        """Delete done and failed jobs older than JOB_RETENTION_SECONDS"""
+        before = datetime.utcnow() - timedelta(seconds=settings.JOB_RETENTION_SECONDS)
+        try:
+            async with self.session_factory() as db:
+                result = await db.execute(
+                    delete(Job).where(Job.status.in_((STATUS_DONE, STATUS_FAILED)), Job.updatedAt < before)
+                )
+                await db.commit()
+            if result.rowcount:
+                logger.info("Purged %d finished jobs", result.rowcount)
+        except Exception as e:
+            logger.warning("Failed to purge finished jobs: %s", e)
+
+    async def _process(self, job: Any) -> None:
+        handler = _handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job['kind']}'")
+            await asyncio.wait_for(handler(job["payload"]), timeout=settings.JOB_TIMEOUT_SECONDS)
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+            await self._finish_failed(job, error)
+        else:
+            await self._finish(job["id"], status=STATUS_DONE, lastError=None)
+
+    async def _finish_failed(self, job: Any, error: str) -> None:
+        if job["attempts"] >= job["maxAttempts"]:
+            logger.error("Job %s (%s) failed permanently: %s", job["id"], job["kind"], error)
+            await self._finish(job["id"], status=STATUS_FAILED, lastError=error)
+            return
+
+        delay = retry_delay_seconds(job["attempts"])
+        logger.warning("Job %s (%s) failed, retrying in %.0fs: %s", job["id"], job["kind"], delay, error)
+        await self._finish(
+            job["id"],
+            status=STATUS_PENDING,
+            lastError=error,
+            runAt=datetime.utcnow() + timedelta(seconds=delay),
+        )
+
+    async def _finish(self, job_id: int, **values: Any) -> None:
+        values.update(lockedAt=None, lockedBy=None, updatedAt=datetime.utcnow())
+        try:
+            async with self.session_factory() as db:
+                # Only if still ours; a stale-lock takeover may have reclaimed it
+                await db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.lockedBy == self.worker_id)
+                    .values(**values)
+                )
+                await db.commit()
+        except Exception as e:
+            # The lock timeout returns the job to the queue
+            logger.error("Failed to record result for job %s: %s", job_id, e)
@@ -0,0 +1,26 @@
+"""
+Job handlers run by worker.py
+
+Handlers receive the JSON payload stored at enqueue time and must be safe to
+run more than once (a job is retried after failures or a worker crash).
+"""
+
+import logging
+from typing import Any, Dict
+
+from services.job_queue import job_handler
+
+logger = logging.getLogger(__name__)
+
+WILL_CREATED = "will.created"
+
+
+@job_handler(WILL_CREATED)
+async def on_will_created(payload: Dict[str, Any]) -> None:
+    """
+    Follow-up work for a newly created will.
+
+    Hook for slow post-creation steps (clause retrieval, PDF rendering,
+    notifications) so create-will can return as soon as the will is stored.
+    """
+    logger.info("Will created: %s for user %s", payload["will_id"], payload["user_id"])
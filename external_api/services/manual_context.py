@@ -0,0 +1,204 @@
+"""
+Manual retrieval statements and context packing shared by the API and
+chunking/query_manual.py
+
+This module has no application dependencies so the ingestion CLI can import
+it. Statements use psycopg2 (pyformat) placeholders: run them with
+cursor.execute or Connection.exec_driver_sql on the psycopg2 engine. The
+embedding parameter may be a pgvector Vector or a '[x,y,...]' literal.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+# Index search parameters that tune_ann.py may choose; only these GUCs are
+# ever applied from its settings file
+ANN_PARAMETERS = ("hnsw.ef_search", "ivfflat.probes")
+
+# One statement: ANN hits, then their chunk_index +/- n neighbours from the
+# same (source, section_number) via the manual_chunks_section_chunk_idx index.
+# The hit row itself is always joined, so hits without a chunk_index are kept
+# (as their own window). GROUP BY c.id deduplicates windows that overlap when
+# several hits share a section.
+CONTEXT_SQL = """
+    WITH hits AS (
+        SELECT
+            id,
+            source,
+            section_number,
+            chunk_index,
+            1 - (embedding <=> CAST(%(embedding)s AS vector)) AS similarity
+        FROM manual_chunks
+        WHERE jurisdiction = %(jurisdiction)s
+        ORDER BY embedding <=> CAST(%(embedding)s AS vector)
+        LIMIT %(top_k)s
+    ),
+    expanded AS (
+        SELECT
+            c.id,
+            c.source,
+            c.chapter_number,
+            c.chapter_title,
+            c.section_number,
+            c.section_title,
+            c.chunk_index,
+            c.page_start,
+            c.page_end,
+            c.text,
+            MAX(h.similarity) AS similarity,
+            BOOL_OR(c.id = h.id) AS is_hit,
+            MIN(CASE WHEN c.id = h.id THEN 0 ELSE ABS(c.chunk_index - h.chunk_index) END) AS distance
+        FROM hits h
+        JOIN manual_chunks c
+          ON c.id = h.id
+          OR (c.source = h.source
+              AND c.section_number = h.section_number
+              AND c.chunk_index BETWEEN h.chunk_index - %(neighbors)s AND h.chunk_index + %(neighbors)s)
+        GROUP BY c.id
+    )
+    SELECT
+        id, source, chapter_number, chapter_title, section_number, section_title,
+        chunk_index, page_start, page_end, text, similarity, is_hit, distance,
+        MAX(similarity) OVER (PARTITION BY source, section_number) AS section_similarity
+    FROM expanded
+    ORDER BY section_similarity DESC, source, section_number, chunk_index
+"""
+
+# Coarse-to-fine: route the query to the closest sections (and their direct
+# subsections) via manual_sections, then rank only the chunks inside them.
+# The candidate CTE is MATERIALIZED so the fine step is an exact scan over
+# the routed sections' chunks (found through the section btree index)
+# rather than a filtered walk of the whole-corpus ANN index.
+ROUTED_SEARCH_SQL = """
+    WITH routed AS (
+        SELECT source, section_number
+        FROM manual_sections
+        WHERE jurisdiction = %(jurisdiction)s
+        ORDER BY embedding <=> CAST(%(embedding)s AS vector)
+        LIMIT %(sections)s
+    ),
+    scope AS (
+        SELECT DISTINCT s.source, s.section_number
+        FROM routed r
+        JOIN manual_sections s
+          ON s.source = r.source
+         AND (s.section_number = r.section_number OR s.parent_section_number = r.section_number)
+    ),
+    candidates AS MATERIALIZED (
+        SELECT
+            c.id,
+            c.chapter_number,
+            c.chapter_title,
+            c.section_number,
+            c.section_title,
+            c.page_start,
+            c.page_end,
+            c.text,
+            c.embedding <=> CAST(%(embedding)s AS vector) AS distance
+        FROM scope sc
+        JOIN manual_chunks c
+          ON c.source = sc.source
+         AND c.section_number = sc.section_number
+    )
+    SELECT
+        id, chapter_number, chapter_title, section_number, section_title,
+        page_start, page_end, text, 1 - distance AS similarity
+    FROM candidates
+    ORDER BY distance
+    LIMIT %(top_k)s
+"""
+
+
+def load_ann_settings(path: str) -> Dict[str, int]:
+    """
+    Read the index search parameters written by chunking/tune_ann.py,
+    e.g. {"hnsw.ef_search": 40}.
+
+    Returns an empty dict when the file does not exist (no tuning yet).
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    return {k: int(v) for k, v in config.get("parameters", {}).items() if k in ANN_PARAMETERS}
+
+
+def estimate_tokens(value: str) -> int:
+    """Rough token count (1 token ~ 4 characters, as in lib/ai/token-budget.ts)"""
+    return (len(value) + 3) // 4
+
+
+def _reading_order(chunk: Dict[str, Any]) -> Tuple[bool, int]:
+    """Sort key by chunk_index, chunks without one last"""
+    return chunk["chunk_index"] is None, chunk["chunk_index"] or 0
+
+
+def pack_context(rows: List[Dict[str, Any]], token_budget: int) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Select chunks for a token budget and group them by section.
+
+    Hits are admitted first, then neighbours in order of distance from a hit.
+    A section header costs tokens once, when the section's first chunk is
+    admitted. Sections (keyed on source and section_number) are ordered by
+    their best similarity and chunks by chunk_index.
+
+    Args:
+        rows: Expanded rows from CONTEXT_SQL
+        token_budget: Maximum estimated tokens for headers plus chunk text
+
+    Returns:
+        Tuple of (sections, tokens_used)
+    """
+    priority = sorted(
+        rows,
+        key=lambda r: (not r["is_hit"], r["distance"], -r["section_similarity"], -r["similarity"]),
+    )
+
+    used = 0
+    kept: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for row in priority:
+        key = (row["source"], row["section_number"])
+        cost = estimate_tokens(row["text"])
+        if key not in kept:
+            cost += estimate_tokens(f"{row['section_number']} {row['section_title']}")
+        if used + cost > token_budget:
+            continue
+        kept.setdefault(key, []).append(row)
+        used += cost
+
+    sections = []
+    for (source, section_number), chunks in sorted(kept.items(), key=lambda item: -item[1][0]["section_similarity"]):
+        chunks.sort(key=_reading_order)
+        first = chunks[0]
+        sections.append({
+            "source": source,
+            "section_number": section_number,
+            "section_title": first["section_title"],
+            "chapter_number": first["chapter_number"],
+            "chapter_title": first["chapter_title"],
+            "header": f"{section_number} {first['section_title']}",
+            "similarity": float(first["section_similarity"]),
+            "chunks": [
+                {
+                    "id": c["id"],
+                    "chunk_index": c["chunk_index"],
+                    "page_start": c["page_start"],
+                    "page_end": c["page_end"],
+                    "text": c["text"],
+                    "is_hit": c["is_hit"],
+                    "similarity": float(c["similarity"]),
+                }
+                for c in chunks
+            ],
+        })
+
+    return sections, used
+
+
+def render_context(sections: List[Dict[str, Any]]) -> str:
+    """Join packed sections into prompt text with one header per section"""
+    return "\n\n".join(
+        section["header"] + "\n" + "\n\n".join(c["text"] for c in section["chunks"])
+        for section in sections
+    )
@@ -0,0 +1,331 @@
+"""
+Manual (legal reference) retrieval service backed by pgvector
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from services.manual_context import CONTEXT_SQL, ROUTED_SEARCH_SQL, load_ann_settings, pack_context
+from utils import metrics
+from utils.cache import TTLCache
+from utils.config import settings
+from utils.database import get_engine
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DURATION = metrics.histogram(
+    "manual_embedding_duration_seconds",
+    "OpenAI embeddings request latency (cache misses only)",
+    ("outcome",),
+)
+SEARCH_DURATION = metrics.histogram(
+    "manual_search_duration_seconds",
+    "Vector search query latency, including the pool checkout",
+    ("query",),
+)
+SEARCH_CACHE = metrics.counter(
+    "manual_search_cache_total",
+    "Manual search result cache lookups",
+    ("result",),
+)
+
+
+SEARCH_SQL = text(
+    """
+    SELECT
+        id,
+        chapter_number,
+        chapter_title,
+        section_number,
+        section_title,
+        page_start,
+        page_end,
+        text,
+        1 - (embedding <=> CAST(:embedding AS vector)) AS similarity
+    FROM manual_chunks
+    WHERE jurisdiction = :jurisdiction
+    ORDER BY embedding <=> CAST(:embedding AS vector)
+    LIMIT :top_k
+    """
+)
+
+
+def _ann_statements() -> List[str]:
+    """
+    SET LOCAL statements for the ANN index parameters: those in the
+    tune_ann.py settings file, then the MANUAL_SEARCH_* settings for any
+    parameter the file does not set.
+    """
+    parameters: Dict[str, Optional[int]] = {
+        "hnsw.ef_search": settings.MANUAL_SEARCH_HNSW_EF_SEARCH,
+        "ivfflat.probes": settings.MANUAL_SEARCH_IVFFLAT_PROBES,
+    }
+    try:
+        parameters.update(load_ann_settings(settings.MANUAL_ANN_SETTINGS))
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring ANN settings file %s: %s", settings.MANUAL_ANN_SETTINGS, e)
+    # Names come from ANN_PARAMETERS only; GUC names cannot be bound
+    return [f"SET LOCAL {name} = {int(value)}" for name, value in parameters.items() if value is not None]
+
+
+def _vector_literal(embedding: List[float]) -> str:
+    """Format an embedding as a pgvector text literal"""
+    return "[" + ",".join(repr(float(x)) for x in embedding) + "]"
+
+
+class ManualSearchService:
+    """
+    Retrieval client for the manual_chunks table.
+
+    Reuses one OpenAI client (and its HTTP connection pool) and the shared
+    SQLAlchemy engine pool. Query embeddings and search results are cached
+    in-process so repeated copilot prompts skip both the embedding call and
+    the vector scan.
+    """
+
+    def __init__(self):
+        self.embedding_model = settings.OPENAI_EMBEDDING_MODEL
+        self.embedding_dimensions = settings.MANUAL_EMBEDDING_DIMENSIONS
+        self.jurisdiction = settings.MANUAL_SEARCH_JURISDICTION
+        self._ann_statements = [text(stmt) for stmt in _ann_statements()]
+        self._client = None
+        self._embedding_cache: TTLCache[List[float]] = TTLCache(
+            maxsize=settings.MANUAL_SEARCH_CACHE_SIZE,
+            ttl_seconds=settings.MANUAL_SEARCH_CACHE_TTL_SECONDS,
+        )
+        self._result_cache: TTLCache[List[Dict[str, Any]]] = TTLCache(
+            maxsize=settings.MANUAL_SEARCH_CACHE_SIZE,
+            ttl_seconds=settings.MANUAL_SEARCH_CACHE_TTL_SECONDS,
+        )
+
+        if not settings.OPENAI_API_KEY:
+            logger.warning("OPENAI_API_KEY not configured - manual search will fail")
+
+    def _get_client(self):
+        """Create the OpenAI client on first use"""
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        return self._client
+
+    def warm_up(self) -> None:
+        """Load the OpenAI client ahead of the first search (no request is sent)"""
+        if settings.OPENAI_API_KEY:
+            self._get_client()
+
+    async def embed_many(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed queries, serving cached vectors and batching the misses
+        into a single embeddings request.
+
+        Args:
+            queries: Query strings to embed
+
+        Returns:
+            Embeddings in the same order as queries
+        """
+        embeddings: List[Optional[List[float]]] = [self._embedding_cache.get(q) for q in queries]
+        missing = sorted({q for q, e in zip(queries, embeddings) if e is None})
+
+        if missing:
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                response = await self._get_client().embeddings.create(
+                    model=self.embedding_model,
+                    input=missing,
+                    dimensions=self.embedding_dimensions,
+                )
+                outcome = "ok"
+            finally:
+                EMBEDDING_DURATION.observe(time.perf_counter() - start, outcome)
+            fetched = {q: item.embedding for q, item in zip(missing, response.data)}
+            for q, emb in fetched.items():
+                self._embedding_cache.set(q, emb)
+            embeddings = [e if e is not None else fetched[q] for q, e in zip(queries, embeddings)]
+
+        return embeddings
+
+    def _query_chunks(
+        self, embedding: List[float], top_k: int, sections: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the vector similarity query on a pooled connection.
+
+        With sections set, the query is first routed to the closest sections
+        in manual_sections and only their chunks are ranked.
+        """
+        params = {
+            "embedding": _vector_literal(embedding),
+            "jurisdiction": self.jurisdiction,
+            "top_k": top_k,
+        }
+        if sections:
+            params["sections"] = sections
+
+        start = time.perf_counter()
+        with get_engine().connect() as conn:
+            # SET LOCAL scopes the index parameters to this query's transaction
+            for stmt in self._ann_statements:
+                conn.execute(stmt)
+            if sections:
+                result = conn.exec_driver_sql(ROUTED_SEARCH_SQL, params)
+            else:
+                result = conn.execute(SEARCH_SQL, params)
+            rows = result.mappings().all()
+        SEARCH_DURATION.observe(time.perf_counter() - start, "routed" if sections else "chunks")
+
+        return [
+            {
+                "id": row["id"],
+                "chapter_number": row["chapter_number"],
+                "chapter_title": row["chapter_title"],
+                "section_number": row["section_number"],
+                "section_title": row["section_title"],
+                "page_start": row["page_start"],
+                "page_end": row["page_end"],
+                "text": row["text"],
+                "similarity": float(row["similarity"]),
+            }
+            for row in rows
+        ]
+
+    def _query_context(self, embedding: List[float], top_k: int, neighbors: int) -> List[Dict[str, Any]]:
+        """Fetch hits plus their same-section neighbours in one statement"""
+        start = time.perf_counter()
+        with get_engine().connect() as conn:
+            for stmt in self._ann_statements:
+                conn.execute(stmt)
+            rows = conn.exec_driver_sql(
+                CONTEXT_SQL,
+                {
+                    "embedding": _vector_literal(embedding),
+                    "jurisdiction": self.jurisdiction,
+                    "top_k": top_k,
+                    "neighbors": neighbors,
+                },
+            ).mappings().all()
+        SEARCH_DURATION.observe(time.perf_counter() - start, "context")
+
+        return [dict(row) for row in rows]
+
+    async def search_context(
+        self,
+        query: str,
+        top_k: int = 5,
+        neighbors: int = 1,
+        token_budget: int = 2000,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Return the top_k hits expanded with chunk_index +/- neighbors from
+        the same section, packed into token_budget.
+
+        Args:
+            query: Natural language query
+            top_k: Number of ANN hits to expand
+            neighbors: Chunks to include either side of each hit
+            token_budget: Maximum estimated tokens of returned context
+
+        Returns:
+            Tuple of (sections, tokens_used); see pack_context
+        """
+        key = ("context", query, top_k, neighbors)
+        rows = self._result_cache.get(key)
+        SEARCH_CACHE.inc("miss" if rows is None else "hit")
+        if rows is None:
+            embedding = (await self.embed_many([query]))[0]
+            rows = await asyncio.to_thread(self._query_context, embedding, top_k, neighbors)
+            self._result_cache.set(key, rows)
+
+        return pack_context(rows, token_budget)
+
+    async def search(
+        self, query: str, top_k: int = 5, sections: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the top_k manual passages most similar to query.
+
+        Args:
+            query: Natural language query
+            top_k: Number of passages to return
+            sections: Route to this many sections before ranking chunks
+                (None searches the whole corpus)
+
+        Returns:
+            List of passage dicts ordered by descending similarity
+        """
+        results = await self.search_many([query], top_k, sections)
+        return results[0]
+
+    async def search_many(
+        self, queries: List[str], top_k: int = 5, sections: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search several queries with one embeddings request and concurrent
+        vector lookups.
+
+        Args:
+            queries: Natural language queries
+            top_k: Number of passages to return per query
+            sections: Optional number of sections to route each query to
+
+        Returns:
+            One result list per query, in input order
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        async for index, rows in self.stream_many(queries, top_k, sections):
+            results[index] = rows
+        return results
+
+    async def stream_many(
+        self, queries: List[str], top_k: int = 5, sections: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Yield (query_index, results) pairs as soon as each query completes.
+
+        Cached queries are yielded first; the remaining queries share one
+        embeddings request and their vector lookups run concurrently.
+
+        Args:
+            queries: Natural language queries
+            top_k: Number of passages to return per query
+            sections: Optional number of sections to route each query to
+
+        Yields:
+            Tuple of (index into queries, passage dicts)
+        """
+        pending: List[int] = []
+        for i, q in enumerate(queries):
+            cached = self._result_cache.get((q, top_k, sections))
+            SEARCH_CACHE.inc("miss" if cached is None else "hit")
+            if cached is None:
+                pending.append(i)
+            else:
+                yield i, cached
+
+        if not pending:
+            return
+
+        embeddings = await self.embed_many([queries[i] for i in pending])
+
+        async def lookup(i: int, emb: List[float]) -> Tuple[int, List[Dict[str, Any]]]:
+            rows = await asyncio.to_thread(self._query_chunks, emb, top_k, sections)
+            self._result_cache.set((queries[i], top_k, sections), rows)
+            return i, rows
+
+        tasks = [asyncio.ensure_future(lookup(i, emb)) for i, emb in zip(pending, embeddings)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+# Global ManualSearchService instance
+manual_search_service = ManualSearchService()
@@ -2,16 +2,23 @@
 User and Will management service with orchestration logic
 """
 
-import json
 import logging
-from typing import Optional, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime
 
 from models.db_models import User, Will, WillStatus
 from services.clerk_service import clerk_service
+from services.job_queue import enqueue, enqueue_many
+from services.jobs import WILL_CREATED
 from models.models import WillContent
+from utils.cache import TieredCache, get_shared_cache_backend
+from utils.config import settings
+from utils.database import get_async_sessionmaker
+from utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -34,26 +41,67 @@ def generate_cuid() -> str:
     return f"c{timestamp}{random_part}"
 
 
-async def get_or_create_user(
-    db: Session,
+@dataclass(frozen=True)
+class UserIdentity:
+    """
+    Resolved user identifiers, cached per email.
+
+    id is None for a user known to Clerk but not yet in the database (see
+    resolve_user); the cache entry is replaced once the user is stored.
+    """
+    id: Optional[str]
+    clerkId: str
     email: str
-) -> Tuple[Optional[User], Optional[str]]:
+
+
+@dataclass(frozen=True)
+class CreatedWill:
+    """IDs of a newly created will and of the user that owns it"""
+    id: str
+    user_id: str
+
+
+# email -> UserIdentity fields; shared across workers when SHARED_CACHE_URL is set
+user_cache = TieredCache(
+    namespace="user",
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    shared=get_shared_cache_backend(),
+)
+
+# In-flight resolutions per email, so concurrent requests hit Clerk once;
+# ("store", email) keys the separate upsert of a user new to the database
+_user_flights = SingleFlight()
+
+
+async def invalidate_user(email: str) -> None:
+    """Drop a cached user resolution, e.g. after a foreign key failure"""
+    await user_cache.delete(email)
+
+
+async def get_or_create_user(email: str) -> Tuple[Optional[UserIdentity], Optional[str]]:
     """
     Get existing user or create new user in both Clerk and database.
 
-    This function implements the correct flow where Clerk is the source of truth:
-    1. Checks if user exists in Clerk by email, creates if not found
-    2. Extracts Clerk user ID from response
-    3. Checks if user exists in database by Clerk ID
-    4. Creates DB user record if not found (no rollback to Clerk on failure)
+    Resolution order, cheapest first:
+    1. Resolution cache (in-process, then shared tier if configured)
+    2. Local User table by email - users we have seen before
+    3. Clerk (source of truth): look up by email, create if not found,
+       then upsert the DB user on Clerk ID and commit
+
+    Steps 1-3 up to the upsert are resolve_user, so this shares its
+    in-flight resolution and cache entry: Clerk is called once per email
+    whichever function callers use. Only the upsert is a separate step,
+    and concurrent callers share that too. Both run on their own sessions,
+    so no caller's request session is used (or committed) on behalf of
+    the others.
 
     Args:
-        db: Database session
         email: User's email address
 
     Returns:
-        Tuple of (User, error_message)
-        - User: Database user object if successful
+        Tuple of (UserIdentity, error_message)
+        - UserIdentity: Resolved user IDs if successful
         - error_message: Error description if operation failed
 
     Note:
@@ -61,16 +109,92 @@ async def get_or_create_user(
         User and testator are separate entities.
         Clerk is the authentication authority; DB is synchronized to Clerk.
     """
+    user, error = await resolve_user(email)
+    if error or user is None or user.id is not None:
+        return user, error
+
+    return await _user_flights.do(("store", email), lambda: _store_user_in_own_session(user))
+
+
+async def resolve_user(email: str) -> Tuple[Optional[UserIdentity], Optional[str]]:
+    """
+    Like get_or_create_user, but without writing to the database.
+
+    A user new to the database is returned (and cached) with id None; pass
+    it to create_will_for_user, which upserts it in the will's transaction.
+
+    Args:
+        email: User's email address
+
+    Returns:
+        Tuple of (UserIdentity, error_message)
+    """
+    cached = await user_cache.get(email)
+    if cached:
+        return UserIdentity(**cached), None
+
+    # Concurrent requests for the same email share one resolution
+    return await _user_flights.do(email, lambda: _resolve_user_in_own_session(email))
+
+
+def _upsert_user_stmt(clerk_id: str, email: str, now: datetime):
+    """
+    Idempotent upsert keyed on Clerk ID returning the user's ID: the
+    existing row's when another worker (or an earlier email) got there first.
+    """
+    return (
+        pg_insert(User)
+        .values(
+            id=generate_cuid(),
+            clerkId=clerk_id,
+            email=email,
+            firstName=None,
+            lastName=None,
+            createdAt=now,
+            updatedAt=now,
+        )
+        .on_conflict_do_update(
+            index_elements=[User.clerkId],
+            set_={"email": email, "updatedAt": now},
+        )
+        .returning(User.id)
+    )
+
+
+async def _resolve_user_in_own_session(email: str) -> Tuple[Optional[UserIdentity], Optional[str]]:
+    """Run _resolve_user on a session owned by the shared flight"""
+    async with get_async_sessionmaker()() as db:
+        return await _resolve_user(db, email)
+
+
+async def _resolve_user(db: AsyncSession, email: str) -> Tuple[Optional[UserIdentity], Optional[str]]:
+    """
+    Resolve a cache miss via the database, then Clerk (see get_or_create_user).
+
+    A user found only in Clerk is returned unsaved (id None).
+    """
     try:
-        # Step 1: Get or create user in Clerk (Clerk is source of truth)
-        logger.info(f"Checking if user exists in Clerk: {email}")
+        # Step 1: Known users are already synchronized with Clerk
+        stmt = select(User.id, User.clerkId).where(User.email == email)
+        row = (await db.execute(stmt)).first()
+        if row:
+            identity = UserIdentity(id=row.id, clerkId=row.clerkId, email=email)
+            await user_cache.set(email, asdict(identity))
+            return identity, None
+
+        # Step 2: Get or create user in Clerk (Clerk is source of truth)
+        logger.debug("User not in database, checking Clerk: %s", email)
         clerk_user, clerk_error = await clerk_service.get_user_by_email(email)
 
         if clerk_error and "not found" in clerk_error.lower():
             # User doesn't exist in Clerk, create them
-            logger.info(f"User not found in Clerk, creating: {email}")
+            logger.info("User not found in Clerk, creating: %s", email)
             clerk_user, clerk_error = await clerk_service.create_user(email)
 
+            if clerk_error and "already exists" in clerk_error.lower():
+                # Another worker created them in the meantime
+                clerk_user, clerk_error = await clerk_service.get_user_by_email(email)
+
         if clerk_error or not clerk_user:
             error_msg = f"Failed to get/create Clerk user: {clerk_error}"
             logger.error(error_msg)
@@ -82,101 +206,156 @@ async def get_or_create_user(
             logger.error(error_msg)
             return None, error_msg
 
-        logger.info(f"Clerk user found/created: {clerk_user_id}")
-
-        # Step 2: Check if user exists in database by Clerk ID
-        logger.info(f"Checking database for Clerk ID: {clerk_user_id}")
-        stmt = select(User).where(User.clerkId == clerk_user_id)
-        existing_user = db.execute(stmt).scalar_one_or_none()
+        logger.debug("Clerk user found/created: %s", clerk_user_id)
+        identity = UserIdentity(id=None, clerkId=clerk_user_id, email=email)
+        await user_cache.set(email, asdict(identity))
+        return identity, None
 
-        if existing_user:
-            logger.info(f"User found in database: {existing_user.id}")
-            return existing_user, None
+    except Exception as e:
+        logger.error("Error in get_or_create_user: %s", e)
+        return None, f"Unexpected error: {str(e)}"
 
-        # Step 3: Create database user record
-        logger.info(f"Creating database user with Clerk ID: {clerk_user_id}")
-        now = datetime.utcnow()
-        new_user = User(
-            id=generate_cuid(),
-            clerkId=clerk_user_id,
-            email=email,
-            firstName=None,
-            lastName=None,
-            createdAt=now,
-            updatedAt=now,
-        )
 
+async def _store_user_in_own_session(user: UserIdentity) -> Tuple[Optional[UserIdentity], Optional[str]]:
+    """
+    Step 3 of get_or_create_user: upsert the database user on Clerk ID and
+    commit, on a session owned by the shared flight.
+    """
+    logger.debug("Upserting database user with Clerk ID: %s", user.clerkId)
+    async with get_async_sessionmaker()() as db:
         try:
-            db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
-            logger.info(f"Database user created successfully: {new_user.id}")
-            return new_user, None
-
+            user_id = (await db.execute(_upsert_user_stmt(user.clerkId, user.email, datetime.utcnow()))).scalar_one()
+            await db.commit()
         except Exception as db_error:
             # Rollback database transaction
-            db.rollback()
-            logger.error(f"Database user creation failed: {str(db_error)}")
+            await db.rollback()
+            logger.error("Database user creation failed: %s", db_error)
 
             # Note: Do NOT delete Clerk user - they are valid in Clerk
             # The database should eventually be synchronized with Clerk
-            error_msg = f"Database user creation failed: {str(db_error)}"
-            return None, error_msg
-
-    except Exception as e:
-        logger.error(f"Error in get_or_create_user: {str(e)}")
-        return None, f"Unexpected error: {str(e)}"
-
-
-def create_will_for_user(
-    db: Session,
-    user: User,
-    will_content: WillContent
-) -> Tuple[Optional[Will], Optional[str]]:
+            return None, f"Database user creation failed: {str(db_error)}"
+
+    logger.info("Database user ready: %s", user_id)
+    identity = replace(user, id=user_id)
+    await user_cache.set(user.email, asdict(identity))
+    return identity, None
+
+
+def will_title(will_content: WillContent) -> str:
+    """Generate the will title from the testator name"""
+    testator_name = f"{will_content.testator.firstName or ''} {will_content.testator.lastName or ''}".strip() or "Unknown"
+    return f"Will of {testator_name}"
+
+
+def _will_row(user: UserIdentity, will_content: WillContent, now: datetime) -> Dict[str, Any]:
+    """Column values for a new draft Will"""
+    return {
+        "id": generate_cuid(),
+        "userId": user.id,
+        "title": will_title(will_content),
+        # Serialized once at validation time, written to JSONB as-is
+        "content": will_content.canonical_json(),
+        "editorContent": None,  # Will be populated later by editor
+        "status": WillStatus.DRAFT,
+        "createdAt": now,
+        "updatedAt": now,
+    }
+
+
+async def create_will_for_user(
+    db: AsyncSession,
+    user: UserIdentity,
+    will_content: WillContent,
+    before_commit: Optional[Callable[[CreatedWill], Awaitable[None]]] = None,
+) -> Tuple[Optional[CreatedWill], Optional[str]]:
     """
-    Create a Will record for a user.
+    Create a Will record for a user in a single transaction.
+
+    An unsaved user (from resolve_user) is upserted first, in the same
+    transaction, so a new user costs one commit rather than two. Rows are
+    written with Core INSERT ... RETURNING; nothing is read back afterwards.
 
     Args:
         db: Database session
-        user: User object who owns the will
+        user: Resolved user who owns the will (id None if not yet stored)
         will_content: Complete will content from API request
+        before_commit: Optional coroutine run on db after the inserts and
+            before the commit (e.g. recording an idempotent response);
+            if it raises, nothing is committed
 
     Returns:
-        Tuple of (Will, error_message)
-        - Will: Database will object if successful
+        Tuple of (CreatedWill, error_message)
+        - CreatedWill: IDs of the will and its owner if successful
         - error_message: Error description if operation failed
     """
     try:
-        # Generate title from testator name
-        testator_name = f"{will_content.testator.firstName or ''} {will_content.testator.lastName or ''}".strip() or "Unknown"
-        title = f"Will of {testator_name}"
-
-        # Serialize will_content to JSON
-        content_json = will_content.model_dump_json()
-
-        logger.info(f"Creating will for user {user.id}: {title}")
-
         now = datetime.utcnow()
-        new_will = Will(
-            id=generate_cuid(),
-            userId=user.id,
-            title=title,
-            content=content_json,
-            editorContent=None,  # Will be populated later by editor
-            status=WillStatus.DRAFT,
-            createdAt=now,
-            updatedAt=now,
-        )
-
-        db.add(new_will)
-        db.commit()
-        db.refresh(new_will)
-
-        logger.info(f"Will created successfully: {new_will.id}")
-        return new_will, None
+        stored_user = user
+        if user.id is None:
+            user_id = (await db.execute(_upsert_user_stmt(user.clerkId, user.email, now))).scalar_one()
+            stored_user = replace(user, id=user_id)
+
+        row = _will_row(stored_user, will_content, now)
+        logger.debug("Creating will for user %s: %s", stored_user.id, row["title"])
+        will_id = (await db.execute(insert(Will).values(row).returning(Will.id))).scalar_one()
+        if settings.JOBS_ENABLED:
+            # Follow-up work commits atomically with the will
+            await enqueue(db, WILL_CREATED, {"will_id": will_id, "user_id": stored_user.id})
+        created = CreatedWill(id=will_id, user_id=stored_user.id)
+        if before_commit is not None:
+            await before_commit(created)
+        await db.commit()
+
+        if stored_user is not user:
+            await user_cache.set(user.email, asdict(stored_user))
+        logger.debug("Will committed: %s", will_id)
+        return created, None
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         error_msg = f"Failed to create will: {str(e)}"
         logger.error(error_msg)
         return None, error_msg
+
+
+async def create_wills_for_user_bulk(
+    db: AsyncSession,
+    user: UserIdentity,
+    will_contents: List[WillContent],
+    batch_size: int = 500,
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Create many Will records for one user with multi-row inserts.
+
+    Each batch is a single INSERT ... VALUES (...), (...) statement committed
+    on its own, so a failing batch does not discard earlier ones.
+
+    Args:
+        db: Database session
+        user: Resolved user who owns the wills
+        will_contents: Validated will contents, in request order
+        batch_size: Rows per INSERT statement
+
+    Returns:
+        One (will_id, error_message) tuple per input, in the same order
+    """
+    results: List[Tuple[Optional[str], Optional[str]]] = []
+    now = datetime.utcnow()
+
+    for offset in range(0, len(will_contents), batch_size):
+        rows = [_will_row(user, wc, now) for wc in will_contents[offset:offset + batch_size]]
+        try:
+            await db.execute(insert(Will).values(rows))
+            if settings.JOBS_ENABLED:
+                await enqueue_many(db, WILL_CREATED, [{"will_id": row["id"], "user_id": user.id} for row in rows])
+            await db.commit()
+            results.extend((row["id"], None) for row in rows)
+            logger.info("Bulk inserted %d wills for user %s", len(rows), user.id)
+
+        except Exception as e:
+            await db.rollback()
+            error_msg = f"Failed to create will: {str(e)}"
+            logger.error(error_msg)
+            results.extend((None, error_msg) for _ in rows)
+
+    return results
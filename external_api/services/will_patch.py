@@ -0,0 +1,489 @@
+"""
+Partial will updates: JSON Patch (RFC 6902) and JSON Merge Patch (RFC 7386)
+
+A patch is applied to the parts of Will.content it touches ("units")
+instead of the whole document:
+
+1. Each operation maps to a unit: one element of a top-level list (e.g.
+   /beneficiaries/2 for /beneficiaries/2/fullName), or the top-level
+   field (/testator, or /beneficiaries when the list gains or loses
+   elements). Merge patches use one unit per top-level key.
+2. One query reads the units and the version (updatedAt and content
+   digest), plus the party ID numbers the
+   witness rule needs when one of those lists changes.
+3. Operations run against the units; each changed unit is validated
+   against its WillContent type (re-running that model's validators),
+   then the cross-field rules that depend on it.
+4. One UPDATE writes the changed units with jsonb_set (and deletes removed
+   fields with #-, rather than storing JSON null), conditional on the
+   version being unchanged (optimistic concurrency).
+"""
+
+import copy
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Annotated, Any, Dict, List, Optional, Sequence, Tuple, Union, get_args, get_origin
+
+import orjson
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import Text, bindparam, cast, func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.db_models import Will
+from models.models import WITNESS_CONFLICT_ERROR, WITNESS_CONFLICT_FIELDS, WillContent, witness_conflicts
+from services.will_query import CONTENT_DIGEST, SUMMARY_COLUMNS, WillVersion, owned_by, row_version
+from utils.bulk import format_validation_error
+
+logger = logging.getLogger(__name__)
+
+JSON_PATCH = "application/json-patch+json"
+MERGE_PATCH = "application/merge-patch+json"
+
+# Read-modify-write attempts when another writer wins the updatedAt check
+PATCH_ATTEMPTS = 3
+
+Path = Tuple[str, ...]
+
+_MISSING = object()
+
+
+class PatchError(Exception):
+    """The patch is malformed or produces an invalid will (422)"""
+
+
+class PatchConflict(Exception):
+    """The patch does not apply to the stored will: failed test, missing path (409)"""
+
+
+class WillVersionMismatch(Exception):
+    """If-Match did not name the current version, or writers kept racing (412 / 409)"""
+
+
+@dataclass
+class Operation:
+    """One normalized patch operation; merge patches use op="merge" """
+    op: str
+    path: Path
+    value: Any = None
+    from_path: Optional[Path] = None
+
+
+# ============================================
+# PARSING
+# ============================================
+
+def _parse_pointer(pointer: Any) -> Path:
+    """RFC 6901 JSON Pointer to reference tokens (the root is not patchable)"""
+    if not isinstance(pointer, str) or not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON Pointer: {pointer!r}")
+    tokens = tuple(t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/"))
+    if "-" in tokens[:-1]:
+        raise PatchError(f"'-' may only end a path: {pointer}")
+    return tokens
+
+
+def _pointer(path: Path) -> str:
+    return "/" + "/".join(t.replace("~", "~0").replace("/", "~1") for t in path)
+
+
+def parse_patch(document: Any, media_type: str, max_operations: int) -> List[Operation]:
+    """
+    Normalize a JSON Patch or Merge Patch document.
+
+    Args:
+        document: Decoded request body
+        media_type: JSON_PATCH or MERGE_PATCH
+        max_operations: Largest accepted patch
+
+    Returns:
+        Operations in application order
+
+    Raises:
+        PatchError: If the document is malformed
+    """
+    if media_type == MERGE_PATCH:
+        if not isinstance(document, dict):
+            raise PatchError("A merge patch must be a JSON object")
+        operations = [Operation("merge", (key,), value) for key, value in document.items()]
+    else:
+        if not isinstance(document, list):
+            raise PatchError("A JSON Patch must be an array of operations")
+        operations = []
+        for i, raw in enumerate(document):
+            if not isinstance(raw, dict) or raw.get("op") not in ("add", "remove", "replace", "move", "copy", "test"):
+                raise PatchError(f"Operation {i}: op must be add, remove, replace, move, copy or test")
+            op = raw["op"]
+            if op in ("add", "replace", "test") and "value" not in raw:
+                raise PatchError(f"Operation {i}: '{op}' requires a value")
+            from_path = _parse_pointer(raw.get("from")) if op in ("move", "copy") else None
+            operations.append(Operation(op, _parse_pointer(raw.get("path")), raw.get("value"), from_path))
+
+    if not operations:
+        raise PatchError("Empty patch")
+    if len(operations) > max_operations:
+        raise PatchError(f"Too many operations (maximum {max_operations})")
+    return operations
+
+
+# ============================================
+# UNITS AND TYPES
+# ============================================
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if get_origin(annotation) is Union:
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _is_model(annotation: Any) -> bool:
+    annotation = _unwrap_optional(annotation)
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _is_index(token: str) -> bool:
+    return token == "-" or (token.isdigit() and (token == "0" or not token.startswith("0")))
+
+
+def _child(annotation: Any, token: str) -> Tuple[Any, Any]:
+    """(annotation, FieldInfo or None) of token inside annotation"""
+    annotation = _unwrap_optional(annotation)
+    if _is_model(annotation):
+        field = annotation.model_fields.get(token)
+        if field is not None:
+            return field.annotation, field
+    elif get_origin(annotation) in (list, List) and _is_index(token):
+        return get_args(annotation)[0], None
+    raise KeyError(token)
+
+
+def _unit_for(path: Path, whole_target: bool) -> Path:
+    """
+    Independently validated part of the will containing path.
+
+    One element of a top-level list when the operation stays inside it (or
+    replaces or reads it whole), otherwise the top-level field. Model
+    validators span the fields of their own model (e.g. an asset's
+    allocations must sum to 100%), so units never go below these levels.
+    """
+    annotation: Any = WillContent
+    for token in path:
+        try:
+            annotation, _ = _child(annotation, token)
+        except KeyError:
+            raise PatchError(f"Unknown path: {_pointer(path)}")
+
+    if len(path) >= 2 and path[1] != "-" and (len(path) > 2 or whole_target):
+        element, _ = _child(WillContent, path[0])
+        if get_origin(_unwrap_optional(element)) in (list, List):
+            return path[:2]
+    return path[:1]
+
+
+@lru_cache(maxsize=256)
+def _adapter(type_path: Path) -> TypeAdapter:
+    """Validator for the value at a unit path (indices replaced by '*')"""
+    annotation: Any = WillContent
+    field = None
+    for token in type_path:
+        annotation, field = _child(annotation, "0" if token == "*" else token)
+    return TypeAdapter(Annotated[annotation, field] if field is not None else annotation)
+
+
+def _validate_unit(unit: Path, value: Any) -> Any:
+    """Validated, canonically serialized value for unit (None when removed)"""
+    adapter = _adapter(tuple("*" if t.isdigit() else t for t in unit))
+    try:
+        validated = adapter.validate_python(None if value is _MISSING else value)
+    except ValidationError as e:
+        raise PatchError(f"{_pointer(unit)}: {format_validation_error(e)}")
+    return adapter.dump_python(validated, mode="json")
+
+
+def _plan_units(operations: Sequence[Operation]) -> List[Path]:
+    """Disjoint units covering every operation, outermost wins"""
+    units = set()
+    for operation in operations:
+        units.add(_unit_for(operation.path, operation.op in ("replace", "test")))
+        if operation.from_path is not None:
+            units.add(_unit_for(operation.from_path, operation.op == "copy"))
+
+    planned: List[Path] = []
+    for unit in sorted(units, key=len):
+        if not any(unit[:len(outer)] == outer for outer in planned):
+            planned.append(unit)
+    return planned
+
+
+def _locate(units: Sequence[Path], path: Path) -> Tuple[Path, Path]:
+    """(unit, path relative to the unit's holder) for a planned path"""
+    for unit in units:
+        if path[:len(unit)] == unit:
+            return unit, ("value",) + path[len(unit):]
+    raise AssertionError(f"No unit planned for {_pointer(path)}")
+
+
+# ============================================
+# APPLYING OPERATIONS
+# ============================================
+
+def _get(node: Any, path: Path, pointer: str) -> Any:
+    for token in path:
+        if isinstance(node, dict) and token in node:
+            node = node[token]
+        elif isinstance(node, list) and _is_index(token) and token != "-" and int(token) < len(node):
+            node = node[int(token)]
+        else:
+            raise PatchConflict(f"Path not found: {pointer}")
+    return node
+
+
+def _add(holder: Dict[str, Any], path: Path, value: Any, pointer: str) -> None:
+    parent, token = _get(holder, path[:-1], pointer), path[-1]
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list) and token == "-":
+        parent.append(value)
+    elif isinstance(parent, list) and _is_index(token) and int(token) <= len(parent):
+        parent.insert(int(token), value)
+    else:
+        raise PatchConflict(f"Path not found: {pointer}")
+
+
+def _remove(holder: Dict[str, Any], path: Path, pointer: str) -> Any:
+    parent, token = _get(holder, path[:-1], pointer), path[-1]
+    removed = _get(parent, (token,), pointer)
+    if isinstance(parent, dict):
+        del parent[token]
+    else:
+        del parent[int(token)]
+    return removed
+
+
+def _merge(target: Any, patch: Any) -> Any:
+    """RFC 7386 MergePatch(target, patch)"""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = _merge(result.get(key), value)
+    return result
+
+
+def apply_operations(
+    operations: Sequence[Operation],
+    units: Sequence[Path],
+    values: Dict[Path, Any],
+) -> Dict[Path, Any]:
+    """
+    Apply operations to the unit values read from the database.
+
+    Args:
+        operations: Parsed patch
+        units: Planned units
+        values: Current value per unit (_MISSING when absent)
+
+    Returns:
+        New value per changed unit (_MISSING when removed)
+
+    Raises:
+        PatchConflict: If a test fails or a path does not exist
+    """
+    holders = {unit: ({} if values[unit] is _MISSING else {"value": copy.deepcopy(values[unit])}) for unit in units}
+    changed = set()
+
+    for operation in operations:
+        pointer = _pointer(operation.path)
+        unit, path = _locate(units, operation.path)
+        holder = holders[unit]
+
+        if operation.op == "merge":
+            merged = _merge(holder.get("value"), operation.value)
+            holder.clear()
+            if merged is not None:
+                holder["value"] = merged
+        elif operation.op == "test":
+            if _get(holder, path, pointer) != operation.value:
+                raise PatchConflict(f"Test failed: {pointer}")
+            continue
+        elif operation.op == "remove":
+            _remove(holder, path, pointer)
+        elif operation.op == "add":
+            _add(holder, path, copy.deepcopy(operation.value), pointer)
+        elif operation.op == "replace":
+            _get(holder, path, pointer)
+            _remove(holder, path, pointer)
+            _add(holder, path, copy.deepcopy(operation.value), pointer)
+        else:
+            from_unit, from_path = _locate(units, operation.from_path)
+            from_pointer = _pointer(operation.from_path)
+            if operation.op == "move":
+                if operation.path[:len(operation.from_path)] == operation.from_path and operation.path != operation.from_path:
+                    raise PatchError(f"Cannot move {from_pointer} into itself")
+                value = _remove(holders[from_unit], from_path, from_pointer)
+                changed.add(from_unit)
+            else:
+                value = copy.deepcopy(_get(holders[from_unit], from_path, from_pointer))
+            _add(holder, path, value, pointer)
+        changed.add(unit)
+
+    return {unit: holders[unit].get("value", _MISSING) for unit in units if unit in changed}
+
+
+def _id_numbers(value: Any) -> List[Optional[str]]:
+    if isinstance(value, list):
+        return [item.get("idNumber") for item in value if isinstance(item, dict)]
+    if isinstance(value, dict):
+        return [value.get("idNumber")]
+    return []
+
+
+def check_witness_conflicts(
+    before: Dict[Path, Any],
+    after: Dict[Path, Any],
+    stored_id_numbers: Dict[str, List[Optional[str]]],
+) -> None:
+    """
+    Witness rule (WillContent.validate_will_content) over the patched lists.
+
+    Args:
+        before: Unit values as read
+        after: Validated values of changed units
+        stored_id_numbers: Stored idNumbers per party list not replaced whole
+
+    Raises:
+        PatchError: If a witness is also a beneficiary, executor or guardian
+    """
+    id_numbers = {field: Counter(stored_id_numbers.get(field, [])) for field in WITNESS_CONFLICT_FIELDS}
+    for unit, value in after.items():
+        if unit[0] not in id_numbers:
+            continue
+        if len(unit) == 1:
+            id_numbers[unit[0]] = Counter(_id_numbers(value))
+        else:
+            # One list element replaced in place
+            id_numbers[unit[0]].subtract(_id_numbers(before[unit]))
+            id_numbers[unit[0]].update(_id_numbers(value))
+
+    conflicting_ids = witness_conflicts(
+        list(id_numbers["witnesses"].elements()),
+        [i for field in WITNESS_CONFLICT_FIELDS[1:] for i in id_numbers[field].elements()],
+    )
+    if conflicting_ids:
+        raise PatchError(WITNESS_CONFLICT_ERROR.format(conflicting_ids))
+
+
+# ============================================
+# DATABASE
+# ============================================
+
+def _path_param(path: Path):
+    return bindparam(None, list(path), type_=ARRAY(Text))
+
+
+async def apply_will_patch(
+    db: AsyncSession,
+    email: str,
+    will_id: str,
+    operations: Sequence[Operation],
+    expected_versions: Optional[Sequence[WillVersion]] = None,
+) -> Optional[Row]:
+    """
+    Apply a parsed patch to one of a user's wills.
+
+    Args:
+        db: Database session
+        email: Owner's email
+        will_id: Will ID
+        operations: From parse_patch
+        expected_versions: Versions from If-Match; None to apply to
+            whatever version is current (retrying if a writer races us)
+
+    Returns:
+        Summary row of the updated will (SUMMARY_COLUMNS and digest), or
+        None if not found
+
+    Raises:
+        PatchError: If the patch is invalid or produces an invalid will
+        PatchConflict: If the patch does not apply to the stored will
+        WillVersionMismatch: If the stored version is not an expected one,
+            or concurrent writers won every attempt
+    """
+    units = _plan_units(operations)
+    touches_parties = any(unit[0] in WITNESS_CONFLICT_FIELDS for unit in units)
+    # ID numbers of the party lists not read whole, for the witness rule
+    party_lists = [field for field in WITNESS_CONFLICT_FIELDS if (field,) not in units] if touches_parties else []
+
+    read = select(
+        *SUMMARY_COLUMNS,
+        CONTENT_DIGEST,
+        *(cast(Will.content.op("#>")(_path_param(unit)), Text).label(f"unit_{i}") for i, unit in enumerate(units)),
+        *(
+            func.jsonb_path_query_array(Will.content, literal_column(f"'$.{field}[*].idNumber'"), type_=JSONB).label(field)
+            for field in party_lists
+        ),
+    ).where(Will.id == will_id, owned_by(email))
+
+    for attempt in range(PATCH_ATTEMPTS):
+        row = (await db.execute(read)).first()
+        if row is None:
+            return None
+        if expected_versions is not None and row_version(row) not in expected_versions:
+            raise WillVersionMismatch(will_id)
+
+        columns = row._mapping
+        before = {
+            unit: _MISSING if columns[f"unit_{i}"] is None else orjson.loads(columns[f"unit_{i}"])
+            for i, unit in enumerate(units)
+        }
+        for unit in units:
+            if len(unit) > 1 and before[unit] is _MISSING:
+                raise PatchConflict(f"Path not found: {_pointer(unit)}")
+
+        changed = apply_operations(operations, units, before)
+        after = {unit: _validate_unit(unit, value) for unit, value in changed.items()}
+        if touches_parties:
+            check_witness_conflicts(before, after, {field: columns[field] or [] for field in party_lists})
+
+        if not after:
+            # Only test operations
+            await db.rollback()
+            return row
+
+        content = func.coalesce(Will.content, cast(literal_column("'{}'"), JSONB))
+        for unit, value in after.items():
+            if changed[unit] is _MISSING:
+                # Removed, or merged with null: delete the member
+                content = content.op("#-", return_type=JSONB)(_path_param(unit))
+            else:
+                content = func.jsonb_set(content, _path_param(unit), bindparam(None, value, type_=JSONB), type_=JSONB)
+
+        # Strictly later than the version read, so the ETag always changes
+        updated_at = max(datetime.utcnow(), row.updatedAt + timedelta(milliseconds=1))
+        stmt = (
+            update(Will)
+            .where(Will.id == will_id, Will.updatedAt == row.updatedAt, CONTENT_DIGEST == row.digest)
+            .values(content=content, updatedAt=updated_at)
+            .returning(*SUMMARY_COLUMNS, CONTENT_DIGEST)
+        )
+        updated = (await db.execute(stmt)).first()
+        if updated is not None:
+            await db.commit()
+            logger.info("Patched will %s: %d part(s) rewritten", will_id, len(after))
+            return updated
+
+        await db.rollback()
+        if expected_versions is not None:
+            raise WillVersionMismatch(will_id)
+        logger.info("Will %s changed during patch, retrying (attempt %d)", will_id, attempt + 1)
+
+    raise WillVersionMismatch(will_id)
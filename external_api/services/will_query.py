@@ -0,0 +1,269 @@
+"""
+Will reads: content filters, keyset-paginated listing and versioned fetches
+
+Filters over Will.content are answered from the content indexes.
+
+Each filter matches an index from migration 20261019130000_will_content_indexes:
+
+- content_contains / has_minor_children / has_minor_beneficiaries / will_type:
+  @> containment, served by the GIN (jsonb_path_ops) index
+- testator_id_number: the (content -> 'testator' ->> 'idNumber') expression index
+- has_usufruct: the partial index on jsonb_path_exists(content, USUFRUCT_PATH)
+
+Expression and partial indexes only match when the query repeats the
+indexed expression with the same constants, so paths are rendered as SQL
+literals rather than bind parameters.
+"""
+
+import base64
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import orjson
+from sqlalchemy import ColumnElement, String, Text, and_, case, cast, func, literal_column, or_, select, tuple_, type_coerce
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.db_models import User, Will
+
+USUFRUCT_PATH = "$.assets[*].usufruct ? (@ != null)"
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Columns kept in the listing index (INCLUDE), so pages are index-only scans
+SUMMARY_COLUMNS = (
+    Will.id,
+    Will.title,
+    # Raw text: rows written by the web app use its own status values
+    type_coerce(Will.status, String).label("status"),
+    Will.createdAt,
+    Will.updatedAt,
+)
+
+# Digest of the representation's mutable columns. updatedAt alone does not
+# identify a version: it has millisecond precision, and Prisma writes do not
+# move it past the previous value, so two writes can share one.
+CONTENT_DIGEST = func.md5(
+    cast(func.jsonb_build_array(Will.title, Will.status, Will.content, Will.editorContent), Text)
+).label("digest")
+
+# Large JSON columns, only read when the caller asks for them
+CONTENT_COLUMNS = {
+    "content": Will.content,
+    "editorContent": Will.editorContent,
+}
+
+# content -> 'testator' ->> 'idNumber'
+TESTATOR_ID_NUMBER = (
+    Will.content.op("->")(literal_column("'testator'"))
+    .op("->>", return_type=Text)(literal_column("'idNumber'"))
+)
+
+
+def content_contains(fragment: Dict[str, Any]) -> ColumnElement[bool]:
+    """content @> fragment (arrays match if they contain the given elements)"""
+    return Will.content.contains(fragment)
+
+
+def will_type(value: str) -> ColumnElement[bool]:
+    """Wills of the given willType"""
+    return content_contains({"willType": value})
+
+
+def has_minor_children() -> ColumnElement[bool]:
+    """Wills listing at least one child under 18"""
+    return content_contains({"children": [{"isMinor": True}]})
+
+
+def has_minor_beneficiaries() -> ColumnElement[bool]:
+    """Wills with at least one beneficiary marked as a minor"""
+    return content_contains({"beneficiaries": [{"isMinor": True}]})
+
+
+def has_usufruct() -> ColumnElement[bool]:
+    """Wills with at least one asset carrying a usufruct"""
+    return func.jsonb_path_exists(Will.content, literal_column(f"'{USUFRUCT_PATH}'"))
+
+
+def testator_id_number(id_number: str) -> ColumnElement[bool]:
+    """Wills whose testator has the given ID number"""
+    return TESTATOR_ID_NUMBER == id_number
+
+
+async def find_wills(
+    db: AsyncSession,
+    *filters: ColumnElement[bool],
+    user_id: Optional[str] = None,
+    limit: int = 50,
+) -> List[Row]:
+    """
+    Will summaries (without content) matching all filters, newest first.
+
+    Args:
+        db: Database session
+        *filters: Conditions from this module (or any Will column expression)
+        user_id: Restrict to one user's wills
+        limit: Maximum rows returned
+
+    Returns:
+        Rows with id, userId, title, status, createdAt, updatedAt
+
+    Usage:
+        await find_wills(db, has_usufruct(), has_minor_children(), user_id=user.id)
+    """
+    stmt = select(Will.userId, *SUMMARY_COLUMNS).where(*filters)
+    if user_id is not None:
+        stmt = stmt.where(Will.userId == user_id)
+    stmt = stmt.order_by(Will.updatedAt.desc(), Will.id.desc()).limit(limit)
+    return (await db.execute(stmt)).all()
+
+
+def owned_by(email: str) -> ColumnElement[bool]:
+    """Will belongs to the user with this email (resolved in the same query)"""
+    return Will.userId == select(User.id).where(User.email == email).scalar_subquery()
+
+
+def encode_cursor(updated_at: datetime, will_id: str) -> str:
+    """Opaque cursor for the row after which the next page starts"""
+    raw = orjson.dumps([updated_at.isoformat(), will_id])
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Inverse of encode_cursor.
+
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, will_id = orjson.loads(raw)
+        return datetime.fromisoformat(updated_at), str(will_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+async def list_user_wills(
+    db: AsyncSession,
+    email: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    include: Iterable[str] = (),
+) -> Tuple[List[Row], Optional[str]]:
+    """
+    One page of a user's wills, most recently updated first.
+
+    Keyset pagination on (userId, updatedAt, id): each page seeks straight
+    to the cursor in Will_userId_updatedAt_id_idx instead of skipping
+    OFFSET rows, so deep pages cost the same as the first.
+
+    Args:
+        db: Database session
+        email: Owner's email
+        limit: Page size
+        cursor: next_cursor from the previous page
+        include: Names from CONTENT_COLUMNS to add to each row
+
+    Returns:
+        Tuple of (rows, next_cursor); next_cursor is None on the last page
+
+    Raises:
+        ValueError: If cursor is invalid
+    """
+    stmt = select(*SUMMARY_COLUMNS, *(CONTENT_COLUMNS[name] for name in include)).where(owned_by(email))
+    if cursor:
+        updated_at, will_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Will.updatedAt, Will.id) < tuple_(updated_at, will_id))
+    stmt = stmt.order_by(Will.updatedAt.desc(), Will.id.desc()).limit(limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].updatedAt, rows[-1].id)
+
+
+class WillVersion(NamedTuple):
+    """A stored version of a will, as named by its ETag"""
+    updated_at: datetime
+    digest: str
+
+
+def row_version(row: Row) -> WillVersion:
+    """Version of a row selected with updatedAt and CONTENT_DIGEST"""
+    return WillVersion(row.updatedAt, row.digest)
+
+
+def version_in(versions: Sequence[WillVersion]) -> ColumnElement[bool]:
+    """SQL condition: the stored will is one of versions"""
+    return or_(*(and_(Will.updatedAt == v.updated_at, CONTENT_DIGEST == v.digest) for v in versions))
+
+
+async def get_user_will(
+    db: AsyncSession,
+    email: str,
+    will_id: str,
+    known_versions: Sequence[WillVersion] = (),
+    with_content: bool = True,
+) -> Optional[Row]:
+    """
+    Fetch one of a user's wills.
+
+    When the stored version is one of known_versions (the client's
+    If-None-Match), content and editorContent come back as NULL, so a
+    revalidation only transfers the row's summary columns.
+
+    Args:
+        db: Database session
+        email: Owner's email
+        will_id: Will ID
+        known_versions: Versions the client already holds
+        with_content: False to skip the content columns entirely
+
+    Returns:
+        Row with summary columns, digest and (if requested) content
+        columns, or None if not found
+    """
+    content_columns = []
+    if with_content:
+        unchanged = version_in(known_versions) if known_versions else None
+        content_columns = [
+            case((unchanged, None), else_=column).label(name) if unchanged is not None else column
+            for name, column in CONTENT_COLUMNS.items()
+        ]
+    stmt = select(*SUMMARY_COLUMNS, CONTENT_DIGEST, *content_columns).where(Will.id == will_id, owned_by(email))
+    return (await db.execute(stmt)).first()
+
+
+def will_etag(version: WillVersion) -> str:
+    """
+    Strong ETag for a will version: updatedAt plus a digest of the
+    title, status and content columns.
+    """
+    return f'"{(version.updated_at - _EPOCH) // _MICROSECOND:x}-{version.digest}"'
+
+
+def parse_etags(header: Optional[str], weak: bool = True) -> List[WillVersion]:
+    """
+    Versions named in an If-None-Match or If-Match header.
+
+    Unknown tags are ignored. With weak=False (If-Match, which uses the
+    strong comparison) weak tags never match, so they are dropped too.
+    """
+    versions: List[WillVersion] = []
+    for tag in (header or "").split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            if not weak:
+                continue
+            tag = tag[2:]
+        timestamp, _, digest = tag.strip('"').partition("-")
+        if len(digest) != 32:
+            continue
+        try:
+            versions.append(WillVersion(_EPOCH + int(timestamp, 16) * _MICROSECOND, digest))
+        except (ValueError, OverflowError):
+            continue
+    return versions
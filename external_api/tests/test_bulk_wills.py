@@ -0,0 +1,123 @@
+"""
+Test bulk will submission (JSON array and NDJSON)
+"""
+
+import asyncio
+import copy
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from services.user_service import UserIdentity
+from tests.test_manual_search import auth_headers
+from tests.test_models import sample_will_content
+
+client = TestClient(app)
+
+
+def install_fake_backend(monkeypatch):
+    """Replace user resolution and inserts with in-memory fakes"""
+    calls = {"resolve": 0, "inserted": []}
+
+    async def get_or_create_user(email):
+        calls["resolve"] += 1
+        return UserIdentity(id="user-1", clerkId="clerk-1", email=email), None
+
+    async def create_wills_for_user_bulk(db, user, will_contents, batch_size=500):
+        calls["inserted"].extend(will_contents)
+        return [(f"will-{i}", None) for i in range(len(will_contents))]
+
+    monkeypatch.setattr(main, "get_or_create_user", get_or_create_user)
+    monkeypatch.setattr(main, "create_wills_for_user_bulk", create_wills_for_user_bulk)
+    return calls
+
+
+def invalid_will():
+    """Sample will missing its testator"""
+    will = copy.deepcopy(sample_will_content)
+    del will["testator"]
+    return will
+
+
+def test_bulk_json_array_reports_per_item_results(monkeypatch):
+    """Test valid items are inserted and invalid ones reported in place"""
+    calls = install_fake_backend(monkeypatch)
+
+    response = client.post(
+        "/api/v1/create-will/bulk",
+        json=[sample_will_content, invalid_will(), sample_will_content],
+        headers=auth_headers(),
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["total"], data["created"], data["failed"]) == (3, 2, 1)
+    assert [r["success"] for r in data["results"]] == [True, False, True]
+    assert data["results"][1]["error"].startswith("testator")
+    assert data["results"][2]["will_id"] == "will-1"
+    assert calls["resolve"] == 1
+    assert len(calls["inserted"]) == 2
+
+
+def test_bulk_ndjson(monkeypatch):
+    """Test NDJSON bodies are read line by line, bad lines reported per item"""
+    install_fake_backend(monkeypatch)
+    body = "\n".join([json.dumps(sample_will_content), "{not json", json.dumps(sample_will_content)]) + "\n"
+
+    response = client.post(
+        "/api/v1/create-will/bulk",
+        content=body,
+        headers={**auth_headers(), "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["success"] for r in results] == [True, False, True]
+    assert results[1]["error"].startswith("Invalid JSON")
+
+
+def test_bulk_rejects_non_array(monkeypatch):
+    """Test a JSON object body is rejected"""
+    install_fake_backend(monkeypatch)
+
+    response = client.post("/api/v1/create-will/bulk", json=sample_will_content, headers=auth_headers())
+
+    assert response.status_code == 400
+
+    response = client.post(
+        "/api/v1/create-will/bulk",
+        content=b'[{"testator": ',
+        headers={**auth_headers(), "Content-Type": "application/json"},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid JSON")
+
+
+def test_bulk_validation_failure_cancels_user_resolution(monkeypatch):
+    """Test the concurrent user resolution is cancelled when validation raises"""
+    resolutions = []
+
+    async def read_documents(request, max_items):
+        return [sample_will_content]
+
+    async def get_or_create_user(email):
+        resolutions.append(asyncio.current_task())
+        await asyncio.sleep(10)
+
+    async def validate_documents(model, documents):
+        await asyncio.sleep(0)
+        raise RuntimeError("validation pool unavailable")
+
+    monkeypatch.setattr(main, "read_documents", read_documents)
+    monkeypatch.setattr(main, "get_or_create_user", get_or_create_user)
+    monkeypatch.setattr(main, "validate_documents", validate_documents)
+
+    async def submit():
+        with pytest.raises(RuntimeError):
+            await main.create_wills_bulk(None, "bulk@example.co.za", None)
+        await asyncio.sleep(0)
+        return resolutions[0].cancelled()
+
+    assert asyncio.run(submit())
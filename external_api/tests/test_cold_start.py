@@ -0,0 +1,63 @@
+"""
+Test that importing the app defers engines and heavy client libraries
+"""
+
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK = """
+import sys
+import main
+import utils.database as database
+deferred = [name for name in ("jose", "httpx", "asyncpg", "openai") if name in sys.modules]
+built = [name for name in ("_engine", "_async_engine") if getattr(database, name) is not None]
+print(deferred, built)
+"""
+
+
+def test_import_main_defers_engines_and_clients():
+    """Test import main builds no engine and loads no JWT, HTTP or driver library"""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "postgresql://u:p@localhost/db")
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK], cwd=APP_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == "[] []"
+
+
+def test_lazy_engine_attributes_resolve():
+    """Test the module-level engine names still work for existing imports"""
+    import utils.database as database
+
+    assert database.engine is database.get_engine()
+    assert database.SessionLocal is database.get_sessionmaker()
+    assert database.async_engine is database.get_async_engine()
+
+
+def test_clerk_client_built_once_across_threads(monkeypatch):
+    """Test the warm-up thread and concurrent callers share one Clerk client"""
+    import threading
+    import time
+    from services.clerk_service import ClerkService
+
+    service = ClerkService()
+    built = []
+
+    def build_client():
+        time.sleep(0.05)
+        built.append(object())
+        return built[-1]
+
+    monkeypatch.setattr(service, "_build_client", build_client)
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(service.client)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+    assert all(client is built[0] for client in seen)
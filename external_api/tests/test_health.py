@@ -0,0 +1,78 @@
+"""
+Test liveness/readiness probes and background health sampling
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from utils.health import HealthMonitor
+
+client = TestClient(app)
+
+
+class FakeConnection:
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def __aenter__(self):
+        if self.engine.fail:
+            raise ConnectionError("connection refused")
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.engine.queries += 1
+
+
+class FakeEngine:
+    """Engine whose health query succeeds unless fail is set"""
+
+    def __init__(self):
+        self.fail = False
+        self.queries = 0
+        self.pool = SimpleNamespace(
+            size=lambda: 5, checkedin=lambda: 3, checkedout=lambda: 2, overflow=lambda: -3,
+        )
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+def test_livez_does_no_io():
+    """Test the liveness probe answers without the database"""
+    response = client.get("/livez")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+def test_readyz_serves_cached_state(monkeypatch):
+    """Test readiness follows background checks and probes issue no queries"""
+    engine = FakeEngine()
+    monitor = HealthMonitor(engine)
+    monkeypatch.setattr(main, "health_monitor", monitor)
+
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["db"]["status"] == "unknown"
+
+    asyncio.run(monitor.check())
+    for _ in range(5):
+        response = client.get("/readyz")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["ready"] is True
+    assert data["pool"] == {"size": 5, "checked_in": 3, "checked_out": 2, "overflow": -3}
+    assert data["db"]["latency_ms"] is not None
+    assert engine.queries == 1
+
+    engine.fail = True
+    asyncio.run(monitor.check())
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert "connection refused" in response.json()["db"]["error"]
@@ -0,0 +1,218 @@
+"""
+Test Idempotency-Key handling for create-will
+"""
+
+import asyncio
+import copy
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import app
+from models.models import WillContentResponse
+from services import idempotency_service as idempotency_module
+from services.idempotency_service import (
+    IdempotencyClaimLost,
+    IdempotencyService,
+    StoredResponse,
+    idempotency_service,
+)
+from tests.test_manual_search import auth_headers
+from tests.test_models import sample_will_content
+from tests.test_user_service import FakeResult, FakeSession
+
+client = TestClient(app)
+
+
+def install_memory_store(monkeypatch, service):
+    """Back the service with a dict instead of the IdempotencyKey table"""
+    rows = {}
+
+    async def lookup(db, scope, key):
+        row = rows.get((scope, key))
+        return row if isinstance(row, StoredResponse) else None
+
+    async def claim(db, scope, key, request_hash):
+        if (scope, key) in rows:
+            return None
+        claimed_at = datetime.utcnow()
+        rows[(scope, key)] = claimed_at
+        return claimed_at
+
+    async def record(db, scope, key, claimed_at, stored):
+        if rows.get((scope, key)) != claimed_at:
+            raise IdempotencyClaimLost(key)
+        rows[(scope, key)] = stored
+
+    async def release(scope, key, claimed_at):
+        if rows.get((scope, key)) == claimed_at:
+            del rows[(scope, key)]
+
+    monkeypatch.setattr(idempotency_module, "get_async_sessionmaker", lambda: FakeSession)
+    monkeypatch.setattr(service, "_lookup", lookup)
+    monkeypatch.setattr(service, "_claim", claim)
+    monkeypatch.setattr(service, "_record", record)
+    monkeypatch.setattr(service, "_release", release)
+    return rows
+
+
+def install_fake_processing(monkeypatch):
+    """Count will creations instead of touching Clerk and the database"""
+    created = []
+
+    async def process_will(will_content, user_email, db, on_created=None):
+        created.append(will_content)
+        response = WillContentResponse(
+            success=True,
+            will_id=f"will-{len(created)}",
+            message="Will content received and validated successfully",
+            timestamp=datetime.utcnow(),
+        )
+        if on_created is not None:
+            await on_created(response)
+        return response
+
+    monkeypatch.setattr(main, "_process_will", process_will)
+    return created
+
+
+def test_retry_replays_original_response(monkeypatch):
+    """Test a retried request returns the first response without new work"""
+    install_memory_store(monkeypatch, idempotency_service)
+    created = install_fake_processing(monkeypatch)
+    headers = {**auth_headers(), "Idempotency-Key": "retry-1"}
+
+    first = client.post("/api/v1/create-will", json=sample_will_content, headers=headers)
+    second = client.post("/api/v1/create-will", json=sample_will_content, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert first.headers["Idempotent-Replayed"] == "false"
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.json()["will_id"] == first.json()["will_id"]
+    assert len(created) == 1
+
+
+def test_key_reused_with_different_body(monkeypatch):
+    """Test reusing a key for a different will is rejected"""
+    install_memory_store(monkeypatch, idempotency_service)
+    install_fake_processing(monkeypatch)
+    headers = {**auth_headers(), "Idempotency-Key": "reuse-1"}
+    other = copy.deepcopy(sample_will_content)
+    other["placeExecuted"] = "Stellenbosch"
+
+    client.post("/api/v1/create-will", json=sample_will_content, headers=headers)
+    response = client.post("/api/v1/create-will", json=other, headers=headers)
+
+    assert response.status_code == 422
+
+
+def test_concurrent_duplicates_run_once(monkeypatch):
+    """Test concurrent requests with one key share the first execution"""
+    service = IdempotencyService()
+    install_memory_store(monkeypatch, service)
+    calls = []
+
+    async def handler(db, record):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 201, {"will_id": "will-1"}
+
+    async def run_many():
+        return await asyncio.gather(
+            *(service.run(None, "partner@example.co.za", "k", "hash", handler) for _ in range(5))
+        )
+
+    results = asyncio.run(run_many())
+    assert len(calls) == 1
+    assert [replayed for _, replayed in results].count(False) == 1
+    assert all(stored.body == {"will_id": "will-1"} for stored, _ in results)
+
+
+def test_purge_runs_periodically_and_survives_failures(monkeypatch):
+    """Test expired keys are purged on every interval, even after a failed purge"""
+    service = IdempotencyService()
+    purges = []
+
+    async def purge_expired(db):
+        purges.append(db)
+        if len(purges) == 1:
+            raise RuntimeError("connection refused")
+        return 3
+
+    monkeypatch.setattr(service, "purge_expired", purge_expired)
+    monkeypatch.setattr(idempotency_module, "get_async_sessionmaker", lambda: FakeSession)
+
+    async def run_for_a_while():
+        task = asyncio.create_task(service.purge_periodically(0.01))
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(run_for_a_while())
+    assert len(purges) >= 3
+
+
+def test_shared_call_uses_its_own_session(monkeypatch):
+    """Test the handler runs on a session owned by the call, not the request's"""
+    service = IdempotencyService()
+    install_memory_store(monkeypatch, service)
+    request_db = FakeSession()
+    seen = []
+
+    async def handler(db, record):
+        seen.append(db)
+        await record(201, {"will_id": "will-1"})
+        return 201, {"will_id": "will-1"}
+
+    asyncio.run(service.run(request_db, "partner@example.co.za", "own-session", "hash", handler))
+    assert seen[0] is not request_db
+    assert seen[0].closed
+
+
+def test_recorded_response_is_stored_and_returned(monkeypatch):
+    """Test the response recorded in the handler's transaction is the one kept"""
+    service = IdempotencyService()
+    rows = install_memory_store(monkeypatch, service)
+
+    async def handler(db, record):
+        await record(201, {"will_id": "will-1"})
+        return 201, {"will_id": "will-1", "late": True}
+
+    stored, _ = asyncio.run(service.run(None, "partner@example.co.za", "recorded", "hash", handler))
+    assert stored.body == {"will_id": "will-1"}
+    assert rows[("partner@example.co.za", "recorded")] == stored
+
+
+def test_cancelled_handler_releases_key(monkeypatch):
+    """Test a cancelled request frees the key for a retry"""
+    service = IdempotencyService()
+    rows = install_memory_store(monkeypatch, service)
+
+    async def handler(db, record):
+        raise asyncio.CancelledError()
+
+    async def run_cancelled():
+        try:
+            await service.run(None, "partner@example.co.za", "cancelled", "hash", handler)
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run_cancelled())
+    assert ("partner@example.co.za", "cancelled") not in rows
+
+
+def test_record_fails_after_takeover():
+    """Test a request whose claim was taken over cannot complete the key"""
+    service = IdempotencyService()
+    db = FakeSession(FakeResult())
+    db.results[0].rowcount = 0
+    stored = StoredResponse(request_hash="hash", status_code=201, body={"will_id": "will-1"})
+
+    async def record():
+        await service._record(db, "partner@example.co.za", "k", datetime.utcnow(), stored)
+
+    with pytest.raises(IdempotencyClaimLost):
+        asyncio.run(record())
+    sql = str(db.statements[0])
+    assert '"IdempotencyKey"."createdAt" = ' in sql
@@ -0,0 +1,123 @@
+"""
+Test the background job worker (claiming, retries and draining)
+"""
+
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from services import job_queue
+from services.job_queue import CLAIM_SQL, EXPIRE_SQL, JobWorker, job_handler, retry_delay_seconds
+from utils.config import settings
+
+
+def make_job(job_id, kind, attempts=1, max_attempts=3):
+    """Row shaped like the CLAIM_SQL result"""
+    return {"id": job_id, "kind": kind, "payload": {"n": job_id}, "attempts": attempts, "maxAttempts": max_attempts}
+
+
+def run_worker(monkeypatch, jobs):
+    """Run a worker over a fixed batch of claimed jobs and return finish calls"""
+    finished = {}
+    worker = JobWorker(session_factory=None, concurrency=4, poll_interval=0.01)
+    batches = [jobs]
+
+    async def claim(limit):
+        return batches.pop() if batches else []
+
+    async def finish(job_id, **values):
+        finished[job_id] = values
+        if len(finished) == len(jobs):
+            worker.stop()
+
+    monkeypatch.setattr(worker, "_claim", claim)
+    monkeypatch.setattr(worker, "_finish", finish)
+    asyncio.run(asyncio.wait_for(worker.run(), timeout=5))
+    return finished
+
+
+def test_retry_backoff_is_exponential_and_capped():
+    """Test retry delays double per attempt up to the maximum"""
+    assert retry_delay_seconds(1) == settings.JOB_RETRY_BASE_SECONDS
+    assert retry_delay_seconds(2) == settings.JOB_RETRY_BASE_SECONDS * 2
+    assert retry_delay_seconds(50) == settings.JOB_RETRY_MAX_SECONDS
+
+
+def test_worker_runs_handlers_and_schedules_retries(monkeypatch):
+    """Test success, retry and permanent failure outcomes"""
+    seen = []
+
+    @job_handler("test.ok")
+    async def ok(payload):
+        seen.append(payload["n"])
+
+    @job_handler("test.fail")
+    async def fail(payload):
+        raise RuntimeError("boom")
+
+    try:
+        finished = run_worker(monkeypatch, [
+            make_job(1, "test.ok"),
+            make_job(2, "test.fail", attempts=1),
+            make_job(3, "test.fail", attempts=3),
+            make_job(4, "test.unknown", attempts=3),
+        ])
+    finally:
+        for kind in ("test.ok", "test.fail"):
+            job_queue._handlers.pop(kind, None)
+
+    assert seen == [1]
+    assert finished[1]["status"] == "done"
+    assert finished[2]["status"] == "pending"
+    assert "boom" in finished[2]["lastError"]
+    assert finished[3]["status"] == "failed"
+    assert finished[4]["status"] == "failed"
+
+
+class RecordingSession:
+    """Async session recording statements; returns no rows"""
+
+    def __init__(self, statements, rowcount=0):
+        self.statements = statements
+        self.rowcount = rowcount
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        return self
+
+    def all(self):
+        return []
+
+    def mappings(self):
+        return self
+
+    async def commit(self):
+        pass
+
+
+def test_claim_fails_abandoned_jobs_out_of_attempts():
+    """Test abandoned jobs with no attempts left are failed, not reclaimed"""
+    statements = []
+    worker = JobWorker(session_factory=lambda: RecordingSession(statements))
+
+    assert asyncio.run(worker._claim(4)) == []
+    assert statements == [EXPIRE_SQL, CLAIM_SQL]
+    assert 'attempts >= "maxAttempts"' in EXPIRE_SQL.text
+    assert 'attempts < "maxAttempts"' in CLAIM_SQL.text
+
+
+def test_purge_deletes_finished_jobs_past_retention():
+    """Test the retention purge only targets done and failed jobs"""
+    statements = []
+    worker = JobWorker(session_factory=lambda: RecordingSession(statements, rowcount=2))
+
+    asyncio.run(worker._purge())
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith('DELETE FROM "Job"')
+    assert '"Job".status IN' in sql and '"Job"."updatedAt" <' in sql
@@ -0,0 +1,138 @@
+"""
+Test queued JSON logging, request IDs and sampled debug records
+"""
+
+import logging
+import queue
+
+import orjson
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.log import (
+    ContextQueueHandler,
+    JSONFormatter,
+    RequestContextMiddleware,
+    SampledDebugLogger,
+    debug_sampled_var,
+    request_id_var,
+    sample_debug_logging,
+)
+
+
+def make_record(level=logging.INFO, msg="Will created: %s", args=("will-1",), **extra):
+    record = logging.LogRecord("services.user_service", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_request_id_and_extras():
+    """Test records render as one JSON object with the message merged and extras kept"""
+    line = JSONFormatter().format(make_record(request_id="req-1", will_id="will-1"))
+    entry = orjson.loads(line)
+    assert entry["message"] == "Will created: will-1"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "services.user_service"
+    assert entry["request_id"] == "req-1"
+    assert entry["will_id"] == "will-1"
+    assert entry["ts"].endswith("+00:00")
+
+
+def test_queue_handler_tags_request_and_never_blocks():
+    """Test records carry the current request ID and a full queue drops instead of blocking"""
+    handler = ContextQueueHandler(queue.Queue(maxsize=1))
+    token = request_id_var.set("req-42")
+    try:
+        handler.handle(make_record())
+        handler.handle(make_record())
+    finally:
+        request_id_var.reset(token)
+
+    queued = handler.queue.get_nowait()
+    assert queued.request_id == "req-42"
+    assert queued.getMessage() == "Will created: will-1"
+    assert handler.dropped == 1
+
+
+def capture(logger: logging.Logger) -> list:
+    """Records built by logger (counted before any handler or filter)"""
+    built = []
+    make_record = logger.makeRecord
+
+    def counting_make_record(*args, **kwargs):
+        built.append(make_record(*args, **kwargs))
+        return built[-1]
+
+    logger.makeRecord = counting_make_record
+    logger.handlers = [logging.NullHandler()]
+    logger.propagate = False
+    return built
+
+
+def test_debug_records_only_built_in_sampled_requests():
+    """Test unsampled DEBUG calls build no record; sampled ones and INFO do"""
+    logger = SampledDebugLogger("test.sampled")
+    logger.threshold = logging.INFO
+    logger.setLevel(logging.DEBUG)
+    built = capture(logger)
+
+    logger.debug("Processing will for user email: %s", "a@example.co.za")
+    logger.info("Will created: %s", "will-1")
+    token = debug_sampled_var.set(True)
+    try:
+        logger.debug("User processed successfully: %s", "user-1")
+    finally:
+        debug_sampled_var.reset(token)
+
+    assert [record.levelno for record in built] == [logging.INFO, logging.DEBUG]
+
+
+def test_debug_sampling_keeps_configured_level():
+    """Test lowering the app loggers to DEBUG does not let INFO through at WARNING"""
+    logger = SampledDebugLogger("test.warning")
+    logger.threshold = logging.WARNING
+    logger.setLevel(logging.DEBUG)
+    assert logger.isEnabledFor(logging.WARNING)
+    assert not logger.isEnabledFor(logging.INFO)
+
+
+def test_sample_debug_logging_converts_existing_loggers():
+    """Test module loggers created before configuration are sampled too"""
+    logger_class = logging.getLoggerClass()
+    threshold = SampledDebugLogger.threshold
+    try:
+        logging.setLoggerClass(logging.Logger)
+        child = logging.getLogger("sampletest.services.user_service")
+        other = logging.getLogger("sampletestother")
+        sample_debug_logging(["sampletest"], logging.INFO)
+        assert isinstance(child, SampledDebugLogger)
+        assert type(other) is logging.Logger
+        assert not child.isEnabledFor(logging.DEBUG)
+        token = debug_sampled_var.set(True)
+        try:
+            assert child.isEnabledFor(logging.DEBUG)
+        finally:
+            debug_sampled_var.reset(token)
+    finally:
+        logging.setLoggerClass(logger_class)
+        SampledDebugLogger.threshold = threshold
+
+
+def test_request_context_middleware_sets_and_echoes_request_id():
+    """Test handlers see the request ID and it is returned in X-Request-ID"""
+    app = FastAPI()
+
+    @app.get("/context")
+    async def context():
+        return {"request_id": request_id_var.get()}
+
+    app.add_middleware(RequestContextMiddleware)
+    client = TestClient(app)
+
+    response = client.get("/context", headers={"X-Request-ID": "lb-123"})
+    assert response.json() == {"request_id": "lb-123"}
+    assert response.headers["X-Request-ID"] == "lb-123"
+
+    generated = client.get("/context")
+    assert generated.headers["X-Request-ID"] == generated.json()["request_id"]
+    assert request_id_var.get() is None
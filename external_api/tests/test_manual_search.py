@@ -0,0 +1,252 @@
+"""
+Test manual search endpoints (single, batch and streamed)
+"""
+
+import json
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from main import app
+from services.manual_search_service import manual_search_service
+from utils.config import settings
+
+client = TestClient(app)
+
+
+def auth_headers(email: str = "partner@example.co.za"):
+    """Build a Bearer header with a valid token"""
+    token = jwt.encode(
+        {"app:UserEmailKey": email, "exp": datetime.utcnow() + timedelta(minutes=5)},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def fake_rows(query: str, top_k: int):
+    """Deterministic passages for a query"""
+    return [
+        {
+            "id": f"meyerowitz-ch5-5.21-{i}",
+            "chapter_number": 5,
+            "chapter_title": "The Drafting of Wills",
+            "section_number": "5.21",
+            "section_title": "Fideicommissum or usufruct",
+            "page_start": None,
+            "page_end": None,
+            "text": f"{query} passage {i}",
+            "similarity": 1.0 - i / 10,
+        }
+        for i in range(1, top_k + 1)
+    ]
+
+
+def install_fake_search(monkeypatch):
+    """Replace the retrieval backend with an in-memory fake"""
+
+    async def stream_many(queries, top_k=5, sections=None):
+        for i in reversed(range(len(queries))):
+            yield i, fake_rows(queries[i], top_k)
+
+    monkeypatch.setattr(manual_search_service, "stream_many", stream_many)
+
+
+def test_manual_search_requires_auth():
+    """Test that manual search rejects anonymous callers"""
+    response = client.post("/api/v1/manual/search", json={"query": "usufruct"})
+    assert response.status_code in (401, 403)
+
+
+def test_manual_search_single(monkeypatch):
+    """Test single query search returns ranked passages"""
+    install_fake_search(monkeypatch)
+
+    response = client.post(
+        "/api/v1/manual/search",
+        json={"query": "usufruct", "top_k": 3},
+        headers=auth_headers(),
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["query"] == "usufruct"
+    assert [r["id"] for r in data["results"]] == [
+        "meyerowitz-ch5-5.21-1",
+        "meyerowitz-ch5-5.21-2",
+        "meyerowitz-ch5-5.21-3",
+    ]
+
+
+def test_manual_search_batch_preserves_order(monkeypatch):
+    """Test batch results are returned in request order"""
+    install_fake_search(monkeypatch)
+
+    response = client.post(
+        "/api/v1/manual/search/batch",
+        json={"queries": ["usufruct", "massing"], "top_k": 2},
+        headers=auth_headers(),
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["query"] for r in data["results"]] == ["usufruct", "massing"]
+    assert len(data["results"][1]["results"]) == 2
+
+
+def test_manual_search_stream_ndjson(monkeypatch):
+    """Test NDJSON streaming emits one passage per line"""
+    install_fake_search(monkeypatch)
+
+    response = client.post(
+        "/api/v1/manual/search/batch?stream=ndjson",
+        json={"queries": ["usufruct", "massing"], "top_k": 2},
+        headers=auth_headers(),
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    assert len(lines) == 4
+    assert lines[0]["query_index"] == 1
+    assert lines[0]["rank"] == 1
+    assert lines[0]["passage"]["text"] == "massing passage 1"
+
+
+def test_manual_search_stream_sse(monkeypatch):
+    """Test SSE streaming emits passage events and a done event"""
+    install_fake_search(monkeypatch)
+
+    response = client.post(
+        "/api/v1/manual/search?stream=sse",
+        json={"query": "usufruct", "top_k": 2},
+        headers=auth_headers(),
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block for block in response.text.split("\n\n") if block]
+    assert events[0].startswith("event: passage\ndata: ")
+    assert events[-1] == "event: done\ndata: {}"
+    assert len(events) == 3
+
+
+def context_row(section, index, hit, similarity, section_similarity, chars=400, source="meyerowitz"):
+    """Row shaped like the CONTEXT_SQL result"""
+    return {
+        "id": f"{source}-ch5-{section}-{index}",
+        "source": source,
+        "chapter_number": 5,
+        "chapter_title": "The Drafting of Wills",
+        "section_number": section,
+        "section_title": f"Section {section}",
+        "chunk_index": index,
+        "page_start": None,
+        "page_end": None,
+        "text": "x" * chars,
+        "similarity": similarity,
+        "is_hit": hit,
+        "distance": 0 if hit else 1,
+        "section_similarity": section_similarity,
+    }
+
+
+def test_pack_context_prefers_hits_over_neighbours():
+    """Test packing admits every hit before any neighbour"""
+    from services.manual_context import pack_context
+
+    rows = [
+        context_row("5.21", 1, False, 0.9, 0.9),
+        context_row("5.21", 2, True, 0.9, 0.9),
+        context_row("5.21", 3, False, 0.9, 0.9),
+        context_row("5.7", 1, True, 0.8, 0.8),
+    ]
+
+    sections, used = pack_context(rows, token_budget=260)
+    assert [(s["section_number"], [c["chunk_index"] for c in s["chunks"]]) for s in sections] == [
+        ("5.21", [2]),
+        ("5.7", [1]),
+    ]
+    assert used <= 260
+
+    sections, _ = pack_context(rows, token_budget=1000)
+    assert [c["chunk_index"] for c in sections[0]["chunks"]] == [1, 2, 3]
+
+
+def test_pack_context_keys_sections_by_source():
+    """Test equal section numbers from two sources stay separate and unindexed hits are kept"""
+    from services.manual_context import pack_context
+
+    unindexed = context_row("5.21", None, True, 0.7, 0.7, 40, source="corbett")
+    rows = [
+        context_row("5.21", 1, True, 0.9, 0.9, 40),
+        context_row("5.21", 2, False, 0.9, 0.9, 40),
+        unindexed,
+    ]
+
+    sections, _ = pack_context(rows, token_budget=1000)
+    assert [(s["source"], [c["chunk_index"] for c in s["chunks"]]) for s in sections] == [
+        ("meyerowitz", [1, 2]),
+        ("corbett", [None]),
+    ]
+
+
+def test_manual_context_endpoint(monkeypatch):
+    """Test context endpoint renders one header per section"""
+    from services.manual_context import pack_context
+
+    async def search_context(query, top_k=5, neighbors=1, token_budget=2000):
+        rows = [context_row("5.21", 1, False, 0.9, 0.9, 40), context_row("5.21", 2, True, 0.9, 0.9, 40)]
+        return pack_context(rows, token_budget)
+
+    monkeypatch.setattr(manual_search_service, "search_context", search_context)
+
+    response = client.post(
+        "/api/v1/manual/context",
+        json={"query": "usufruct", "neighbors": 1, "token_budget": 500},
+        headers=auth_headers(),
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["tokens_used"] <= 500
+    assert len(data["sections"]) == 1
+    assert data["context"].startswith("5.21 Section 5.21\n")
+    assert data["context"].count("5.21 Section 5.21") == 1
+
+
+def test_manual_search_passes_section_routing(monkeypatch):
+    """Test the sections option reaches the retrieval backend"""
+    seen = {}
+
+    async def stream_many(queries, top_k=5, sections=None):
+        seen["sections"] = sections
+        for i, q in enumerate(queries):
+            yield i, fake_rows(q, top_k)
+
+    monkeypatch.setattr(manual_search_service, "stream_many", stream_many)
+
+    response = client.post(
+        "/api/v1/manual/search",
+        json={"query": "usufruct", "top_k": 2, "sections": 3},
+        headers=auth_headers(),
+    )
+
+    assert response.status_code == 200
+    assert seen["sections"] == 3
+
+
+def test_ann_settings_file_overrides_env_settings(monkeypatch, tmp_path):
+    """Test tune_ann.py's file wins per parameter and the settings fill the rest"""
+    from services import manual_search_service as module
+
+    path = tmp_path / "ann_settings.json"
+    path.write_text(json.dumps({"parameters": {"hnsw.ef_search": 80, "work_mem": 1}}))
+    monkeypatch.setattr(settings, "MANUAL_ANN_SETTINGS", str(path))
+    monkeypatch.setattr(settings, "MANUAL_SEARCH_HNSW_EF_SEARCH", 20)
+    monkeypatch.setattr(settings, "MANUAL_SEARCH_IVFFLAT_PROBES", 4)
+
+    assert module._ann_statements() == ["SET LOCAL hnsw.ef_search = 80", "SET LOCAL ivfflat.probes = 4"]
+
+    monkeypatch.setattr(settings, "MANUAL_ANN_SETTINGS", str(tmp_path / "missing.json"))
+    assert module._ann_statements() == ["SET LOCAL hnsw.ef_search = 20", "SET LOCAL ivfflat.probes = 4"]
@@ -0,0 +1,98 @@
+"""
+Test the /metrics endpoint and the request, pool and Clerk instrumentation
+"""
+
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from main import app
+from services.clerk_service import CLERK_ERRORS, CLERK_REQUEST_DURATION, ClerkService
+from utils.database import POOL_CHECKOUT_DURATION, TimedQueuePool, get_async_engine
+from utils.metrics import Counter, Gauge, Histogram, Registry
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test bucket counts are cumulative and le bounds are inclusive"""
+    registry = Registry()
+    latency = registry.register(Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "/a")
+
+    lines = registry.render().decode().splitlines()
+    assert lines[:2] == ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"]
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="/a"} 3.65' in lines
+    assert 'latency_seconds_count{route="/a"} 4' in lines
+
+
+def test_counter_gauge_and_label_escaping():
+    """Test counters accumulate, gauges are read at render time and labels are escaped"""
+    registry = Registry()
+    errors = registry.register(Counter("errors_total", "Errors", ("reason",)))
+    errors.inc('bad "quote"')
+    errors.inc('bad "quote"', amount=2)
+    registry.register(Gauge("queue_depth", "Depth", ("queue",), lambda: [(("jobs",), 7)]))
+
+    body = registry.render().decode()
+    assert 'errors_total{reason="bad \\"quote\\""} 3' in body
+    assert 'queue_depth{queue="jobs"} 7' in body
+
+
+def test_metrics_endpoint_reports_route_templates():
+    """Test requests are recorded under their route template and status"""
+    client.get("/livez")
+    client.get("/api/v1/wills/some-id")  # rejected without a token
+    client.get("/no-such-path")
+    get_async_engine()  # pools are reported once their engine is built
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/livez",status="200"}' in body
+    assert 'route="/api/v1/wills/{will_id}",status="403"' in body
+    assert 'route="unmatched",status="404"' in body
+    assert 'db_pool_connections{pool="async",state="size"} 5' in body
+    assert "# TYPE clerk_request_duration_seconds histogram" in body
+    assert "# TYPE manual_search_duration_seconds histogram" in body
+
+
+def test_pool_checkout_is_timed():
+    """Test checkouts from TimedQueuePool are observed"""
+    engine = create_engine("sqlite://", poolclass=TimedQueuePool)
+    before = POOL_CHECKOUT_DURATION.count("sync")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert POOL_CHECKOUT_DURATION.count("sync") == before + 1
+    engine.dispose()
+
+
+def test_clerk_latency_and_errors_recorded():
+    """Test Clerk calls record latency per status and count server errors and exceptions"""
+    def handler(request):
+        if request.method == "DELETE":
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(503, text="unavailable")
+
+    service = ClerkService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    latency_before = CLERK_REQUEST_DURATION.count("get_user_by_email", "503")
+    status_errors = CLERK_ERRORS.value("get_user_by_email", "503")
+    raised_errors = CLERK_ERRORS.value("delete_user", "ConnectError")
+
+    user, error = asyncio.run(service.get_user_by_email("someone@example.co.za"))
+    assert user is None and "503" in error
+    deleted, error = asyncio.run(service.delete_user("user_1"))
+    assert deleted is False
+
+    assert CLERK_REQUEST_DURATION.count("get_user_by_email", "503") == latency_before + 1
+    assert CLERK_ERRORS.value("get_user_by_email", "503") == status_errors + 1
+    assert CLERK_ERRORS.value("delete_user", "ConnectError") == raised_errors + 1
+    assert CLERK_REQUEST_DURATION.count("delete_user", "error") >= 1
@@ -262,6 +262,18 @@ def test_json_serialization():
         return False
 
 
+def test_canonical_json():
+    """Test canonical JSON bytes are computed once and stored as-is"""
+    from utils.database import json_serializer
+
+    will = WillContent(**sample_will_content)
+    content = will.canonical_json()
+    assert content is will.canonical_json()
+    assert json.loads(content) == will.model_dump(mode='json')
+    assert json_serializer(content) == content.decode()
+    return True
+
+
 if __name__ == "__main__":
     print("=" * 60)
     print("WillContent Model Validation Tests")
@@ -273,6 +285,7 @@ if __name__ == "__main__":
     results.append(test_minor_guardian_validation())
     results.append(test_witness_count_validation())
     results.append(test_json_serialization())
+    results.append(test_canonical_json())
 
     print("\n" + "=" * 60)
     passed = sum(results)
@@ -0,0 +1,89 @@
+"""
+Test the opt-in request profiler and its admin endpoints
+"""
+
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import main
+from utils.config import settings
+from utils.profiling import AWAIT_FRAME, ProfileStore, ProfilingMiddleware
+
+
+def busy_validation(seconds: float) -> None:
+    """Stand-in for synchronous work on the event loop"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def profiled_app(monkeypatch, sample_rate=0.0):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "secret")
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", sample_rate)
+    monkeypatch.setattr(settings, "PROFILING_INTERVAL_MS", 1.0)
+    store = ProfileStore(keep=5)
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        busy_validation(0.05)
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware, store=store)
+    return TestClient(app), store
+
+
+def test_profile_separates_cpu_from_waiting(monkeypatch):
+    """Test a profiled request records sync frames while running and <await> while suspended"""
+    client, store = profiled_app(monkeypatch)
+
+    response = client.get("/work", headers={"X-Profile-Token": "secret"})
+    assert response.status_code == 200
+    profile = store.get(response.headers["X-Profile-Id"])
+    assert profile is not None
+    assert profile.route == "/work" and profile.status == 200
+    assert profile.wall_ms >= 100
+    # Sample weights follow wall time even while busy code holds the GIL
+    assert 25 <= profile.running_ms <= 75 and 25 <= profile.waiting_ms <= 75
+
+    stacks = profile.collapsed()
+    assert any("busy_validation" in line and "work" in line for line in stacks.splitlines())
+    assert any(line.rsplit(" ", 1)[0].endswith(f";{AWAIT_FRAME}") for line in stacks.splitlines())
+    assert profile.memory_peak_kb is not None
+
+
+def test_requests_not_selected_are_not_profiled(monkeypatch):
+    """Test requests without a valid token are untouched at a zero sample rate"""
+    client, store = profiled_app(monkeypatch)
+
+    assert "X-Profile-Id" not in client.get("/work").headers
+    assert "X-Profile-Id" not in client.get("/work", headers={"X-Profile-Token": "wrong"}).headers
+    assert store.list() == []
+
+
+def test_sample_rate_selects_requests(monkeypatch):
+    """Test requests are profiled without the header when sampled"""
+    client, store = profiled_app(monkeypatch, sample_rate=1.0)
+
+    assert "X-Profile-Id" in client.get("/work").headers
+    assert len(store.list()) == 1
+
+
+def test_admin_profiles_require_enabled_profiling_and_token(monkeypatch):
+    """Test the admin endpoints are hidden when disabled and need the token"""
+    client = TestClient(main.app)
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "secret")
+
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", False)
+    assert client.get("/admin/profiles", headers={"X-Profile-Token": "secret"}).status_code == 404
+
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    assert client.get("/admin/profiles", headers={"X-Profile-Token": "wrong"}).status_code == 403
+    response = client.get("/admin/profiles", headers={"X-Profile-Token": "secret"})
+    assert response.status_code == 200
+    assert "profiles" in response.json()
+    assert client.get("/admin/profiles/missing", headers={"X-Profile-Token": "secret"}).status_code == 404
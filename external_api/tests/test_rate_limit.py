@@ -0,0 +1,93 @@
+"""
+Test token-bucket rate limiting
+"""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils import rate_limit
+from utils.rate_limit import Limit, RateLimitMiddleware, TokenBuckets
+from tests.test_manual_search import auth_headers
+
+
+def limited_client(user_per_minute: int, ip_per_minute: int, trust_forwarded_for: bool = False) -> TestClient:
+    """Small app behind the middleware with the given limits"""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, buckets=TokenBuckets())
+    client = TestClient(app)
+    client.get("/health")  # builds the middleware stack
+    middleware = app.middleware_stack
+    while not isinstance(middleware, RateLimitMiddleware):
+        middleware = middleware.app
+    middleware.user_limit = Limit.per_minute(user_per_minute)
+    middleware.ip_limit = Limit.per_minute(ip_per_minute)
+    middleware.trust_forwarded_for = trust_forwarded_for
+    return client
+
+
+def test_bucket_refills_over_time(monkeypatch):
+    """Test an empty bucket reports the wait and refills at the configured rate"""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    buckets = TokenBuckets()
+    limit = Limit(rate=1.0, capacity=2)
+
+    assert asyncio.run(buckets.acquire([("k", limit)])) == 0
+    assert asyncio.run(buckets.acquire([("k", limit)])) == 0
+    assert asyncio.run(buckets.acquire([("k", limit)])) == 1.0
+
+    now[0] += 1.0
+    assert asyncio.run(buckets.acquire([("k", limit)])) == 0
+
+
+def test_denied_requests_do_not_drain_other_buckets():
+    """Test a request is charged to all of its buckets or none"""
+    buckets = TokenBuckets()
+    small, large = Limit(rate=0.01, capacity=1), Limit(rate=0.01, capacity=5)
+
+    assert asyncio.run(buckets.acquire([("ip", large), ("user", small)])) == 0
+    assert asyncio.run(buckets.acquire([("ip", large), ("user", small)])) > 0
+    # The denied request left the shared IP bucket at 4 tokens
+    assert [asyncio.run(buckets.acquire([("ip", large)])) == 0 for _ in range(5)] == [True] * 4 + [False]
+
+
+def test_per_user_limit_returns_retry_after():
+    """Test users are limited independently and get 429 with Retry-After"""
+    client = limited_client(user_per_minute=2, ip_per_minute=100)
+    alice, bob = auth_headers("alice@example.co.za"), auth_headers("bob@example.co.za")
+
+    assert [client.get("/ping", headers=alice).status_code for _ in range(3)] == [200, 200, 429]
+    response = client.get("/ping", headers=alice)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert client.get("/ping", headers=bob).status_code == 200
+
+
+def test_per_ip_limit_and_exempt_paths():
+    """Test anonymous traffic is limited per IP and probes are never limited"""
+    client = limited_client(user_per_minute=100, ip_per_minute=2, trust_forwarded_for=True)
+    forwarded = {"X-Forwarded-For": "203.0.113.9, 198.51.100.7"}
+
+    assert [client.get("/ping", headers=forwarded).status_code for _ in range(3)] == [200, 200, 429]
+    assert client.get("/ping", headers={"X-Forwarded-For": "198.51.100.8"}).status_code == 200
+    assert all(client.get("/health").status_code == 200 for _ in range(5))
+
+
+def test_forwarded_for_ignored_by_default():
+    """Test clients cannot pick their IP bucket unless X-Forwarded-For is trusted"""
+    client = limited_client(user_per_minute=100, ip_per_minute=2)
+    spoofed = [{"X-Forwarded-For": f"203.0.113.{i}"} for i in range(3)]
+
+    # All three share the socket address's bucket
+    assert [client.get("/ping", headers=h).status_code for h in spoofed] == [200, 200, 429]
@@ -0,0 +1,97 @@
+"""
+Test read-replica routing and the read-your-writes window
+"""
+
+import asyncio
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+import main
+from tests.test_manual_search import auth_headers
+from utils import database
+from utils.config import settings
+from utils.database import ReadRouter
+
+client = TestClient(main.app)
+
+Summary = namedtuple("Summary", "id title status createdAt updatedAt digest")
+UPDATED_AT = datetime(2026, 10, 19, 9, 30, 15, 123000)
+
+
+def use_replica(monkeypatch):
+    monkeypatch.setattr(settings, "READ_DATABASE_URL", "postgresql://u:p@replica.internal/db")
+    monkeypatch.setattr(database, "_read_async_engine", None)
+    monkeypatch.setattr(database, "_read_async_session_factory", None)
+
+
+def test_reads_use_primary_without_replica():
+    """Test everything reads from the primary when READ_DATABASE_URL is unset"""
+    router = ReadRouter(window_seconds=5)
+
+    async def scenario():
+        await router.record_write("jane@example.co.za")
+        return await router.sessionmaker_for("jane@example.co.za")
+
+    assert asyncio.run(scenario()) is database.get_async_sessionmaker()
+    assert database.get_read_async_engine() is database.get_async_engine()
+    assert len(router._recent_writes.local) == 0
+
+
+def test_recent_writers_read_from_primary_until_window_ends(monkeypatch):
+    """Test a writer is routed to the primary for the window, others to the replica"""
+    use_replica(monkeypatch)
+    router = ReadRouter(window_seconds=0.1)
+    replica = database.get_read_async_sessionmaker()
+    assert replica is not database.get_async_sessionmaker()
+    assert database.get_read_async_engine().url.host == "replica.internal"
+
+    async def scenario():
+        await router.record_write("jane@example.co.za")
+        during = await router.sessionmaker_for("jane@example.co.za")
+        other = await router.sessionmaker_for("john@example.co.za")
+        time.sleep(0.15)
+        after = await router.sessionmaker_for("jane@example.co.za")
+        return during, other, after
+
+    during, other, after = asyncio.run(scenario())
+    assert during is database.get_async_sessionmaker()
+    assert other is replica
+    assert after is replica
+
+
+def test_wills_endpoints_read_own_writes(monkeypatch):
+    """Test listing reads the replica, but the primary right after the user's patch"""
+    use_replica(monkeypatch)
+    main.read_router._recent_writes.local.clear()
+    email = "routing@example.co.za"
+    binds = []
+
+    async def list_user_wills(db, user_email, limit, cursor, include):
+        binds.append(db.bind)
+        return [], None
+
+    async def apply_will_patch(db, user_email, will_id, operations, expected_versions):
+        return Summary(will_id, "Will", "draft", UPDATED_AT, UPDATED_AT, "0" * 32)
+
+    monkeypatch.setattr(main, "list_user_wills", list_user_wills)
+    monkeypatch.setattr(main, "apply_will_patch", apply_will_patch)
+
+    assert client.get("/api/v1/wills", headers=auth_headers(email)).status_code == 200
+    response = client.patch(
+        "/api/v1/wills/will-1",
+        content=b'{"title": "Will"}',
+        headers={**auth_headers(email), "Content-Type": "application/merge-patch+json"},
+    )
+    assert response.status_code == 200
+    assert client.get("/api/v1/wills", headers=auth_headers(email)).status_code == 200
+    assert client.get("/api/v1/wills", headers=auth_headers("other@example.co.za")).status_code == 200
+
+    assert binds == [
+        database.get_read_async_engine(),
+        database.get_async_engine(),
+        database.get_read_async_engine(),
+    ]
+    main.read_router._recent_writes.local.clear()
@@ -0,0 +1,83 @@
+"""
+Test worker count selection and per-worker database pool sizing
+"""
+
+import serve
+from utils.config import settings
+from utils.database import worker_pool_limits
+
+
+def test_pool_budget_split_across_workers():
+    """Test all workers together stay within DATABASE_MAX_CONNECTIONS"""
+    limits = worker_pool_limits(120, workers=4, sync_share=0.25)
+    assert limits == {"async": (11, 11), "sync": (4, 4)}
+    per_worker = sum(size + overflow for size, overflow in limits.values())
+    assert per_worker * 4 <= 120
+
+
+def test_pool_defaults_without_budget():
+    """Test the previous fixed pools are kept when no budget is configured"""
+    assert worker_pool_limits(None, workers=4, sync_share=0.25) == {"async": (5, 10), "sync": (5, 10)}
+
+
+def test_tiny_budget_keeps_one_connection_per_engine():
+    """Test a budget smaller than the worker count still gives each engine a connection"""
+    assert worker_pool_limits(3, workers=4, sync_share=0.25) == {"async": (1, 0), "sync": (1, 0)}
+
+
+def test_cgroup_cpu_quota(tmp_path):
+    """Test the container CPU quota is read from cgroup v2 and v1 files"""
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert serve.cgroup_cpu_limit(str(tmp_path)) == 1.5
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert serve.cgroup_cpu_limit(str(tmp_path)) is None
+
+    v1 = tmp_path / "v1"
+    (v1 / "cpu").mkdir(parents=True)
+    (v1 / "cpu" / "cpu.cfs_quota_us").write_text("200000")
+    (v1 / "cpu" / "cpu.cfs_period_us").write_text("100000")
+    assert serve.cgroup_cpu_limit(str(v1)) == 2.0
+
+
+def test_worker_count(monkeypatch):
+    """Test WEB_CONCURRENCY wins, otherwise CPUs capped at WEB_CONCURRENCY_MAX"""
+    monkeypatch.setattr(serve, "available_cpus", lambda: 16)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", None)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY_MAX", 8)
+    assert serve.worker_count() == 8
+
+    monkeypatch.setattr(serve, "available_cpus", lambda: 2)
+    assert serve.worker_count() == 2
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 3)
+    assert serve.worker_count() == 3
+
+
+def test_job_worker_runs_with_the_api_when_jobs_enabled(monkeypatch):
+    """Test serve.py starts worker.py only when jobs are enqueued, and stops it after uvicorn"""
+    events = []
+
+    class FakeProcess:
+        def terminate(self):
+            events.append("terminate")
+
+        def wait(self, timeout=None):
+            events.append("wait")
+
+    monkeypatch.setattr(serve.subprocess, "Popen", lambda args: events.append(args[-1]) or FakeProcess())
+    monkeypatch.setattr(serve.uvicorn, "run", lambda *args, **kwargs: events.append("uvicorn"))
+    monkeypatch.setattr(serve, "configure_logging", lambda: None)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+    monkeypatch.setenv("WEB_CONCURRENCY", "2")
+    monkeypatch.setenv("DATABASE_POOL_PROCESSES", "2")
+
+    monkeypatch.setattr(settings, "JOBS_ENABLED", False)
+    serve.main()
+    assert events == ["uvicorn"]
+
+    events.clear()
+    monkeypatch.setattr(settings, "JOBS_ENABLED", True)
+    serve.main()
+    assert events == [serve.WORKER_SCRIPT, "uvicorn", "terminate", "wait"]
+    assert serve.os.environ["DATABASE_POOL_PROCESSES"] == "3"
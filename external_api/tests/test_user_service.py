@@ -0,0 +1,245 @@
+"""
+Test cached user resolution in get_or_create_user and will creation
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from services import user_service
+from services.clerk_service import clerk_service
+from models.models import WillContent
+from services.user_service import (
+    CreatedWill,
+    UserIdentity,
+    create_will_for_user,
+    get_or_create_user,
+    resolve_user,
+)
+from tests.test_models import sample_will_content
+from utils.cache import TieredCache
+
+
+class FakeResult:
+    """Minimal stand-in for an SQLAlchemy Result"""
+
+    def __init__(self, row=None):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+    def scalar_one_or_none(self):
+        return self.row
+
+    def scalar_one(self):
+        return self.row
+
+
+class FakeSession:
+    """Async session that answers every query with the queued results"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+        self.commits = 0
+        self.closed = False
+
+    @property
+    def queries(self):
+        return len(self.statements)
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return self.results.pop(0)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+
+def fresh_cache(monkeypatch):
+    """Isolate each test from cached resolutions"""
+    monkeypatch.setattr(user_service, "user_cache", TieredCache(namespace="test-user"))
+
+
+def resolve_with(monkeypatch, db):
+    """Hand db to user resolutions, which open their own session"""
+    monkeypatch.setattr(user_service, "get_async_sessionmaker", lambda: lambda: db)
+
+
+def forbid_clerk(monkeypatch):
+    """Fail the test if Clerk is called"""
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("Clerk should not be called")
+
+    monkeypatch.setattr(clerk_service, "get_user_by_email", fail)
+    monkeypatch.setattr(clerk_service, "create_user", fail)
+
+
+def test_known_user_resolved_from_database_then_cache(monkeypatch):
+    """Test existing users skip Clerk and are cached after the first lookup"""
+    fresh_cache(monkeypatch)
+    forbid_clerk(monkeypatch)
+    db = FakeSession(FakeResult(SimpleNamespace(id="user-1", clerkId="clerk-1")))
+    resolve_with(monkeypatch, db)
+
+    user, error = asyncio.run(get_or_create_user("partner@example.co.za"))
+    assert error is None
+    assert user == UserIdentity(id="user-1", clerkId="clerk-1", email="partner@example.co.za")
+
+    user, error = asyncio.run(get_or_create_user("partner@example.co.za"))
+    assert user.id == "user-1"
+    assert db.queries == 1
+
+
+def test_new_user_created_via_clerk(monkeypatch):
+    """Test unknown emails go to Clerk and get a new DB user"""
+    fresh_cache(monkeypatch)
+    calls = []
+
+    async def get_user_by_email(email):
+        calls.append("get")
+        return None, "User not found in Clerk"
+
+    async def create_user(email):
+        calls.append("create")
+        return {"id": "clerk-new"}, None
+
+    monkeypatch.setattr(clerk_service, "get_user_by_email", get_user_by_email)
+    monkeypatch.setattr(clerk_service, "create_user", create_user)
+    db = FakeSession(FakeResult(None), FakeResult("user-new"))
+    resolve_with(monkeypatch, db)
+
+    user, error = asyncio.run(get_or_create_user("new@example.co.za"))
+    assert error is None
+    assert user == UserIdentity(id="user-new", clerkId="clerk-new", email="new@example.co.za")
+    assert calls == ["get", "create"]
+    assert "ON CONFLICT" in str(db.statements[1].compile(dialect=postgresql.dialect()))
+
+
+def test_concurrent_resolutions_share_one_clerk_call(monkeypatch):
+    """Test concurrent callers for one email coalesce into one resolution"""
+    fresh_cache(monkeypatch)
+    calls = []
+
+    async def get_user_by_email(email):
+        calls.append(email)
+        await asyncio.sleep(0.01)
+        return {"id": "clerk-1"}, None
+
+    monkeypatch.setattr(clerk_service, "get_user_by_email", get_user_by_email)
+    db = FakeSession(FakeResult(None), FakeResult("user-1"))
+    resolve_with(monkeypatch, db)
+
+    async def resolve_many():
+        return await asyncio.gather(*(get_or_create_user("busy@example.co.za") for _ in range(5)))
+
+    results = asyncio.run(resolve_many())
+    assert [user.id for user, _ in results] == ["user-1"] * 5
+    assert calls == ["busy@example.co.za"]
+    assert db.queries == 2
+    assert db.commits == 1
+
+
+def test_cancelled_caller_leaves_shared_resolution_running(monkeypatch):
+    """Test the first caller's cancellation neither cancels nor closes the shared resolution"""
+    fresh_cache(monkeypatch)
+
+    async def get_user_by_email(email):
+        await asyncio.sleep(0.01)
+        return {"id": "clerk-1"}, None
+
+    monkeypatch.setattr(clerk_service, "get_user_by_email", get_user_by_email)
+    db = FakeSession(FakeResult(None), FakeResult("user-1"))
+    resolve_with(monkeypatch, db)
+
+    async def cancel_first():
+        first = asyncio.create_task(get_or_create_user("leader@example.co.za"))
+        second = asyncio.create_task(get_or_create_user("leader@example.co.za"))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    user, error = asyncio.run(cancel_first())
+    assert error is None
+    assert user.id == "user-1"
+    assert db.commits == 1
+    assert db.closed
+
+
+def test_resolve_and_create_share_clerk_resolution(monkeypatch):
+    """Test resolve_user and get_or_create_user share one flight and one cache entry"""
+    fresh_cache(monkeypatch)
+    calls = []
+
+    async def get_user_by_email(email):
+        calls.append(email)
+        await asyncio.sleep(0.01)
+        return {"id": "clerk-1"}, None
+
+    monkeypatch.setattr(clerk_service, "get_user_by_email", get_user_by_email)
+    db = FakeSession(FakeResult(None), FakeResult("user-1"))
+    resolve_with(monkeypatch, db)
+
+    async def resolve_both():
+        return await asyncio.gather(resolve_user("mixed@example.co.za"), get_or_create_user("mixed@example.co.za"))
+
+    (unsaved, _), (stored, _) = asyncio.run(resolve_both())
+    assert unsaved == UserIdentity(id=None, clerkId="clerk-1", email="mixed@example.co.za")
+    assert stored == UserIdentity(id="user-1", clerkId="clerk-1", email="mixed@example.co.za")
+    assert calls == ["mixed@example.co.za"]
+    assert db.queries == 2
+    assert db.commits == 1
+    assert asyncio.run(user_service.user_cache.get("mixed@example.co.za"))["id"] == "user-1"
+
+
+def test_new_user_and_will_created_in_one_transaction(monkeypatch):
+    """Test a new user is upserted with their will under a single commit, without reads back"""
+    fresh_cache(monkeypatch)
+    monkeypatch.setattr(user_service.settings, "JOBS_ENABLED", True)
+
+    async def get_user_by_email(email):
+        return {"id": "clerk-new"}, None
+
+    monkeypatch.setattr(clerk_service, "get_user_by_email", get_user_by_email)
+    lookup = FakeSession(FakeResult(None))
+    resolve_with(monkeypatch, lookup)
+
+    user, error = asyncio.run(resolve_user("first@example.co.za"))
+    assert user == UserIdentity(id=None, clerkId="clerk-new", email="first@example.co.za")
+    assert lookup.commits == 0
+
+    db = FakeSession(FakeResult("user-new"), FakeResult("will-1"), FakeResult(None))
+    will, error = asyncio.run(create_will_for_user(db, user, WillContent(**sample_will_content)))
+    assert error is None
+    assert will == CreatedWill(id="will-1", user_id="user-new")
+    assert db.commits == 1
+    sql = [str(stmt.compile(dialect=postgresql.dialect())) for stmt in db.statements]
+    assert "ON CONFLICT" in sql[0]
+    assert sql[1].startswith('INSERT INTO "Will"') and sql[1].endswith('RETURNING "Will".id')
+    assert sql[2].startswith('INSERT INTO "Job"')
+    assert asyncio.run(user_service.user_cache.get("first@example.co.za"))["id"] == "user-new"
+
+
+def test_will_created_without_job_when_jobs_disabled(monkeypatch):
+    """Test no Job row is written unless JOBS_ENABLED is set"""
+    fresh_cache(monkeypatch)
+    monkeypatch.setattr(user_service.settings, "JOBS_ENABLED", False)
+    db = FakeSession(FakeResult("will-1"))
+    user = UserIdentity(id="user-1", clerkId="clerk-1", email="nojobs@example.co.za")
+
+    will, error = asyncio.run(create_will_for_user(db, user, WillContent(**sample_will_content)))
+    assert will == CreatedWill(id="will-1", user_id="user-1")
+    assert db.queries == 1
+    assert db.commits == 1
@@ -0,0 +1,136 @@
+"""
+Test partial will updates (JSON Patch / Merge Patch)
+"""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+import main
+from main import app
+from models.models import WillContent
+from services import will_patch
+from services.will_patch import JSON_PATCH, MERGE_PATCH, PatchConflict, PatchError, apply_will_patch, parse_patch
+from tests.test_manual_search import auth_headers
+from tests.test_models import sample_will_content
+from tests.test_user_service import FakeResult, FakeSession
+
+client = TestClient(app)
+
+UPDATED_AT = datetime(2026, 10, 19, 9, 30, 15, 123000)
+STORED = WillContent.model_validate(sample_will_content).model_dump(mode="json")
+
+
+def stored_row(units, party_lists=()):
+    """Row as returned by the patch read query for the planned units"""
+    mapping = {f"unit_{i}": orjson.dumps(STORED[u[0]] if len(u) == 1 else STORED[u[0]][int(u[1])]).decode()
+               for i, u in enumerate(units)}
+    mapping.update({field: [item.get("idNumber") for item in STORED[field]] for field in party_lists})
+    return SimpleNamespace(
+        id="will-1", title="Will of Johannes", status="draft", createdAt=UPDATED_AT, updatedAt=UPDATED_AT,
+        digest="0" * 32, _mapping=mapping,
+    )
+
+
+def run_patch(document, media_type, units, party_lists=(), updated=True):
+    operations = parse_patch(document, media_type, max_operations=100)
+    db = FakeSession(
+        FakeResult(stored_row(units, party_lists)),
+        FakeResult(SimpleNamespace(updatedAt=UPDATED_AT) if updated else None),
+    )
+    row = asyncio.run(apply_will_patch(db, "a@example.co.za", "will-1", operations))
+    return row, db
+
+
+def test_element_edit_rewrites_only_that_element():
+    """Test a field edit inside a list element reads and writes that element"""
+    document = [
+        {"op": "test", "path": "/beneficiaries/1/relationship", "value": STORED["beneficiaries"][1]["relationship"]},
+        {"op": "replace", "path": "/beneficiaries/1/relationship", "value": "Stepson"},
+    ]
+    units = [("beneficiaries", "1")]
+    row, db = run_patch(document, JSON_PATCH, units, ["witnesses", "beneficiaries", "executors", "guardians"])
+
+    assert row is not None
+    update_sql = str(db.statements[1].compile(dialect=postgresql.dialect()))
+    assert update_sql.count("jsonb_set(") == 1
+    assert '"Will"."updatedAt" = %(updatedAt_1)s' in update_sql
+    written = db.statements[1].compile(dialect=postgresql.dialect()).params
+    assert ["beneficiaries", "1"] in written.values()
+    assert any(isinstance(v, dict) and v.get("relationship") == "Stepson" for v in written.values())
+
+
+def test_merge_patch_validates_changed_subtree():
+    """Test merge patches are validated against the field's model"""
+    with pytest.raises(PatchError, match="/testator"):
+        run_patch({"testator": {"idNumber": ""}}, MERGE_PATCH, [("testator",)])
+
+    row, db = run_patch({"specialInstructions": "Scatter my ashes at sea"}, MERGE_PATCH, [("specialInstructions",)])
+    assert row is not None
+
+
+def test_removed_fields_are_deleted_not_nulled():
+    """Test remove and merge-null delete the member instead of writing JSON null"""
+    for document, media_type in (
+        ([{"op": "remove", "path": "/specialInstructions"}], JSON_PATCH),
+        ({"specialInstructions": None}, MERGE_PATCH),
+    ):
+        row, db = run_patch(document, media_type, [("specialInstructions",)])
+        update_sql = str(db.statements[1].compile(dialect=postgresql.dialect()))
+        assert "jsonb_set(" not in update_sql
+        assert " #- " in update_sql
+
+    with pytest.raises(PatchError, match="/testator"):
+        run_patch([{"op": "remove", "path": "/testator"}], JSON_PATCH, [("testator",)])
+
+
+def test_patch_cannot_make_a_witness_a_beneficiary():
+    """Test the witness rule runs when a party list changes"""
+    document = [{"op": "replace", "path": "/beneficiaries/0/idNumber", "value": "7207125678093"}]
+    with pytest.raises(PatchError, match="Witnesses cannot be beneficiaries"):
+        run_patch(document, JSON_PATCH, [("beneficiaries", "0")], ["witnesses", "beneficiaries", "executors", "guardians"])
+
+
+def test_failed_test_and_unknown_paths():
+    """Test failed tests conflict and unknown fields are rejected up front"""
+    with pytest.raises(PatchConflict):
+        run_patch([{"op": "test", "path": "/willType", "value": "joint"}], JSON_PATCH, [("willType",)])
+    with pytest.raises(PatchError, match="Unknown path"):
+        run_patch([{"op": "add", "path": "/nickname", "value": "x"}], JSON_PATCH, [])
+
+
+def test_patch_endpoint_content_type_and_if_match(monkeypatch):
+    """Test unsupported media types and stale If-Match headers"""
+    calls = []
+
+    async def apply(db, email, will_id, operations, expected_versions):
+        calls.append(expected_versions)
+        raise will_patch.WillVersionMismatch(will_id)
+
+    monkeypatch.setattr(main, "apply_will_patch", apply)
+
+    response = client.patch("/api/v1/wills/will-1", json={"willType": "joint"}, headers=auth_headers())
+    assert response.status_code == 415
+    assert JSON_PATCH in response.headers["accept-patch"]
+
+    response = client.patch(
+        "/api/v1/wills/will-1",
+        content=b'{"willType": "joint"}',
+        headers={**auth_headers(), "Content-Type": MERGE_PATCH, "If-Match": f'"5f3a-{"0" * 32}"'},
+    )
+    assert response.status_code == 412
+    assert len(calls[0]) == 1
+
+    # Weak tags fail the strong comparison without reading the will
+    response = client.patch(
+        "/api/v1/wills/will-1",
+        content=b'{"willType": "joint"}',
+        headers={**auth_headers(), "Content-Type": MERGE_PATCH, "If-Match": f'W/"5f3a-{"0" * 32}"'},
+    )
+    assert response.status_code == 412
+    assert len(calls) == 1
@@ -0,0 +1,37 @@
+"""
+Test Will.content filters render the indexed expressions
+"""
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from models.db_models import Will
+from services import will_query
+
+
+def render(condition):
+    return str(select(Will.id).where(condition).compile(dialect=postgresql.dialect()))
+
+
+def index_sql(name):
+    index = next(i for i in Will.__table__.indexes if i.name == name)
+    return str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+
+
+def test_containment_filters_use_gin_operator():
+    """Test containment filters compile to @> with a JSONB parameter"""
+    assert '"Will".content @> %(content_1)s' in render(will_query.has_minor_children())
+    assert "@>" in render(will_query.will_type("joint"))
+    assert "jsonb_path_ops" in index_sql("Will_content_idx")
+
+
+def test_expression_filters_repeat_index_literals():
+    """Test expression filters inline the paths used by their indexes"""
+    sql = render(will_query.testator_id_number("8001015009087"))
+    assert "((\"Will\".content -> 'testator') ->> 'idNumber') = %(param_1)s" in sql
+    assert "(content -> 'testator' ->> 'idNumber')" in index_sql("Will_content_testator_id_number_idx")
+
+    sql = render(will_query.has_usufruct())
+    assert "jsonb_path_exists(\"Will\".content, '$.assets[*].usufruct ? (@ != null)')" in sql
+    assert "jsonb_path_exists(content, '$.assets[*].usufruct ? (@ != null)')" in index_sql("Will_content_usufruct_idx")
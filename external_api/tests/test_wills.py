@@ -0,0 +1,120 @@
+"""
+Test will listing (keyset pagination) and conditional single fetches
+"""
+
+import asyncio
+from collections import namedtuple
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+import main
+from main import app
+from services import will_query
+from tests.test_manual_search import auth_headers
+from tests.test_user_service import FakeResult, FakeSession
+
+client = TestClient(app)
+
+UPDATED_AT = datetime(2026, 10, 19, 9, 30, 15, 123000)
+DIGEST = "0123456789abcdef0123456789abcdef"
+
+Summary = namedtuple("Summary", "id title status createdAt updatedAt")
+Full = namedtuple("Full", "id title status createdAt updatedAt digest content editorContent")
+
+
+class FakeRows(FakeResult):
+    def all(self):
+        return self.row
+
+
+def test_list_omits_content_and_paginates(monkeypatch):
+    """Test listings skip content columns and pass the cursor through"""
+    calls = []
+
+    async def list_user_wills(db, email, limit, cursor, include):
+        calls.append((email, limit, cursor, list(include)))
+        return [Summary("will-1", "Will of Jane", "draft", UPDATED_AT, UPDATED_AT)], "next-page"
+
+    monkeypatch.setattr(main, "list_user_wills", list_user_wills)
+
+    response = client.get("/api/v1/wills?limit=1&cursor=abc", headers=auth_headers())
+    assert response.status_code == 200
+    data = response.json()
+    assert data["next_cursor"] == "next-page"
+    assert set(data["wills"][0]) == {"id", "title", "status", "created_at", "updated_at"}
+    assert calls[0][1:] == (1, "abc", [])
+
+    response = client.get("/api/v1/wills?include=editorContent", headers=auth_headers())
+    assert response.status_code == 200
+    assert calls[1][3] == ["editorContent"]
+
+
+def test_keyset_query_seeks_past_cursor():
+    """Test the next page starts after the cursor row, newest first"""
+    rows = [Summary(f"will-{i}", "Will", "draft", UPDATED_AT, UPDATED_AT) for i in range(3)]
+    db = FakeSession(FakeRows(rows))
+    cursor = will_query.encode_cursor(UPDATED_AT, "will-9")
+
+    page, next_cursor = asyncio.run(will_query.list_user_wills(db, "a@example.co.za", limit=2, cursor=cursor))
+
+    assert [row.id for row in page] == ["will-0", "will-1"]
+    assert will_query.decode_cursor(next_cursor) == (UPDATED_AT, "will-1")
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert '("Will"."updatedAt", "Will".id) < (%(param_1)s, %(param_2)s)' in sql
+    assert "\"Will\".content" not in sql
+
+
+def test_get_will_returns_etag_and_304(monkeypatch):
+    """Test a matching If-None-Match gets an empty 304 with the same ETag"""
+    seen = []
+
+    async def get_user_will(db, email, will_id, known_versions, with_content=True):
+        seen.append((known_versions, with_content))
+        if will_id != "will-1":
+            return None
+        return Full("will-1", "Will of Jane", "draft", UPDATED_AT, UPDATED_AT, DIGEST, {"willType": "individual"}, None)
+
+    monkeypatch.setattr(main, "get_user_will", get_user_will)
+
+    response = client.get("/api/v1/wills/will-1", headers=auth_headers())
+    assert response.status_code == 200
+    assert response.json()["content"] == {"willType": "individual"}
+    etag = response.headers["etag"]
+
+    response = client.get("/api/v1/wills/will-1", headers={**auth_headers(), "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    assert seen[1] == ([will_query.WillVersion(UPDATED_AT, DIGEST)], True)
+
+    response = client.get("/api/v1/wills/will-1", headers={**auth_headers(), "If-None-Match": "*"})
+    assert response.status_code == 304
+    assert seen[2] == ([], False)
+
+    response = client.get("/api/v1/wills/missing", headers=auth_headers())
+    assert response.status_code == 404
+
+
+def test_etag_changes_with_content_and_if_match_is_strong():
+    """Test two versions sharing updatedAt get different tags, and W/ tags never satisfy If-Match"""
+    first = will_query.WillVersion(UPDATED_AT, DIGEST)
+    second = will_query.WillVersion(UPDATED_AT, "f" * 32)
+    assert will_query.will_etag(first) != will_query.will_etag(second)
+
+    header = f"W/{will_query.will_etag(first)}, {will_query.will_etag(second)}"
+    assert will_query.parse_etags(header) == [first, second]
+    assert will_query.parse_etags(header, weak=False) == [second]
+    assert will_query.parse_etags('"5f3a", *') == []
+
+
+def test_revalidation_compares_updated_at_and_digest():
+    """Test content is only skipped when both parts of the version match"""
+    db = FakeSession(FakeResult())
+    known = [will_query.WillVersion(UPDATED_AT, DIGEST)]
+
+    asyncio.run(will_query.get_user_will(db, "a@example.co.za", "will-1", known))
+
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "md5(CAST(jsonb_build_array(" in sql
+    assert '"Will"."updatedAt" = %(updatedAt_1)s AND md5(' in sql
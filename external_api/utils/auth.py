@@ -5,11 +5,12 @@ Provides token verification and authentication dependencies
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 import logging
+import time
 
+from utils.cache import TTLCache
 from utils.config import settings
 
 # Configure logging
@@ -18,6 +19,12 @@ logger = logging.getLogger(__name__)
 # Security scheme for HTTPBearer token extraction
 security = HTTPBearer()
 
+# token -> email for recently verified tokens (rate limiter and require_auth)
+_verified_tokens: TTLCache[str] = TTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl_seconds=settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+)
+
 
 class TokenData(BaseModel):
     """Validated token data after JWT verification"""
@@ -38,6 +45,14 @@ def verify_token(token: str) -> str:
     Raises:
         HTTPException: If token is invalid, expired, or missing required claims
     """
+    cached = _verified_tokens.get(token)
+    if cached is not None:
+        return cached
+
+    # Deferred to the first verification (or the startup warm-up):
+    # python-jose loads cryptography, which slows cold starts
+    from jose import JWTError, jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -60,12 +75,18 @@ def verify_token(token: str) -> str:
 
         # Validate token data structure
         token_data = TokenData(email=email, exp=payload.get("exp"))
-        logger.info(f"Token verified successfully for user: {email}")
+        logger.debug("Token verified for user: %s", email)
+
+        ttl = settings.AUTH_TOKEN_CACHE_TTL_SECONDS
+        if token_data.exp is not None:
+            ttl = min(ttl, token_data.exp - time.time())
+        if ttl > 0:
+            _verified_tokens.set(token, token_data.email, ttl_seconds=ttl)
 
         return token_data.email
 
     except JWTError as e:
-        logger.error(f"JWT validation error: {str(e)}")
+        logger.warning("JWT validation error: %s", e)
 
         # Provide specific error messages for common JWT errors
         error_str = str(e).lower()
@@ -85,10 +106,18 @@ def verify_token(token: str) -> str:
             raise credentials_exception
 
     except Exception as e:
-        logger.error(f"Unexpected error during token verification: {str(e)}")
+        logger.error("Unexpected error during token verification: %s", e)
         raise credentials_exception
 
 
+def email_from_token(token: str) -> Optional[str]:
+    """Email of a valid token, or None (never raises)"""
+    try:
+        return verify_token(token)
+    except HTTPException:
+        return None
+
+
 async def require_auth(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> str:
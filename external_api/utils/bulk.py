@@ -0,0 +1,123 @@
+"""
+Bulk request helpers: JSON array / NDJSON bodies and chunked validation
+"""
+
+import asyncio
+from typing import Any, List, Optional, Tuple, Type, TypeVar
+
+import orjson
+from fastapi import Request
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar("M", bound=BaseModel)
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class InvalidDocument:
+    """Placeholder for an NDJSON line that is not valid JSON"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+async def read_documents(request: Request, max_items: int) -> List[Any]:
+    """
+    Read a bulk body as a list of decoded JSON documents.
+
+    NDJSON bodies (by Content-Type) are decoded line by line as they stream
+    in, and an undecodable line becomes an InvalidDocument so it can be
+    reported per item. Anything else must be a JSON array.
+
+    Args:
+        request: Incoming request
+        max_items: Maximum number of documents accepted
+
+    Returns:
+        Decoded documents in body order
+
+    Raises:
+        ValueError: If the body is malformed, empty or has too many items
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type in NDJSON_MEDIA_TYPES:
+        documents: List[Any] = []
+        buffer = b""
+
+        def add_line(line: bytes):
+            if not line.strip():
+                return
+            if len(documents) >= max_items:
+                raise ValueError(f"Too many documents (maximum {max_items})")
+            try:
+                documents.append(orjson.loads(line))
+            except orjson.JSONDecodeError as e:
+                documents.append(InvalidDocument(f"Invalid JSON: {e.msg}"))
+
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                add_line(line)
+        add_line(buffer)
+    else:
+        try:
+            documents = orjson.loads(await request.body())
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e.msg}")
+        if not isinstance(documents, list):
+            raise ValueError("Expected a JSON array of documents")
+        if len(documents) > max_items:
+            raise ValueError(f"Too many documents (maximum {max_items})")
+
+    if not documents:
+        raise ValueError("No documents provided")
+    return documents
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Compact one-line summary of a pydantic ValidationError"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'body'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+def _validate_chunk(model: Type[M], documents: List[Any]) -> List[Tuple[Optional[M], Optional[str]]]:
+    results: List[Tuple[Optional[M], Optional[str]]] = []
+    for document in documents:
+        if isinstance(document, InvalidDocument):
+            results.append((None, document.error))
+            continue
+        try:
+            results.append((model.model_validate(document), None))
+        except ValidationError as e:
+            results.append((None, format_validation_error(e)))
+    return results
+
+
+async def validate_documents(
+    model: Type[M],
+    documents: List[Any],
+    chunk_size: int = 100,
+) -> List[Tuple[Optional[M], Optional[str]]]:
+    """
+    Validate documents against model in chunks on worker threads.
+
+    Keeps validation of large batches off the event loop so it overlaps
+    with I/O (user resolution, other requests).
+
+    Args:
+        model: Pydantic model to validate against
+        documents: Decoded documents
+        chunk_size: Documents per worker task
+
+    Returns:
+        One (instance, error_message) tuple per document, in order
+    """
+    chunks = [documents[i:i + chunk_size] for i in range(0, len(documents), chunk_size)]
+    validated = await asyncio.gather(
+        *(asyncio.to_thread(_validate_chunk, model, chunk) for chunk in chunks)
+    )
+    return [result for chunk in validated for result in chunk]
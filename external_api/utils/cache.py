@@ -0,0 +1,213 @@
+"""
+Caching utilities: in-process TTL/LRU and an optional shared tier
+"""
+
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[V]):
+    """
+    Thread-safe LRU cache with per-entry time-to-live.
+
+    Lookups and inserts are O(1). When the cache is full the least recently
+    used entry is evicted; expired entries are dropped lazily on access.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        """
+        Return the cached value for key, or default if missing or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: V, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store value under key, evicting the least recently used entry if full.
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove key from the cache if present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        """Return size and hit/miss counters"""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class SharedCacheBackend(ABC):
+    """
+    Interface for a cache tier shared between workers and instances.
+
+    Values are strings; callers handle serialization. Implementations must
+    treat backend failures as misses rather than raising into request paths.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None on a miss"""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        """Store value for ttl_seconds"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove key if present"""
+
+
+class RedisCacheBackend(SharedCacheBackend):
+    """Shared cache tier backed by Redis (requires the optional redis package)"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            return await self._client.get(key)
+        except Exception as e:
+            logger.warning("Shared cache get failed for %s: %s", key, e)
+            return None
+
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        try:
+            await self._client.set(key, value, ex=max(1, int(ttl_seconds)))
+        except Exception as e:
+            logger.warning("Shared cache set failed for %s: %s", key, e)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._client.delete(key)
+        except Exception as e:
+            logger.warning("Shared cache delete failed for %s: %s", key, e)
+
+
+_shared_backend: Optional[SharedCacheBackend] = None
+_shared_backend_loaded = False
+
+
+def get_shared_cache_backend() -> Optional[SharedCacheBackend]:
+    """
+    Return the configured shared cache tier, or None for in-process only.
+
+    The backend is built once from SHARED_CACHE_URL. A missing optional
+    dependency degrades to in-process caching with a warning.
+    """
+    global _shared_backend, _shared_backend_loaded
+    if _shared_backend_loaded:
+        return _shared_backend
+
+    from utils.config import settings
+
+    _shared_backend_loaded = True
+    if settings.SHARED_CACHE_URL:
+        try:
+            _shared_backend = RedisCacheBackend(settings.SHARED_CACHE_URL)
+        except ImportError:
+            logger.warning("SHARED_CACHE_URL set but redis is not installed - using in-process cache only")
+    return _shared_backend
+
+
+class TieredCache:
+    """
+    In-process TTL/LRU cache in front of an optional shared tier.
+
+    Reads check the local tier first and fill it from the shared tier on a
+    hit there; writes and deletes go to both. Values must be JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        maxsize: int = 1024,
+        ttl_seconds: float = 300.0,
+        shared: Optional[SharedCacheBackend] = None,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.local: TTLCache[Any] = TTLCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self.shared = shared
+
+    def _shared_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key from the nearest tier, or None"""
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+
+        raw = await self.shared.get(self._shared_key(key))
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store value in both tiers"""
+        self.local.set(key, value)
+        if self.shared is not None:
+            await self.shared.set(self._shared_key(key), json.dumps(value), self.ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        """Remove key from both tiers"""
+        self.local.delete(key)
+        if self.shared is not None:
+            await self.shared.delete(self._shared_key(key))
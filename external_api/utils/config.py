@@ -3,7 +3,7 @@ Configuration settings for the FastAPI application
 """
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 from functools import lru_cache
 import os
 
@@ -16,6 +16,12 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # Production server (serve.py)
+    WEB_CONCURRENCY: Optional[int] = None  # worker processes; serve.py defaults it to the available CPUs
+    WEB_CONCURRENCY_MAX: int = 8
+    SHUTDOWN_GRACE_SECONDS: float = 25.0  # drain in-flight requests for up to this long on SIGTERM
+    KEEP_ALIVE_SECONDS: int = 75  # above the load balancer's idle timeout, so it closes first
+    WARM_UP_ENABLED: bool = True  # build deferred clients in the background after startup
 
     # CORS settings
     ALLOWED_ORIGINS: List[str] = [
@@ -27,16 +33,92 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Verified tokens are remembered (never past their exp) to skip re-verification
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = 300
 
     # Database settings (uncomment and configure as needed)
     DATABASE_URL: str = os.getenv("DATABASE_URL")
     # DATABASE_ECHO: bool = False
-    # DATABASE_POOL_SIZE: int = 5
-    # DATABASE_MAX_OVERFLOW: int = 10
+    # Connections this deployment may open across all WEB_CONCURRENCY workers
+    # (plus serve.py's job worker) and both engines (e.g. the Neon compute's
+    # max_connections minus headroom for migrations and separately deployed
+    # job workers). Unset: 5 + 10 overflow per engine per worker.
+    DATABASE_MAX_CONNECTIONS: Optional[int] = None
+    DATABASE_POOL_PROCESSES: Optional[int] = None  # processes sharing DATABASE_MAX_CONNECTIONS; set by serve.py
+    DATABASE_SYNC_POOL_SHARE: float = 0.25  # share of a worker's connections for the sync engine (manual search)
+    # Optional read replica for read-only endpoints (e.g. GET /api/v1/wills);
+    # unset, everything reads from DATABASE_URL
+    READ_DATABASE_URL: Optional[str] = None
+    # Reads go to the primary for this long after the user's own writes
+    READ_YOUR_WRITES_SECONDS: float = 5.0
 
     # Clerk settings
     CLERK_SECRET_KEY: str = os.getenv("CLERK_SECRET_KEY", "")
     CLERK_API_BASE_URL: str = "https://api.clerk.com/v1"
+    # Shared Clerk HTTP client (one pool per worker, kept alive across requests)
+    CLERK_HTTP_MAX_CONNECTIONS: int = 20
+    CLERK_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    CLERK_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    CLERK_HTTP_CONNECT_TIMEOUT: float = 5.0
+    CLERK_HTTP_READ_TIMEOUT: float = 15.0
+    CLERK_HTTP2: bool = True
+
+    # User resolution cache (email -> Clerk ID and User.id)
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 900
+    # Optional shared cache tier across workers, e.g. redis://host:6379/0
+    SHARED_CACHE_URL: Optional[str] = None
+
+    # OpenAI settings (manual search embeddings)
+    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-large"
+
+    # Manual search settings
+    MANUAL_EMBEDDING_DIMENSIONS: int = 1536
+    MANUAL_SEARCH_JURISDICTION: str = "South Africa"
+    MANUAL_SEARCH_CACHE_SIZE: int = 1024
+    MANUAL_SEARCH_CACHE_TTL_SECONDS: int = 3600
+    # ANN index search parameters. The file written by chunking/tune_ann.py
+    # is authoritative for the parameters it sets (same MANUAL_ANN_SETTINGS
+    # variable as chunking/query_manual.py; empty disables it); the
+    # MANUAL_SEARCH_* values below apply only to parameters the file does
+    # not set, e.g. where it is not deployed. Unset = server default.
+    MANUAL_ANN_SETTINGS: str = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "chunking",
+        "ann_settings.json",
+    )
+    MANUAL_SEARCH_HNSW_EF_SEARCH: Optional[int] = None
+    MANUAL_SEARCH_IVFFLAT_PROBES: Optional[int] = None
+
+    # Idempotency-Key handling for create-will
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = 60  # in-progress claims older than this are taken over
+    IDEMPOTENCY_WAIT_TIMEOUT_SECONDS: int = 30  # how long duplicates wait for the original
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_CACHE_TTL_SECONDS: int = 600
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 3600.0  # delete expired keys this often; 0 disables
+
+    # Background jobs (worker.py)
+    JOBS_ENABLED: bool = False  # enqueue follow-up jobs on will creation; needs a running worker
+    SERVE_JOB_WORKER: bool = True  # serve.py runs worker.py alongside the API when JOBS_ENABLED
+    WORKER_CONCURRENCY: int = 4
+    WORKER_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 5.0
+    JOB_RETRY_MAX_SECONDS: float = 600.0
+    JOB_TIMEOUT_SECONDS: float = 120.0
+    JOB_LOCK_TIMEOUT_SECONDS: int = 600  # running jobs older than this are reclaimed (keep above JOB_TIMEOUT_SECONDS)
+    JOB_RETENTION_SECONDS: int = 7 * 86400  # done and failed jobs are deleted after this long
+    JOB_PURGE_INTERVAL_SECONDS: float = 3600.0
+
+    # Bulk will submission
+    BULK_WILL_MAX_ITEMS: int = 5000
+    BULK_WILL_INSERT_BATCH_SIZE: int = 500
+
+    # PATCH /api/v1/wills/{id}
+    WILL_PATCH_MAX_OPERATIONS: int = 100
 
     # MongoDB settings (alternative)
     # MONGODB_URL: str = "mongodb://localhost:27017"
@@ -46,9 +128,13 @@ class Settings(BaseSettings):
     # EXTERNAL_API_KEY: str = ""
     # EXTERNAL_API_URL: str = ""
 
-    # Logging settings
+    # Logging settings (queued, see utils/log.py)
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "app.log"
+    LOG_FORMAT: str = "json"  # json or text
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped rather than blocking requests
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01  # fraction of requests that log at DEBUG
+    LOG_DEBUG_LOGGERS: List[str] = ["main", "__main__", "services", "utils"]  # loggers that may log sampled DEBUG
 
     # Email settings (for notifications)
     # SMTP_HOST: str = ""
@@ -61,8 +147,32 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 10485760  # 10MB in bytes
     ALLOWED_FILE_TYPES: List[str] = ["pdf", "jpg", "jpeg", "png"]
 
-    # Rate limiting
-    RATE_LIMIT_PER_MINUTE: int = 60
+    # Readiness probe: background DB health sampling (utils/health.py)
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 10.0
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_CHECK_STALE_SECONDS: float = 30.0  # not ready if the last check is older
+
+    # Rate limiting (token buckets, see utils/rate_limit.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_MINUTE: int = 60  # per authenticated user
+    RATE_LIMIT_BURST: Optional[int] = None  # user bucket size; default RATE_LIMIT_PER_MINUTE
+    RATE_LIMIT_IP_PER_MINUTE: int = 300  # per client IP, authenticated or not
+    RATE_LIMIT_IP_BURST: Optional[int] = None
+    RATE_LIMIT_SHARED: bool = False  # enforce across workers via SHARED_CACHE_URL
+    RATE_LIMIT_MAX_KEYS: int = 100000  # in-process buckets kept (LRU)
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # client IP from X-Forwarded-For; only behind a proxy that sets it (App Runner)
+    RATE_LIMIT_EXEMPT_PATHS: List[str] = ["/", "/health", "/livez", "/readyz", "/metrics", "/docs", "/redoc", "/openapi.json"]
+
+    # Per-request profiling (utils/profiling.py); the middleware is only
+    # installed when enabled
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""  # X-Profile-Token value that profiles a request and reads /admin/profiles
+    PROFILING_SAMPLE_RATE: float = 0.0  # fraction of requests profiled without the header
+    PROFILING_INTERVAL_MS: float = 1.0
+    PROFILING_TRACEMALLOC: bool = True  # allocation deltas (slows the profiled request)
+    PROFILING_ALLOCATION_TOP: int = 25
+    PROFILING_KEEP: int = 50  # profiles kept in memory
+    PROFILING_DIR: str = ""  # also write profiles here (JSON + collapsed stacks)
 
     # Feature flags
     ENABLE_SWAGGER: bool = True
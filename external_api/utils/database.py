@@ -3,26 +3,360 @@ Database configuration and session management for FastAPI application
 """
 
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url, URL
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from typing import Any, AsyncGenerator, Dict, Generator, Iterator, Optional, Tuple
 import logging
+import threading
+import time
+import orjson
 
+from utils import metrics
+from utils.cache import SharedCacheBackend, TieredCache, get_shared_cache_backend
 from utils.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # Enable connection health checks
-    pool_size=5,  # Number of connections to maintain
-    max_overflow=10,  # Max additional connections when pool is full
-    echo=False,  # Set to True for SQL query logging
+
+def json_serializer(value: Any) -> str:
+    """
+    Serialize JSON/JSONB bind values with orjson.
+
+    Pre-encoded JSON bytes (e.g. WillContent.canonical_json()) pass straight
+    through instead of being parsed and serialized again.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode()
+    return orjson.dumps(value).decode()
+
+
+def worker_pool_limits(
+    max_connections: Optional[int],
+    workers: int,
+    sync_share: float,
+) -> Dict[str, Tuple[int, int]]:
+    """
+    Split a deployment-wide connection budget into per-engine pool limits.
+
+    Each worker process gets max_connections // workers connections,
+    divided between the async engine (request handlers) and the sync
+    engine (manual search threads) by sync_share. Half of an engine's
+    connections are kept open (pool_size) and the rest are overflow,
+    opened under load and closed when returned.
+
+    Args:
+        max_connections: Budget for all workers, or None for the defaults
+        workers: Worker processes sharing the budget
+        sync_share: Fraction of a worker's connections for the sync engine
+
+    Returns:
+        {"async": (pool_size, max_overflow), "sync": (pool_size, max_overflow)}
+    """
+    if not max_connections:
+        return {"async": (5, 10), "sync": (5, 10)}
+
+    per_worker = max_connections // max(1, workers)
+    if per_worker < 2:
+        logger.warning(
+            "DATABASE_MAX_CONNECTIONS=%d leaves %d per worker for %d workers - using one connection per engine",
+            max_connections,
+            per_worker,
+            workers,
+        )
+        per_worker = 2
+    sync_connections = min(per_worker - 1, max(1, round(per_worker * sync_share)))
+    limits = {}
+    for name, connections in (("async", per_worker - sync_connections), ("sync", sync_connections)):
+        pool_size = (connections + 1) // 2
+        limits[name] = (pool_size, connections - pool_size)
+    return limits
+
+
+_pool_limits = worker_pool_limits(
+    settings.DATABASE_MAX_CONNECTIONS,
+    settings.DATABASE_POOL_PROCESSES or settings.WEB_CONCURRENCY or 1,
+    settings.DATABASE_SYNC_POOL_SHARE,
+)
+
+POOL_CHECKOUT_DURATION = metrics.histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a connection from the pool, including waiting for one and connecting",
+    ("pool",),
+)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool recording checkout time in db_pool_checkout_seconds"""
+
+    metrics_label = "sync"
+    # Log as SQLAlchemy's pool (WARNING by default), not under utils.*
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.QueuePool"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_DURATION.observe(time.perf_counter() - start, self.metrics_label)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording checkout time in db_pool_checkout_seconds"""
+
+    metrics_label = "async"
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_DURATION.observe(time.perf_counter() - start, self.metrics_label)
+
+
+class TimedReplicaQueuePool(TimedAsyncQueuePool):
+    """Pool of the read replica engine, reported as pool="replica" in the metrics"""
+
+    metrics_label = "replica"
+
+
+def build_async_url(database_url: str) -> Tuple[URL, Dict[str, Any]]:
+    """
+    Derive the asyncpg URL and connect args from a libpq-style DATABASE_URL.
+
+    asyncpg does not understand libpq query options such as sslmode or
+    channel_binding, so they are stripped from the URL and sslmode is passed
+    through as asyncpg's ssl argument instead.
+
+    Args:
+        database_url: Connection string used by the synchronous engine
+
+    Returns:
+        Tuple of (asyncpg URL, connect_args)
+    """
+    url = make_url(database_url)
+    query = dict(url.query)
+    connect_args: Dict[str, Any] = {}
+
+    sslmode = query.pop("sslmode", None)
+    query.pop("channel_binding", None)
+    if sslmode:
+        connect_args["ssl"] = sslmode
+
+    return url.set(drivername="postgresql+asyncpg", query=query), connect_args
+
+
+# Engines and session factories are built on first use (or by the startup
+# warm-up) rather than at import: loading the psycopg2 and asyncpg dialects
+# is a large share of cold-start import time. The module attributes engine,
+# SessionLocal, async_engine and AsyncSessionLocal resolve through
+# __getattr__ below, so existing imports keep working.
+_build_lock = threading.Lock()
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+_read_async_engine: Optional[AsyncEngine] = None
+_read_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_engine() -> Engine:
+    """Synchronous engine (psycopg2), used from worker threads and scripts"""
+    global _engine
+    if _engine is None:
+        with _build_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    settings.DATABASE_URL,
+                    poolclass=TimedQueuePool,
+                    json_serializer=json_serializer,
+                    json_deserializer=orjson.loads,
+                    pool_pre_ping=True,  # Enable connection health checks
+                    pool_size=_pool_limits["sync"][0],  # Number of connections to maintain
+                    max_overflow=_pool_limits["sync"][1],  # Max additional connections when pool is full
+                    echo=False,  # Set to True for SQL query logging
+                )
+    return _engine
+
+
+def get_sessionmaker() -> sessionmaker:
+    """Factory for synchronous sessions"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _session_factory
+
+
+def _build_async_engine(database_url: str, poolclass: type) -> AsyncEngine:
+    async_url, connect_args = build_async_url(database_url)
+    return create_async_engine(
+        async_url,
+        connect_args=connect_args,
+        poolclass=poolclass,
+        json_serializer=json_serializer,
+        json_deserializer=orjson.loads,
+        pool_pre_ping=True,
+        pool_size=_pool_limits["async"][0],
+        max_overflow=_pool_limits["async"][1],
+        echo=False,
+    )
+
+
+def _build_async_sessionmaker(bind: AsyncEngine) -> async_sessionmaker:
+    # expire_on_commit=False: attributes stay loaded after commit, since
+    # lazy refreshes are not possible outside an awaited call
+    return async_sessionmaker(bind, autoflush=False, expire_on_commit=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """Async engine used by request handlers so DB round trips never block the event loop"""
+    global _async_engine
+    if _async_engine is None:
+        with _build_lock:
+            if _async_engine is None:
+                _async_engine = _build_async_engine(settings.DATABASE_URL, TimedAsyncQueuePool)
+    return _async_engine
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Factory for async sessions"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = _build_async_sessionmaker(get_async_engine())
+    return _async_session_factory
+
+
+def get_read_async_engine() -> AsyncEngine:
+    """
+    Async engine for READ_DATABASE_URL (the primary's engine when unset).
+
+    The replica is a separate server, so its pool takes the same per-worker
+    limits as the primary's async pool rather than a share of them.
+    """
+    global _read_async_engine
+    if not settings.READ_DATABASE_URL:
+        return get_async_engine()
+    if _read_async_engine is None:
+        with _build_lock:
+            if _read_async_engine is None:
+                _read_async_engine = _build_async_engine(settings.READ_DATABASE_URL, TimedReplicaQueuePool)
+    return _read_async_engine
+
+
+def get_read_async_sessionmaker() -> async_sessionmaker:
+    """Factory for async sessions on the read replica (or the primary when none is configured)"""
+    global _read_async_session_factory
+    if not settings.READ_DATABASE_URL:
+        return get_async_sessionmaker()
+    if _read_async_session_factory is None:
+        _read_async_session_factory = _build_async_sessionmaker(get_read_async_engine())
+    return _read_async_session_factory
+
+
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "SessionLocal": get_sessionmaker,
+    "async_engine": get_async_engine,
+    "AsyncSessionLocal": get_async_sessionmaker,
+}
+
+
+def __getattr__(name: str) -> Any:
+    factory = _LAZY_ATTRIBUTES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
+
+
+async def dispose_engines() -> None:
+    """Close pooled connections of the engines that were built"""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _read_async_engine is not None:
+        await _read_async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+
+
+def _pool_samples() -> Iterator[Tuple[Tuple[str, str], int]]:
+    for label, built in (("sync", _engine), ("async", _async_engine), ("replica", _read_async_engine)):
+        if built is None:
+            continue
+        pool = built.pool
+        yield (label, "size"), pool.size()
+        yield (label, "checked_out"), pool.checkedout()
+        yield (label, "checked_in"), pool.checkedin()
+        yield (label, "overflow"), pool.overflow()
+
+
+metrics.gauge(
+    "db_pool_connections",
+    "Connection pool counters of the engines built so far (overflow is negative while below pool_size)",
+    ("pool", "state"),
+    _pool_samples,
+)
+
+READ_ROUTING = metrics.counter(
+    "db_read_routing_total",
+    "Read-only sessions by the database that served them and why",
+    ("target",),
 )
 
-# Create SessionLocal class for database sessions
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+class ReadRouter:
+    """
+    Chooses the database for read-only requests.
+
+    Reads go to the replica (READ_DATABASE_URL) unless the same caller
+    wrote within READ_YOUR_WRITES_SECONDS: replicas apply the primary's
+    changes asynchronously, so a user listing their wills right after
+    creating or patching one is served by the primary and sees the write.
+    Recent writers are tracked in a TieredCache, so the window holds across
+    workers when SHARED_CACHE_URL is set and per worker otherwise.
+    """
+
+    def __init__(self, window_seconds: float, shared: Optional[SharedCacheBackend] = None):
+        self.window_seconds = window_seconds
+        self._recent_writes = TieredCache(
+            namespace="recent-write",
+            maxsize=10000,
+            ttl_seconds=window_seconds,
+            shared=shared,
+        )
+
+    @property
+    def has_replica(self) -> bool:
+        return bool(settings.READ_DATABASE_URL)
+
+    async def record_write(self, key: str) -> None:
+        """Route key's reads to the primary for the next window_seconds"""
+        if self.has_replica and self.window_seconds > 0:
+            await self._recent_writes.set(key, True)
+
+    async def sessionmaker_for(self, key: Optional[str]) -> async_sessionmaker:
+        """
+        Session factory for a read on behalf of key (usually the user's email).
+
+        Args:
+            key: Caller whose recent writes the read must see, or None
+
+        Returns:
+            The replica's session factory, or the primary's within the window
+        """
+        if not self.has_replica:
+            READ_ROUTING.inc("primary")
+            return get_async_sessionmaker()
+        if key is not None and await self._recent_writes.get(key):
+            READ_ROUTING.inc("primary_recent_write")
+            return get_async_sessionmaker()
+        READ_ROUTING.inc("replica")
+        return get_read_async_sessionmaker()
+
+
+read_router = ReadRouter(settings.READ_YOUR_WRITES_SECONDS, shared=get_shared_cache_backend())
 
 # Create Base class for declarative models
 Base = declarative_base()
@@ -41,13 +375,29 @@ def get_db() -> Generator[Session, None, None]:
             # Use db session here
             pass
     """
-    db = SessionLocal()
+    db = get_sessionmaker()()
     try:
         yield db
     finally:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency that provides an async database session.
+
+    Yields:
+        AsyncSession: SQLAlchemy async database session
+
+    Usage:
+        @app.get("/endpoint")
+        async def endpoint(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(...)
+    """
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
 async def test_db_connection() -> bool:
     """
     Test database connection health.
@@ -56,14 +406,11 @@ async def test_db_connection() -> bool:
         bool: True if connection successful, False otherwise
     """
     try:
-        db = SessionLocal()
-        try:
+        async with get_async_sessionmaker()() as db:
             # Execute simple query to test connection
-            db.execute(text("SELECT 1"))
+            await db.execute(text("SELECT 1"))
             logger.info("Database connection test successful")
             return True
-        finally:
-            db.close()
     except Exception as e:
-        logger.error(f"Database connection test failed: {str(e)}")
+        logger.error("Database connection test failed: %s", e)
         return False
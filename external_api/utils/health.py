@@ -0,0 +1,145 @@
+"""
+Background database health sampling for the readiness probe
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Optional, Union
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def pool_stats(engine: AsyncEngine) -> Dict[str, int]:
+    """Connection pool counters (no I/O)"""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
+class HealthMonitor:
+    """
+    Samples database health on an interval so probes never touch the pool.
+
+    A background task runs SELECT 1 every interval_seconds and keeps the
+    outcome and the recent latencies. Probes read that state; the database
+    sees one health query per interval per worker no matter how often the
+    load balancer checks.
+    """
+
+    def __init__(
+        self,
+        engine: Union[AsyncEngine, Callable[[], AsyncEngine]],
+        interval_seconds: float = 10.0,
+        timeout_seconds: float = 2.0,
+        stale_after_seconds: float = 30.0,
+        window: int = 30,
+    ):
+        self._engine = engine
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self.db_ok = False
+        self.last_checked: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._last_checked_monotonic: Optional[float] = None
+        self._latencies_ms: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """The monitored engine (a factory is called on first use, so the engine is built lazily)"""
+        if callable(self._engine):
+            self._engine = self._engine()
+        return self._engine
+
+    async def start(self) -> None:
+        """Start sampling in the background (first check runs immediately)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval_seconds)
+
+    async def _query(self) -> None:
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check(self) -> bool:
+        """Run one health query and record the outcome"""
+        start = time.perf_counter()
+        try:
+            # Bounds connecting as well as the query
+            await asyncio.wait_for(self._query(), timeout=self.timeout_seconds)
+        except Exception as e:
+            if self.db_ok or self.last_checked is None:
+                logger.error("Database health check failed: %s: %s", type(e).__name__, e)
+            self.db_ok = False
+            self.last_error = f"{type(e).__name__}: {str(e)}"
+        else:
+            if not self.db_ok and self.last_checked is not None:
+                logger.info("Database health check recovered")
+            self.db_ok = True
+            self.last_error = None
+            self._latencies_ms.append((time.perf_counter() - start) * 1000)
+        self.last_checked = datetime.utcnow()
+        self._last_checked_monotonic = time.monotonic()
+        return self.db_ok
+
+    @property
+    def ready(self) -> bool:
+        """Last check succeeded and is recent"""
+        return (
+            self.db_ok
+            and self._last_checked_monotonic is not None
+            and time.monotonic() - self._last_checked_monotonic <= self.stale_after_seconds
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current health state and pool counters (no I/O)"""
+        latencies = list(self._latencies_ms)
+        return {
+            "ready": self.ready,
+            "db": {
+                "status": "connected" if self.db_ok else ("unknown" if self.last_checked is None else "disconnected"),
+                "last_checked": self.last_checked,
+                "latency_ms": round(latencies[-1], 2) if latencies else None,
+                "latency_avg_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+                "latency_max_ms": round(max(latencies), 2) if latencies else None,
+                "error": self.last_error,
+            },
+            "pool": pool_stats(self.engine),
+        }
+
+
+def build_health_monitor(engine: Union[AsyncEngine, Callable[[], AsyncEngine]]) -> HealthMonitor:
+    """HealthMonitor configured from settings"""
+    return HealthMonitor(
+        engine,
+        interval_seconds=settings.HEALTH_CHECK_INTERVAL_SECONDS,
+        timeout_seconds=settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+        stale_after_seconds=settings.HEALTH_CHECK_STALE_SECONDS,
+    )
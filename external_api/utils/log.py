@@ -0,0 +1,216 @@
+"""
+Non-blocking structured logging
+
+Records are handed to a bounded in-memory queue by the thread that logs
+them; a single listener thread formats them (JSON by default) and writes
+them to stdout. Request handlers never wait on log I/O: when the queue is
+full, records are dropped and counted instead.
+
+Debug records from the application's loggers are sampled per request:
+RequestContextMiddleware picks LOG_DEBUG_SAMPLE_RATE of requests, and only
+those requests emit their DEBUG lines, so a sampled request carries its
+full step-by-step trail under one request_id. The decision is made by the
+logger before a record is built, so unsampled DEBUG calls stay cheap.
+
+Log with %-style arguments (logger.debug("User %s", email)) rather than
+f-strings, so records that are filtered out are never formatted.
+"""
+
+import atexit
+import contextvars
+import logging
+import queue
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+
+from utils.config import settings
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+REQUEST_ID_HEADER = "X-Request-ID"
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+debug_sampled_var: contextvars.ContextVar[bool] = contextvars.ContextVar("debug_sampled", default=False)
+
+# LogRecord attributes; anything else on a record came from extra={...}
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, request_id, extras"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The caller only merges the %-args into the message and renders any
+    traceback (both must happen before the objects they reference change),
+    then enqueues without blocking.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        request_id = request_id_var.get()
+        if request_id is not None:
+            record.request_id = request_id
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SampledDebugLogger(logging.Logger):
+    """
+    Logger that logs below threshold only in requests selected for debug
+    logging.
+
+    The check runs in isEnabledFor, before logger.debug() looks up the
+    caller or builds a LogRecord, so outside sampled requests a DEBUG call
+    costs a level check and a context variable read.
+    """
+
+    threshold = logging.NOTSET
+
+    def isEnabledFor(self, level: int) -> bool:
+        if level < self.threshold and not debug_sampled_var.get():
+            return False
+        return super().isEnabledFor(level)
+
+
+def sample_debug_logging(names: Iterable[str], threshold: int) -> None:
+    """
+    Let the named loggers (and their children) log below threshold, but
+    only in sampled requests.
+
+    Loggers that already exist (module-level loggers of imported modules)
+    are switched to SampledDebugLogger and later ones are created as one.
+    Below threshold it only ever disables logging, so other libraries'
+    loggers are unaffected.
+
+    Args:
+        names: Logger names, e.g. LOG_DEBUG_LOGGERS
+        threshold: Level at or above which records are always created
+    """
+    names = tuple(names)
+    prefixes = tuple(f"{name}." for name in names)
+    SampledDebugLogger.threshold = threshold
+    logging.setLoggerClass(SampledDebugLogger)
+    for name, logger in list(logging.Logger.manager.loggerDict.items()):
+        if type(logger) is logging.Logger and (name in names or name.startswith(prefixes)):
+            logger.__class__ = SampledDebugLogger
+    for name in names:
+        logging.getLogger(name).setLevel(logging.DEBUG)
+
+
+def configure_logging() -> QueueHandler:
+    """
+    Route the root logger (and uvicorn's loggers) through the queue.
+
+    Safe to call more than once; later calls return the installed handler.
+
+    Returns:
+        The queue handler installed on the root logger
+    """
+    global _listener
+    root = logging.getLogger()
+    if _listener is not None:
+        return root.handlers[0]
+
+    level = logging.getLevelName(settings.LOG_LEVEL.upper())
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JSONFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    handler = ContextQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    if level > logging.DEBUG and settings.LOG_DEBUG_SAMPLE_RATE > 0:
+        sample_debug_logging(settings.LOG_DEBUG_LOGGERS, level)
+
+    root.handlers = [handler]
+    root.setLevel(level)
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(handler.queue, stream)
+    _listener.start()
+    # Flush what is still queued when the process exits
+    atexit.register(_listener.stop)
+    return handler
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware tagging each request's log records.
+
+    Uses the incoming X-Request-ID (e.g. from the load balancer) or a new
+    one, echoes it on the response, and decides whether the request logs
+    at DEBUG.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.debug_sample_rate = settings.LOG_DEBUG_SAMPLE_RATE
+        self.header = REQUEST_ID_HEADER.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = _header(scope["headers"], self.header)
+        request_id = incoming.decode("latin-1")[:128] if incoming else uuid.uuid4().hex
+        id_token = request_id_var.set(request_id)
+        sampled_token = debug_sampled_var.set(random.random() < self.debug_sample_rate)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (self.header, request_id.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(id_token)
+            debug_sampled_var.reset(sampled_token)
@@ -0,0 +1,338 @@
+"""
+Opt-in per-request sampling profiler
+
+A request is profiled when it carries X-Profile-Token matching
+PROFILING_TOKEN, or when it is picked at PROFILING_SAMPLE_RATE. While it
+runs, a background thread samples the request's asyncio task every
+PROFILING_INTERVAL_MS:
+
+- if the task is running, the sample is its coroutine chain plus the
+  synchronous frames it is executing (pydantic validation, SQLAlchemy
+  statement compilation, JSON encoding...)
+- if the task is suspended, the sample is its coroutine chain ending in
+  "<await>", so time spent waiting on Postgres or Clerk shows up under the
+  call that awaits it
+
+Each sample is weighted by the time since the previous one (a CPU-bound
+request holds the GIL, which delays the sampler), and stacks are
+aggregated in microseconds in the collapsed format used by flamegraph.pl
+and speedscope. With PROFILING_TRACEMALLOC, allocations made during the
+request are compared with a snapshot taken at its start.
+
+Profiles are kept in memory (served by /admin/profiles) and optionally
+written to PROFILING_DIR. The middleware is only installed when
+PROFILING_ENABLED is set, so there is no cost when profiling is off.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import CodeType, FrameType
+from typing import Any, Deque, Dict, List, Optional
+
+import orjson
+
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+AWAIT_FRAME = "<await>"
+
+_labels: Dict[CodeType, str] = {}
+
+
+def _label(code: CodeType) -> str:
+    label = _labels.get(code)
+    if label is None:
+        label = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        _labels[code] = label
+    return label
+
+
+def _coroutine_frames(awaitable: Any) -> List[FrameType]:
+    """Frames of a coroutine chain, outermost first, following what each one awaits"""
+    frames = []
+    while awaitable is not None:
+        frame = (
+            getattr(awaitable, "cr_frame", None)
+            or getattr(awaitable, "gi_frame", None)
+            or getattr(awaitable, "ag_frame", None)
+        )
+        if frame is None:
+            # A future (or a finished coroutine): the end of the chain
+            break
+        frames.append(frame)
+        awaitable = (
+            getattr(awaitable, "cr_await", None)
+            or getattr(awaitable, "gi_yieldfrom", None)
+            or getattr(awaitable, "ag_await", None)
+        )
+    return frames
+
+
+@dataclass
+class Profile:
+    """One profiled request"""
+    id: str
+    method: str
+    path: str
+    started_at: datetime
+    interval_ms: float
+    route: Optional[str] = None
+    status: Optional[int] = None
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    samples: int = 0
+    running_ms: float = 0.0
+    waiting_ms: float = 0.0
+    stacks: Counter = field(default_factory=Counter)
+    memory_peak_kb: Optional[float] = None
+    allocations: List[Dict[str, Any]] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at,
+            "wall_ms": round(self.wall_ms, 2),
+            "cpu_ms": round(self.cpu_ms, 2),
+            "samples": self.samples,
+            "running_ms": round(self.running_ms, 2),
+            "waiting_ms": round(self.waiting_ms, 2),
+        }
+
+    def to_dict(self, top: int = 50) -> Dict[str, Any]:
+        """Summary plus the most sampled stacks and allocation deltas"""
+        return {
+            **self.summary(),
+            "interval_ms": self.interval_ms,
+            "stacks": [{"stack": stack, "us": us} for stack, us in self.stacks.most_common(top)],
+            "memory_peak_kb": self.memory_peak_kb,
+            "allocations": self.allocations,
+        }
+
+    def collapsed(self) -> str:
+        """All stacks in collapsed format ("outer;inner microseconds" per line)"""
+        return "".join(f"{stack} {us}\n" for stack, us in self.stacks.most_common())
+
+
+class TaskSampler:
+    """
+    Background thread sampling one asyncio task.
+
+    Reading another thread's frames takes the GIL, so each sample briefly
+    pauses the event loop; that overhead only applies to profiled requests.
+    """
+
+    def __init__(self, task: asyncio.Task, interval_ms: float):
+        self.task = task
+        self.thread_id = threading.get_ident()
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.running_us = 0
+        self.waiting_us = 0
+        self._last = time.perf_counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        now = time.perf_counter()
+        weight = round((now - self._last) * 1e6)
+        self._last = now
+        chain = _coroutine_frames(self.task.get_coro())
+        if not chain:
+            return
+        innermost = chain[-1]
+
+        # Synchronous frames the task is executing on the loop thread, above
+        # its innermost coroutine frame (absent while the task is suspended)
+        running: List[FrameType] = []
+        frame = sys._current_frames().get(self.thread_id)
+        while frame is not None and frame is not innermost:
+            running.append(frame)
+            frame = frame.f_back
+
+        labels = [_label(f.f_code) for f in chain]
+        if frame is innermost:
+            labels.extend(_label(f.f_code) for f in reversed(running))
+            self.running_us += weight
+        else:
+            labels.append(AWAIT_FRAME)
+            self.waiting_us += weight
+        self.stacks[";".join(labels)] += weight
+        self.samples += 1
+
+
+class ProfileStore:
+    """The most recent profiles, optionally also written to a directory"""
+
+    def __init__(self, keep: int = 50, directory: str = ""):
+        self.directory = directory
+        self._profiles: Deque[Profile] = deque(maxlen=keep)
+
+    def add(self, profile: Profile) -> None:
+        self._profiles.append(profile)
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                name = f"{profile.started_at:%Y%m%dT%H%M%S}-{profile.method}-{profile.id}"
+                with open(os.path.join(self.directory, f"{name}.json"), "wb") as f:
+                    f.write(orjson.dumps(profile.to_dict(top=1000), option=orjson.OPT_INDENT_2))
+                with open(os.path.join(self.directory, f"{name}.collapsed"), "w") as f:
+                    f.write(profile.collapsed())
+            except OSError as e:
+                logger.warning("Could not write profile %s: %s", profile.id, e)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def list(self) -> List[Profile]:
+        """Newest first"""
+        return list(reversed(self._profiles))
+
+
+profile_store = ProfileStore(keep=settings.PROFILING_KEEP, directory=settings.PROFILING_DIR)
+
+
+def valid_profile_token(value: Optional[str]) -> bool:
+    """value matches PROFILING_TOKEN (never true when no token is configured)"""
+    token = settings.PROFILING_TOKEN
+    return bool(token and value) and secrets.compare_digest(value.encode(), token.encode())
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests selected by header or sample rate.
+
+    Profiled responses carry X-Profile-Id; fetch the result from
+    /admin/profiles/{id} (with the same X-Profile-Token) or PROFILING_DIR.
+    """
+
+    def __init__(self, app, store: Optional[ProfileStore] = None):
+        self.app = app
+        self.store = store or profile_store
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.interval_ms = settings.PROFILING_INTERVAL_MS
+        self.trace_memory = settings.PROFILING_TRACEMALLOC
+        self.allocation_top = settings.PROFILING_ALLOCATION_TOP
+        self.header = PROFILE_TOKEN_HEADER.lower().encode()
+        self._memory_profiles = 0
+        self._owns_tracing = False
+
+    def selected(self, scope: Dict) -> bool:
+        if scope["type"] != "http" or scope["path"].startswith("/admin/profiles"):
+            return False
+        for key, value in scope["headers"]:
+            if key == self.header:
+                return valid_profile_token(value.decode("latin-1"))
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if not self.selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(
+            id=uuid.uuid4().hex[:16],
+            method=scope["method"],
+            path=scope["path"],
+            started_at=datetime.utcnow(),
+            interval_ms=self.interval_ms,
+        )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (PROFILE_ID_HEADER.lower().encode(), profile.id.encode())],
+                }
+            await send(message)
+
+        snapshot = self._start_memory()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        sampler = TaskSampler(asyncio.current_task(), self.interval_ms)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Loop-thread CPU time, which includes any requests interleaved with this one
+            profile.cpu_ms = (time.thread_time() - cpu_start) * 1000
+            profile.wall_ms = (time.perf_counter() - wall_start) * 1000
+            sampler.stop()
+            profile.stacks = sampler.stacks
+            profile.samples = sampler.samples
+            profile.running_ms = sampler.running_us / 1000
+            profile.waiting_ms = sampler.waiting_us / 1000
+            profile.route = getattr(scope.get("route"), "path", None)
+            self._finish_memory(profile, snapshot)
+            self.store.add(profile)
+            logger.info(
+                "Profiled %s %s: %.1fms wall, %.1fms CPU, profile %s",
+                profile.method,
+                profile.path,
+                profile.wall_ms,
+                profile.cpu_ms,
+                profile.id,
+            )
+
+    def _start_memory(self) -> Optional[tracemalloc.Snapshot]:
+        if not self.trace_memory:
+            return None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        self._memory_profiles += 1
+        tracemalloc.reset_peak()
+        return tracemalloc.take_snapshot()
+
+    def _finish_memory(self, profile: Profile, before: Optional[tracemalloc.Snapshot]) -> None:
+        if before is None:
+            return
+        profile.memory_peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        after = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        profile.allocations = [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+            }
+            for stat in after.compare_to(before, "lineno")[: self.allocation_top]
+            if stat.size_diff
+        ]
+        self._memory_profiles -= 1
+        if not self._memory_profiles and self._owns_tracing:
+            # Tracing slows every allocation, so it only runs while a profile does
+            tracemalloc.stop()
+            self._owns_tracing = False
@@ -0,0 +1,214 @@
+"""
+Token-bucket rate limiting per authenticated user and per client IP
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+from utils.auth import email_from_token
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Bucket refill rate (tokens per second) and size"""
+    rate: float
+    capacity: float
+
+    @classmethod
+    def per_minute(cls, requests: int, burst: Optional[int] = None) -> "Limit":
+        return cls(rate=requests / 60.0, capacity=float(burst or requests))
+
+
+class TokenBuckets:
+    """
+    In-process token buckets, one per key.
+
+    Each acquire is a few dict operations. Buckets are refilled lazily from
+    the time since their last use, and the least recently used buckets are
+    dropped beyond max_keys (a dropped bucket starts full again). Only used
+    from the event loop thread, so no locking.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def acquire(self, requests: Sequence[Tuple[str, Limit]]) -> float:
+        """
+        Take one token from every bucket, or none if any is empty.
+
+        Args:
+            requests: (key, limit) per bucket to charge
+
+        Returns:
+            0 if allowed, otherwise seconds until a retry can succeed
+        """
+        now = time.monotonic()
+        buckets = self._buckets
+        states = []
+        wait = 0.0
+        for key, limit in requests:
+            state = buckets.get(key)
+            if state is None:
+                state = [limit.capacity, now]
+                buckets[key] = state
+                if len(buckets) > self.max_keys:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(key)
+                state[0] = min(limit.capacity, state[0] + (now - state[1]) * limit.rate)
+                state[1] = now
+            if state[0] < 1:
+                wait = max(wait, (1 - state[0]) / limit.rate)
+            states.append(state)
+
+        if wait:
+            return wait
+        for state in states:
+            state[0] -= 1
+        return 0.0
+
+
+# Atomic multi-bucket acquire. ARGV: rate, capacity per key. Uses the Redis
+# clock so all workers share one time source.
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tokens = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+  local rate = tonumber(ARGV[2 * i - 1])
+  local capacity = tonumber(ARGV[2 * i])
+  local state = redis.call('HMGET', key, 't', 'ts')
+  local available = tonumber(state[1]) or capacity
+  local last = tonumber(state[2]) or now
+  available = math.min(capacity, available + math.max(0, now - last) * rate)
+  tokens[i] = available
+  if available < 1 then
+    wait = math.max(wait, (1 - available) / rate)
+  end
+end
+for i, key in ipairs(KEYS) do
+  local rate = tonumber(ARGV[2 * i - 1])
+  local capacity = tonumber(ARGV[2 * i])
+  local available = tokens[i]
+  if wait == 0 then
+    available = available - 1
+  end
+  redis.call('HSET', key, 't', available, 'ts', now)
+  redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return tostring(wait)
+"""
+
+
+class RedisTokenBuckets:
+    """
+    Token buckets shared by all workers (requires the optional redis package).
+
+    One script call per request. Backend failures allow the request rather
+    than failing it.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        client = redis.from_url(url, decode_responses=True)
+        self._script = client.register_script(_ACQUIRE_SCRIPT)
+
+    async def acquire(self, requests: Sequence[Tuple[str, Limit]]) -> float:
+        """Same contract as TokenBuckets.acquire"""
+        args: List[float] = []
+        for _, limit in requests:
+            args.extend((limit.rate, limit.capacity))
+        try:
+            return float(await self._script(keys=[f"{self.prefix}:{key}" for key, _ in requests], args=args))
+        except Exception as e:
+            logger.warning("Shared rate limit check failed: %s", e)
+            return 0.0
+
+
+def _header(headers: Sequence[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing per-user and per-IP token buckets.
+
+    The user is the email claim of a valid Bearer token (verified tokens
+    are cached by utils.auth, so this usually costs a dict lookup). Every
+    request is also charged to the client IP, which covers unauthenticated
+    traffic. Rejected requests get 429 with Retry-After.
+    """
+
+    def __init__(self, app, buckets=None):
+        self.app = app
+        self.enabled = settings.RATE_LIMIT_ENABLED
+        self.user_limit = Limit.per_minute(settings.RATE_LIMIT_PER_MINUTE, settings.RATE_LIMIT_BURST)
+        self.ip_limit = Limit.per_minute(settings.RATE_LIMIT_IP_PER_MINUTE, settings.RATE_LIMIT_IP_BURST)
+        self.exempt_paths = frozenset(settings.RATE_LIMIT_EXEMPT_PATHS)
+        self.trust_forwarded_for = settings.RATE_LIMIT_TRUST_FORWARDED_FOR
+        self.buckets = buckets or build_buckets()
+
+    def client_ip(self, scope: Dict) -> str:
+        if self.trust_forwarded_for:
+            forwarded = _header(scope["headers"], b"x-forwarded-for")
+            if forwarded:
+                # Rightmost entry: appended by our load balancer, not the client
+                return forwarded.rsplit(b",", 1)[-1].strip().decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        requests = [(f"ip:{self.client_ip(scope)}", self.ip_limit)]
+        authorization = _header(scope["headers"], b"authorization")
+        if authorization and authorization[:7].lower() == b"bearer ":
+            email = email_from_token(authorization[7:].decode("latin-1").strip())
+            if email:
+                requests.append((f"user:{email}", self.user_limit))
+
+        wait = await self.buckets.acquire(requests)
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        logger.warning("Rate limit exceeded for %s on %s", requests[-1][0], scope["path"])
+        body = orjson.dumps({"detail": "Rate limit exceeded"})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def build_buckets():
+    """Shared buckets when RATE_LIMIT_SHARED and SHARED_CACHE_URL are set, else in-process"""
+    if settings.RATE_LIMIT_SHARED and settings.SHARED_CACHE_URL:
+        try:
+            return RedisTokenBuckets(settings.SHARED_CACHE_URL)
+        except ImportError:
+            logger.warning("RATE_LIMIT_SHARED set but redis is not installed - limiting per process")
+    return TokenBuckets(max_keys=settings.RATE_LIMIT_MAX_KEYS)
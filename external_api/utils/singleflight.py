@@ -0,0 +1,42 @@
+"""
+Per-key coalescing of concurrent async work
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Run at most one in-flight call per key; concurrent callers share its result.
+
+    The work runs in its own task, so a caller being cancelled does not
+    cancel the shared call for everyone else. Exceptions propagate to every
+    waiter. Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await fn() for key, joining the existing call if one is in flight.
+
+        Args:
+            key: Coalescing key (e.g. an email address)
+            fn: Zero-argument coroutine function doing the work
+
+        Returns:
+            The result of the shared call
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
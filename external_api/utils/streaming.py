@@ -0,0 +1,44 @@
+"""
+Helpers for streaming JSON results as NDJSON or Server-Sent Events
+"""
+
+from typing import AsyncIterator, Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+StreamFormat = Literal["ndjson", "sse"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+SSE_DONE = b"event: done\ndata: {}\n\n"
+
+
+def encode_event(item: BaseModel, stream_format: StreamFormat, event: str = "message") -> bytes:
+    """
+    Serialize one model as an NDJSON line or an SSE event.
+
+    Args:
+        item: Pydantic model to serialize
+        stream_format: "ndjson" or "sse"
+        event: SSE event name (ignored for NDJSON)
+
+    Returns:
+        Encoded bytes ready to be written to the response
+    """
+    payload = item.model_dump_json()
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+    return (payload + "\n").encode("utf-8")
+
+
+def streaming_response(body: AsyncIterator[bytes], stream_format: StreamFormat) -> StreamingResponse:
+    """
+    Wrap an async byte iterator in a StreamingResponse with the right
+    media type and no proxy buffering.
+    """
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(body, media_type=MEDIA_TYPES[stream_format], headers=headers)
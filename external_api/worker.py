@@ -0,0 +1,54 @@
+"""
+Background job worker for the Fennec Will Builder API.
+
+Drains the Job table (transactional outbox) written by the API. Run one or
+more alongside the API; workers coordinate through FOR UPDATE SKIP LOCKED.
+serve.py starts one automatically when JOBS_ENABLED is set (unless
+SERVE_JOB_WORKER is off, e.g. when workers are deployed separately).
+
+Usage:
+    python worker.py
+    python worker.py --concurrency 8 --poll-interval 0.5
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+
+import services.jobs  # noqa: F401  (registers job handlers)
+from services.job_queue import JobWorker
+from utils.config import settings
+from utils.database import AsyncSessionLocal, async_engine
+from utils.log import configure_logging
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+
+async def main(concurrency: int, poll_interval: float) -> None:
+    """Run the worker until SIGTERM/SIGINT, then drain in-flight jobs"""
+    worker = JobWorker(
+        AsyncSessionLocal,
+        concurrency=concurrency,
+        poll_interval=poll_interval,
+        purge_interval=settings.JOB_PURGE_INTERVAL_SECONDS,
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the background job worker")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY)
+    parser.add_argument("--poll-interval", type=float, default=settings.WORKER_POLL_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.concurrency, args.poll_interval))
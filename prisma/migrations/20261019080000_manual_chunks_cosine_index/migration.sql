@@ -0,0 +1,10 @@
+-- Retrieval orders by cosine distance (<=>), which the L2 ivfflat index
+-- cannot serve. Replace it with an HNSW index on the cosine operator class.
+
+-- DropIndex
+DROP INDEX IF EXISTS "manual_chunks_embedding_idx";
+
+-- CreateIndex (HNSW for cosine similarity search)
+CREATE INDEX "manual_chunks_embedding_idx" ON "manual_chunks"
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
@@ -0,0 +1,10 @@
+-- AlterTable
+ALTER TABLE "manual_chunks" ADD COLUMN "chunk_index" INT;
+
+-- Backfill from the id suffix (<source>-ch<n>-<section>-<chunk_index>)
+UPDATE "manual_chunks"
+SET "chunk_index" = NULLIF(split_part("id", '-', array_length(string_to_array("id", '-'), 1)), '')::INT
+WHERE "chunk_index" IS NULL AND "id" ~ '-[0-9]+$';
+
+-- CreateIndex (neighbour lookups within a section)
+CREATE INDEX "manual_chunks_section_chunk_idx" ON "manual_chunks"("source", "section_number", "chunk_index");
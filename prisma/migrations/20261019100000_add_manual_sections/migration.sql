@@ -0,0 +1,28 @@
+-- CreateTable (section-level routing index for manual_chunks)
+CREATE TABLE "manual_sections" (
+    "id" TEXT NOT NULL,
+    "source" TEXT NOT NULL,
+    "edition" TEXT,
+    "chapter_number" INT,
+    "chapter_title" TEXT,
+    "section_number" TEXT NOT NULL,
+    "section_title" TEXT,
+    "parent_section_number" TEXT,
+    "jurisdiction" TEXT,
+    "summary" TEXT,
+    "chunk_count" INT NOT NULL DEFAULT 0,
+    "embedding" vector(1536),
+
+    CONSTRAINT "manual_sections_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "manual_sections_source_section_key" ON "manual_sections"("source", "section_number");
+
+-- CreateIndex
+CREATE INDEX "manual_sections_source_parent_idx" ON "manual_sections"("source", "parent_section_number");
+
+-- CreateIndex (HNSW for cosine similarity routing)
+CREATE INDEX "manual_sections_embedding_idx" ON "manual_sections"
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
@@ -0,0 +1,26 @@
+-- Will.content / Will.editorContent are Prisma Json (JSONB). Databases
+-- bootstrapped from the earlier SQLAlchemy models may still hold them as
+-- TEXT; convert those in place so JSON operators and indexes apply.
+DO $$
+BEGIN
+  IF (SELECT data_type FROM information_schema.columns
+      WHERE table_name = 'Will' AND column_name = 'content') <> 'jsonb' THEN
+    ALTER TABLE "Will" ALTER COLUMN "content" TYPE JSONB USING NULLIF("content", '')::jsonb;
+  END IF;
+  IF (SELECT data_type FROM information_schema.columns
+      WHERE table_name = 'Will' AND column_name = 'editorContent') <> 'jsonb' THEN
+    ALTER TABLE "Will" ALTER COLUMN "editorContent" TYPE JSONB USING NULLIF("editorContent", '')::jsonb;
+  END IF;
+END $$;
+
+-- CreateIndex (containment filters: content @> '{"willType": "joint"}',
+-- minor children / beneficiaries, ...)
+CREATE INDEX "Will_content_idx" ON "Will" USING GIN ("content" jsonb_path_ops);
+
+-- CreateIndex (lookup by testator ID number)
+CREATE INDEX "Will_content_testator_id_number_idx" ON "Will" (("content" -> 'testator' ->> 'idNumber'));
+
+-- CreateIndex (wills with at least one usufruct asset; jsonb_path_ops cannot
+-- answer key-existence, so keep a small partial index instead)
+CREATE INDEX "Will_content_usufruct_idx" ON "Will" ("userId")
+WHERE jsonb_path_exists("content", '$.assets[*].usufruct ? (@ != null)');
@@ -0,0 +1,4 @@
+-- CreateIndex (keyset pagination of a user's wills by updatedAt, id).
+-- INCLUDE carries the listing columns so pages are index-only scans.
+CREATE INDEX "Will_userId_updatedAt_id_idx" ON "Will"("userId", "updatedAt", "id")
+INCLUDE ("title", "status", "createdAt");